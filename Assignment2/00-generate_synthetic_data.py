@@ -0,0 +1,221 @@
+# ------------------------------------------------------------
+# Synthetic Porto Taxi dataset generator
+# Writes a porto.csv-compatible file (same columns and formatting)
+# so the pipeline and the benchmarks can run without the real 1.9 GB
+# dataset.
+#
+#   python 00-generate_synthetic_data.py --trips 100000 --output porto.csv
+# ------------------------------------------------------------
+import argparse
+import csv
+import time
+
+import numpy as np
+
+COLUMNS = ["TRIP_ID", "CALL_TYPE", "ORIGIN_CALL", "ORIGIN_STAND", "TAXI_ID",
+           "TIMESTAMP", "DAY_TYPE", "MISSING_DATA", "POLYLINE"]
+
+START_TIMESTAMP = 1372636800      # 2013-07-01 00:00:00 UTC, start of the real dataset
+DATASET_SECONDS = 365 * 24 * 3600
+SAMPLE_SECONDS = 15               # one GPS point every 15 s
+
+# Pick-up hot spots (lat, lon, weight): centre, Campanhã station, airport, Boavista
+HOTSPOTS = np.array([
+    (41.1496, -8.6109, 0.55),
+    (41.1486, -8.5855, 0.15),
+    (41.2370, -8.6700, 0.10),
+    (41.1579, -8.6291, 0.20),
+])
+
+CALL_TYPE_SHARES = {"A": 0.22, "B": 0.48, "C": 0.30}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a synthetic porto.csv-compatible dataset.")
+    parser.add_argument("--trips", type=int, default=100000, help="Number of trips before injected duplicates")
+    parser.add_argument("--taxis", type=int, default=448, help="Number of taxis")
+    parser.add_argument("--seed", type=int, default=4225, help="Random seed (same seed, same file)")
+    parser.add_argument("--output", default="porto.csv")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Trips generated and written per chunk")
+    parser.add_argument("--missing-rate", type=float, default=0.001, help="Share of trips with MISSING_DATA=True")
+    parser.add_argument("--invalid-call-type-rate", type=float, default=0.005,
+                        help="Share of trips violating the CALL_TYPE/ORIGIN rules")
+    parser.add_argument("--empty-rate", type=float, default=0.003, help="Share of trips with an empty POLYLINE")
+    parser.add_argument("--duplicate-rate", type=float, default=0.001,
+                        help="Share of trips written twice as fully identical rows")
+    parser.add_argument("--duplicate-id-rate", type=float, default=0.0005,
+                        help="Share of trips whose TRIP_ID is reused by a different trip")
+    return parser.parse_args()
+
+
+# ------------------------------------------------------------
+# Trip metadata (taxis, shifts, call types)
+# ------------------------------------------------------------
+def trip_lengths(rng, n):
+    """Points per trip: log-normal around ~40 points (10 min), with a long tail."""
+    lengths = np.rint(rng.lognormal(mean=np.log(38), sigma=0.65, size=n)).astype(np.int64)
+    return np.clip(lengths, 1, 2000)
+
+
+def taxi_schedules(rng, n_trips, n_taxis, lengths):
+    """
+    Assign trips to taxis and give every trip a start time. Each taxi works
+    shifts: trips follow each other with short idle gaps, and every few
+    trips a long break ends the shift. Shifts of different taxis overlap.
+    """
+    taxi_ids = 20000001 + np.arange(n_taxis)
+    activity = rng.gamma(shape=4.0, scale=1.0, size=n_taxis)
+    trips_per_taxi = rng.multinomial(n_trips, activity / activity.sum())
+
+    taxis = np.repeat(taxi_ids, trips_per_taxi)
+    starts = np.empty(n_trips, dtype=np.int64)
+    pos = 0
+    for count in trips_per_taxi:
+        if count == 0:
+            continue
+        durations = lengths[pos:pos + count] * SAMPLE_SECONDS
+        busy = durations.sum()
+        # Spread the remaining time over short idle gaps and ~1 shift break per 12 trips
+        free = max(DATASET_SECONDS - busy, count * 60)
+        breaks = rng.random(count) < 1 / 12
+        weights = np.where(breaks, rng.uniform(20, 40, count), rng.exponential(1.0, count))
+        gaps = (weights / weights.sum() * free * rng.uniform(0.6, 0.95)).astype(np.int64)
+        offset = rng.integers(0, max(DATASET_SECONDS - busy - gaps.sum(), 1))
+        starts[pos:pos + count] = START_TIMESTAMP + offset + np.cumsum(gaps) + np.cumsum(durations) - durations
+        pos += count
+
+    order = np.argsort(starts, kind="stable")
+    return taxis[order], starts[order], order
+
+
+def call_types(rng, n, invalid_rate):
+    """CALL_TYPE with matching ORIGIN_CALL / ORIGIN_STAND, plus injected rule violations."""
+    types = rng.choice(list(CALL_TYPE_SHARES), size=n, p=list(CALL_TYPE_SHARES.values()))
+    origin_call = np.where(types == "A", rng.integers(2001, 63883, size=n), -1)
+    origin_stand = np.where(types == "B", rng.integers(1, 64, size=n), -1)
+
+    invalid = np.flatnonzero(rng.random(n) < invalid_rate)
+    for i in invalid:
+        kind = rng.integers(0, 4)
+        if kind == 0:    # A without ORIGIN_CALL
+            types[i], origin_call[i], origin_stand[i] = "A", -1, -1
+        elif kind == 1:  # B without ORIGIN_STAND
+            types[i], origin_call[i], origin_stand[i] = "B", -1, -1
+        elif kind == 2:  # C with an ORIGIN_CALL
+            types[i], origin_call[i], origin_stand[i] = "C", rng.integers(2001, 63883), -1
+        else:            # unknown call type
+            types[i] = "D"
+    return types, origin_call, origin_stand
+
+
+# ------------------------------------------------------------
+# Polylines
+# ------------------------------------------------------------
+def segment_cumsum(values, lengths):
+    """Cumulative sum that restarts at the beginning of every trip."""
+    total = np.cumsum(values)
+    starts = np.cumsum(lengths) - lengths
+    base = np.repeat(total[starts] - values[starts], lengths)
+    return total - base
+
+
+def polylines(rng, lengths):
+    """Flat lon/lat arrays for all trips: a random walk with persistent heading at city speeds."""
+    n_points = int(lengths.sum())
+    trip_count = len(lengths)
+
+    spot = rng.choice(len(HOTSPOTS), size=trip_count, p=HOTSPOTS[:, 2] / HOTSPOTS[:, 2].sum())
+    start_lat = HOTSPOTS[spot, 0] + rng.normal(0, 0.012, trip_count)
+    start_lon = HOTSPOTS[spot, 1] + rng.normal(0, 0.015, trip_count)
+
+    heading = np.repeat(rng.uniform(0, 2 * np.pi, trip_count), lengths) + segment_cumsum(
+        rng.normal(0, 0.35, n_points), lengths)
+    speed = np.repeat(rng.uniform(4, 12, trip_count), lengths) * rng.uniform(0.3, 1.3, n_points)
+    step_m = speed * SAMPLE_SECONDS
+    # The first point of each trip is the start position itself
+    step_m[np.cumsum(lengths) - lengths] = 0.0
+
+    dlat = step_m * np.cos(heading) / 111_320.0
+    dlon = step_m * np.sin(heading) / (111_320.0 * np.cos(np.radians(41.15)))
+    lat = np.repeat(start_lat, lengths) + segment_cumsum(dlat, lengths)
+    lon = np.repeat(start_lon, lengths) + segment_cumsum(dlon, lengths)
+    return lon, lat
+
+
+def format_polyline(lon, lat):
+    return "[" + ",".join(f"[{x:.6f},{y:.6f}]" for x, y in zip(lon.tolist(), lat.tolist())) + "]"
+
+
+# ------------------------------------------------------------
+# Main
+# ------------------------------------------------------------
+def main():
+    args = parse_args()
+    t0 = time.time()
+    rng = np.random.default_rng(args.seed)
+
+    print("\n===== STEP 1: TRIP METADATA =====")
+    lengths = trip_lengths(rng, args.trips)
+    taxis, starts, order = taxi_schedules(rng, args.trips, args.taxis, lengths)
+    lengths = lengths[order]
+    types, origin_call, origin_stand = call_types(rng, args.trips, args.invalid_call_type_rate)
+
+    trip_ids = starts * 10**9 + 600000000 + taxis
+    missing = rng.random(args.trips) < args.missing_rate
+    empty = rng.random(args.trips) < args.empty_rate
+    duplicate_rows = rng.random(args.trips) < args.duplicate_rate
+    # A trip reusing the TRIP_ID of the trip before it
+    reused_id = np.flatnonzero(rng.random(args.trips) < args.duplicate_id_rate)
+    reused_id = reused_id[reused_id > 0]
+    trip_ids[reused_id] = trip_ids[reused_id - 1]
+
+    print(f"{args.trips:,} trips, {args.taxis} taxis, {int(lengths.sum()):,} GPS points before injections")
+    print(f"Injected: {missing.sum()} missing-data, {empty.sum()} empty, "
+          f"{duplicate_rows.sum()} duplicate rows, {len(reused_id)} duplicate TRIP_IDs")
+
+    print("\n===== STEP 2: WRITING TRIPS =====")
+    written = 0
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(COLUMNS)
+
+        for chunk_no, lo in enumerate(range(0, args.trips, args.chunk_size)):
+            hi = min(lo + args.chunk_size, args.trips)
+            # Seeded per chunk, so the same --seed and --chunk-size always give the same file
+            chunk_rng = np.random.default_rng([args.seed, chunk_no])
+            lens = lengths[lo:hi].copy()
+            lens[empty[lo:hi]] = 0
+            lon, lat = polylines(chunk_rng, lens)
+            offsets = np.concatenate([[0], np.cumsum(lens)])
+
+            for i in range(hi - lo):
+                k = lo + i
+                s, e = offsets[i], offsets[i + 1]
+                if missing[k] and e - s > 4:
+                    # GPS dropped out: the trajectory stops early
+                    e = s + chunk_rng.integers(2, e - s)
+                row = [
+                    str(trip_ids[k]),
+                    types[k],
+                    str(origin_call[k]) if origin_call[k] >= 0 else "",
+                    str(origin_stand[k]) if origin_stand[k] >= 0 else "",
+                    str(taxis[k]),
+                    str(starts[k]),
+                    "A",
+                    "True" if missing[k] else "False",
+                    format_polyline(lon[s:e], lat[s:e]),
+                ]
+                writer.writerow(row)
+                written += 1
+                if duplicate_rows[k]:
+                    writer.writerow(row)
+                    written += 1
+
+            print(f"Written {hi:,}/{args.trips:,} trips | elapsed {time.time() - t0:.1f}s")
+
+    print(f"\nSaved {written:,} rows to '{args.output}' in {time.time() - t0:.1f}s")
+    print("\n=== SYNTHETIC DATA GENERATED SUCCESSFULLY ===")
+
+
+if __name__ == "__main__":
+    main()
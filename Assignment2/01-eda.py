@@ -2,12 +2,16 @@
 # Exploratory Data Analysis (EDA)
 # TDT4225 - Very Large, Distributed Data Volumes
 # Porto Taxi Trajectory Dataset
+#
+#   python 01-eda.py                  # full EDA
+#   python 01-eda.py --sample 200000  # approximate EDA on a random sample
+#   python 01-eda.py --report eda_report.json  # Step 2-8 statistics only, one pass
 # ------------------------------------------------------------
+import argparse
 from collections import Counter
 
 import numpy as np
 from collections import Counter
-import datashader as ds
 import datashader.transfer_functions as tf
 from PIL._imaging import display
 from datashader.utils import export_image
@@ -20,8 +24,13 @@ import pandas as pd
 import ast
 import matplotlib.pyplot as plt
 import seaborn as sns
-from math import radians, sin, cos, sqrt, atan2
 from matplotlib.colors import LinearSegmentedColormap
+from heatmap_raster import RasterGrid, to_datashader
+from eda_sketches import HyperLogLog, QuantileSketch, ReservoirSample
+from eda_stats import compute_report, print_report
+from parsed_cache import ParsedCache
+from validation_rules import CALL_TYPE_RULES, RuleSet
+from trajectory_utils import parse_polylines, polyline_lengths, trip_distances, trip_durations, trip_index
 
 
 # ------------------------------------------------------------
@@ -47,20 +56,75 @@ def pretty_print(df, title=None, n=10):
     if len(df_display) > n:
         print(f"... ({len(df_display) - n} more rows)")
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth radius in km
-    dphi = radians(lat2 - lat1)
-    dlambda = radians(lon2 - lon1)
-    phi1, phi2 = radians(lat1), radians(lat2)
-    a = sin(dphi / 2)**2 + cos(phi1) * cos(phi2) * sin(dlambda / 2)**2
-    return 2 * R * atan2(sqrt(a), sqrt(1 - a))
+parser = argparse.ArgumentParser(description="Exploratory data analysis of the Porto taxi dataset.")
+parser.add_argument("--sample", type=int,
+                    help="Approximate mode: run Steps 2-10 on a uniform random sample of this many trips")
+parser.add_argument("--seed", type=int, default=4225, help="Random seed of the sample")
+parser.add_argument("--chunk-size", type=int, default=200000, help="Rows per chunk when sampling or reporting")
+parser.add_argument("--report", metavar="JSON",
+                    help="Only compute the Step 2-8 statistics in one streaming pass, write them to JSON and exit")
+args = parser.parse_args()
 
 # ------------------------------------------------------------
 # Step 1. Loading the Dataset
 # ------------------------------------------------------------
 print("\n===== STEP 1: LOADING THE DATASET =====")
 file_path = "porto.csv"   # Change this to your actual dataset filename
-df = pd.read_csv(file_path)
+
+if args.report:
+    # All statistics in one chunked read of the file; no plots
+    print(f"Computing streaming statistics for {file_path} ...")
+    report = compute_report(file_path, args.chunk_size)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print_report(report)
+    print(f"\nReport written to {args.report}")
+    raise SystemExit(0)
+
+# Reuse the parsed cache from an earlier run while porto.csv is unchanged
+# (the cache always holds the full dataset, so it is not used for samples)
+parsed_cache = ParsedCache(file_path)
+use_parsed_cache = not args.sample and parsed_cache.is_valid()
+approx = None
+
+if args.sample:
+    # One chunked pass: keep a random sample, and sketch the statistics that
+    # a sample cannot give (distinct counts, trip length distribution)
+    print(f"Approximate mode: sampling {args.sample:,} trips from {file_path}")
+    start_time = time.time()
+    reservoir = ReservoirSample(args.sample, seed=args.seed)
+    distinct_trip_ids = HyperLogLog()
+    distinct_taxi_ids = HyperLogLog()
+    trip_lengths = QuantileSketch()
+
+    for chunk in pd.read_csv(file_path, chunksize=args.chunk_size):
+        reservoir.add(chunk)
+        distinct_trip_ids.add(chunk["TRIP_ID"])
+        distinct_taxi_ids.add(chunk["TAXI_ID"])
+        trip_lengths.add(polyline_lengths(chunk["POLYLINE"]))
+        print(f"  read {reservoir.seen:,} rows | Elapsed: {time.time() - start_time:.1f}s")
+
+    df = reservoir.frame()
+    approx = {
+        "total_rows": reservoir.seen,
+        "distinct_trip_ids": distinct_trip_ids.count(),
+        "distinct_taxi_ids": distinct_taxi_ids.count(),
+        "trip_length_points": trip_lengths.summary(),
+    }
+    print(tabulate(
+        [["Rows in file (exact)", f"{approx['total_rows']:,}"],
+         ["Distinct TRIP_IDs (approx.)", f"{approx['distinct_trip_ids']:,}"],
+         ["Distinct TAXI_IDs (approx.)", f"{approx['distinct_taxi_ids']:,}"]]
+        + [[f"Trip length {k} (points{', approx.' if k.startswith('p') else ''})",
+            f"{v:,.1f}" if v is not None else "-"]
+           for k, v in approx["trip_length_points"].items() if k != "count"],
+        headers=["Statistic (whole file)", "Value"], tablefmt="fancy_grid"))
+    print(f"The following steps use the sample of {len(df):,} trips.")
+elif use_parsed_cache:
+    print(f"Loading parsed cache from '{parsed_cache.dir}' instead of {file_path}")
+    df = parsed_cache.load_frame()
+else:
+    df = pd.read_csv(file_path)
 
 print(f"Dataset loaded successfully! Shape: {df.shape}")
 pretty_print(df.head(), "First 5 rows")
@@ -95,8 +159,15 @@ for col in ["CALL_TYPE", "DAYTYPE", "MISSING_DATA"]:
     if col in df.columns:
         pretty_print(pd.DataFrame(df[col].value_counts()), f"Unique values in {col}")
 
+if approx:
+    print(f"\nApproximate mode: distinct counts are HyperLogLog estimates over the whole file, "
+          f"duplicate checks only see the {len(df):,} sampled rows.")
+
 if "TAXI_ID" in df.columns:
-    print(f"\nNumber of unique taxis: {df['TAXI_ID'].nunique()}")
+    if approx:
+        print(f"\nNumber of unique taxis (approx.): {approx['distinct_taxi_ids']:,}")
+    else:
+        print(f"\nNumber of unique taxis: {df['TAXI_ID'].nunique()}")
 
 # Trip ID duplication analysis
 if "TRIP_ID" in df.columns:
@@ -106,6 +177,9 @@ if "TRIP_ID" in df.columns:
 
     print(f"\nNumber of unique trips: {num_unique_trips}")
     print(f"Number of duplicate trips: {num_duplicate_trips}")
+    if approx:
+        print(f"Whole file (approx.): {approx['distinct_trip_ids']:,} unique of {approx['total_rows']:,} trips, "
+              f"~{max(approx['total_rows'] - approx['distinct_trip_ids'], 0):,} duplicates")
 
     trip_counts = df["TRIP_ID"].value_counts()
     duplicate_trip_counts = trip_counts[trip_counts > 1]
@@ -143,48 +217,35 @@ if num_duplicate_rows_all > 0:
 # ------------------------------------------------------------
 print("\n===== STEP 4b: LOGICAL CONSISTENCY CHECKS =====")
 
-invalid_conditions = []
-
-# Rule 1: If CALL_TYPE == 'A', ORIGIN_CALL should NOT be null
-invalid_A = df[(df["CALL_TYPE"] == "A") & (df["ORIGIN_CALL"].isnull())]
-invalid_conditions.append(("CALL_TYPE = 'A' but ORIGIN_CALL is NULL", invalid_A.shape[0]))
-
-# Rule 2: If CALL_TYPE == 'A', ORIGIN_STAND should be null
-invalid_A2 = df[(df["CALL_TYPE"] == "A") & (df["ORIGIN_STAND"].notnull())]
-invalid_conditions.append(("CALL_TYPE = 'A' but ORIGIN_STAND is NOT NULL", invalid_A2.shape[0]))
-
-# Rule 3: If CALL_TYPE == 'B', ORIGIN_STAND should NOT be null
-invalid_B = df[(df["CALL_TYPE"] == "B") & (df["ORIGIN_STAND"].isnull())]
-invalid_conditions.append(("CALL_TYPE = 'B' but ORIGIN_STAND is NULL", invalid_B.shape[0]))
-
-# Rule 4: If CALL_TYPE == 'B', ORIGIN_CALL should be null
-invalid_B2 = df[(df["CALL_TYPE"] == "B") & (df["ORIGIN_CALL"].notnull())]
-invalid_conditions.append(("CALL_TYPE = 'B' but ORIGIN_CALL is NOT NULL", invalid_B2.shape[0]))
-
-# Rule 5: If CALL_TYPE == 'C', both ORIGIN_CALL and ORIGIN_STAND should be null
-invalid_C = df[(df["CALL_TYPE"] == "C") & ((df["ORIGIN_CALL"].notnull()) | (df["ORIGIN_STAND"].notnull()))]
-invalid_conditions.append(("CALL_TYPE = 'C' but ORIGIN_CALL or ORIGIN_STAND is NOT NULL", invalid_C.shape[0]))
+# The five rules are defined once in validation_rules.py (shared with
+# 02-preprocess_data.py) and evaluated together in one pass
+call_type_rules = RuleSet(CALL_TYPE_RULES)
+rule_counts, invalid_mask = call_type_rules.count(df)
 
 # Combine and print results
-consistency_df = pd.DataFrame(invalid_conditions, columns=["Violation Description", "Count"])
+consistency_df = call_type_rules.summary()[["Violation Description", "Count"]]
 print(tabulate(consistency_df, headers='keys', tablefmt='fancy_grid'))
 
 # Optional: print some examples of invalid rows (if any)
-invalid_total = sum(c for _, c in invalid_conditions)
+invalid_total = int(rule_counts.sum())
 print(f"\nTotal inconsistent rows found: {invalid_total}")
 
 if invalid_total > 0:
-    sample_invalids = pd.concat([invalid_A, invalid_A2, invalid_B, invalid_B2, invalid_C]).head(10)
-    pretty_print(sample_invalids, "Example inconsistent rows (first 10)")
+    pretty_print(df[invalid_mask].head(10), "Example inconsistent rows (first 10)")
 
 
 # ------------------------------------------------------------
 # Step 5. Explore POLYLINE Structure
 # ------------------------------------------------------------
 print("\n===== STEP 5: POLYLINE STRUCTURE =====")
-pretty_print(df[["POLYLINE"]].head(3).reset_index(), "Example POLYLINE values (truncated)")
-
-sample_rows = df["POLYLINE"].head(5).apply(lambda x: ast.literal_eval(x))
+if "POLYLINE" in df.columns:
+    polylines = df["POLYLINE"].head(5)
+else:
+    # The parsed cache keeps no POLYLINE strings; rebuild the few shown here
+    polylines = pd.Series(parsed_cache.load_polylines(range(min(5, len(df)))), index=df.index[:5], name="POLYLINE")
+pretty_print(polylines.head(3).to_frame().reset_index(), "Example POLYLINE values (truncated)")
+
+sample_rows = polylines.apply(lambda x: ast.literal_eval(x))
 for i, coords in enumerate(sample_rows):
     print(f"\nTrip {i+1} has {len(coords)} GPS points")
     if len(coords) > 0:
@@ -211,61 +272,35 @@ print("\n=== EDA COMPLETED SUCCESSFULLY ===")
 
 # ------------------------------------------------------------
 # Step 7: Parse POLYLINE only once
+# The trajectories are kept as flat lat/lon arrays with per-trip offsets
+# (trip i owns points offsets[i]:offsets[i+1]) and cached on disk together
+# with the trip columns, so the next run skips the CSV and the parsing.
 # ------------------------------------------------------------
-
-
-#df = pd.read_pickle("parsed.pkl")
-
-
 print("\n===== STEP 7: PARSING POLYLINES =====")
 start_time = time.time()
-parsed_polylines = []
 n = len(df)
-progress_intervals = 10
-checkpoint = max(n // progress_intervals, 1)
-
-for i, polyline_str in enumerate(df["POLYLINE"]):
-    try:
-        coords = json.loads(polyline_str)
-        parsed_polylines.append(coords if isinstance(coords, list) else [])
-    except:
-        parsed_polylines.append([])
-    if (i + 1) % checkpoint == 0 or (i + 1) == n:
-        progress = int(((i + 1) / n) * 100)
-        elapsed = time.time() - start_time
-        print(f"Parsing POLYLINE: {progress}% ({i+1}/{n}) | Elapsed: {elapsed:.1f}s")
 
-df["POLYLINE_LIST"] = parsed_polylines
-df.to_pickle("parsed.pkl")
+if use_parsed_cache:
+    point_lat, point_lon, offsets = parsed_cache.load_trajectories()
+    print(f"Loaded {len(point_lat):,} parsed GPS points from cache | Elapsed: {time.time() - start_time:.1f}s")
+else:
+    point_lat, point_lon, offsets = parse_polylines(df["POLYLINE"])
+    print(f"Parsed {len(point_lat):,} GPS points | Elapsed: {time.time() - start_time:.1f}s")
+    if not args.sample:
+        parsed_cache.save(df, point_lat, point_lon, offsets)
 
 
 # ------------------------------------------------------------
 # Step 8: Compute Distance and Duration
+# The haversine distances of every trip are computed in one pass over
+# the flat point arrays from Step 7.
 # ------------------------------------------------------------
-def compute_trip_metrics_from_list(coords):
-    if len(coords) < 2:
-        return 0.0, len(coords) * 15
-    dist = 0.0
-    for i in range(len(coords) - 1):
-        lon1, lat1 = coords[i]
-        lon2, lat2 = coords[i + 1]
-        dist += haversine_distance(lat1, lon1, lat2, lon2)
-    duration = len(coords) * 15
-    return dist, duration
-
 print("\n===== STEP 8: CALCULATING DISTANCE AND DURATION =====")
-distances = []
-durations = []
 start_time = time.time()
 
-for i, coords in enumerate(df["POLYLINE_LIST"]):
-    dist, dur = compute_trip_metrics_from_list(coords)
-    distances.append(dist)
-    durations.append(dur)
-    if (i + 1) % checkpoint == 0 or (i + 1) == n:
-        progress = int(((i + 1) / n) * 100)
-        elapsed = time.time() - start_time
-        print(f"Progress: {progress}% ({i+1}/{n}) | Elapsed: {elapsed:.1f}s")
+distances = trip_distances(point_lat, point_lon, offsets)
+durations = trip_durations(offsets)
+print(f"Computed metrics for {n:,} trips | Elapsed: {time.time() - start_time:.1f}s")
 
 df["distance_km"] = distances
 df["duration_sec"] = durations
@@ -276,18 +311,16 @@ pretty_print(df[["TRIP_ID", "distance_km", "duration_sec"]].head())
 # Step 9: Scatter Plot (Distance vs Duration, log-log)
 # ------------------------------------------------------------
 
-# Filter rows with missing data
-missing_df = df[df["MISSING_DATA"] == True].copy()
-
-# Expand POLYLINE_LIST into individual (lon, lat, trip_id) points
-expanded_points = []
-for trip_id, poly in zip(missing_df["TRIP_ID"], missing_df["POLYLINE_LIST"]):
-    if isinstance(poly, list) and len(poly) > 0:
-        for lon, lat in poly:
-            expanded_points.append((trip_id, lon, lat))
+# One (TRIP_ID, lon, lat) row per GPS point
+point_trip = trip_index(offsets)
+all_points_df = pd.DataFrame({
+    "TRIP_ID": df["TRIP_ID"].to_numpy()[point_trip],
+    "lon": point_lon,
+    "lat": point_lat,
+})
 
-# Create a DataFrame for plotting
-points_df = pd.DataFrame(expanded_points, columns=["TRIP_ID", "lon", "lat"])
+# Filter points of trips with missing data
+points_df = all_points_df[(df["MISSING_DATA"] == True).to_numpy()[point_trip]]
 
 # Plot the scatterplot
 plt.figure(figsize=(10, 8))
@@ -307,14 +340,7 @@ plt.ylabel("Latitude")
 plt.grid(True, linestyle="--", alpha=0.5)
 plt.show()
 
-expanded_points = []
-for trip_id, poly in zip(df["TRIP_ID"], df["POLYLINE_LIST"]):
-    if isinstance(poly, list) and len(poly) > 0:
-        for lon, lat in poly:
-            expanded_points.append((trip_id, lon, lat))
-
-# Create a DataFrame for plotting
-points_df = pd.DataFrame(expanded_points, columns=["TRIP_ID", "lon", "lat"])
+points_df = all_points_df
 
 # Plot the scatterplot
 plt.figure(figsize=(10, 8))
@@ -361,81 +387,33 @@ plt.show()
 # ------------------------------------------------------------
 
 
-# --- Assumptions: ---
-# - df["POLYLINE_LIST"] exists and is a list-of-lists of [lon, lat] pairs
-# - df["MISSING_DATA"] exists (boolean)
-# - If POLYLINE_LIST is not present, parse once earlier (json.loads/ast.literal_eval)
+# 1) Uses point_lat / point_lon from Step 7; free the per-point DataFrame of Step 9 first
+del all_points_df, points_df
 
-# 1) Quick check
-if "POLYLINE_LIST" not in df.columns:
-    raise RuntimeError("You must have df['POLYLINE_LIST'] parsed already.")
+# 2) Bounding box of the points
+lon_min, lon_max = point_lon.min(), point_lon.max()
+lat_min, lat_max = point_lat.min(), point_lat.max()
+print(f"Bounds: lon [{lon_min:.6f}, {lon_max:.6f}], lat [{lat_min:.6f}, {lat_max:.6f}]")
+print(f"Total GPS points: {len(point_lat):,}")
 
-# 2) Compute bounding box and total points (one scan; no heavy memory)
-print("Computing bounds and total point count...")
-t0 = time.time()
-min_lon = 1e9
-max_lon = -1e9
-min_lat = 1e9
-max_lat = -1e9
-total_points = 0
-
-for poly in df["POLYLINE_LIST"]:
-    if not poly:
-        continue
-    # poly is list of [lon, lat]
-    lons = [p[0] for p in poly]
-    lats = [p[1] for p in poly]
-    if min(lons) < min_lon: min_lon = min(lons)
-    if max(lons) > max_lon: max_lon = max(lons)
-    if min(lats) < min_lat: min_lat = min(lats)
-    if max(lats) > max_lat: max_lat = max(lats)
-    total_points += len(poly)
-
-print(f"Bounds: lon [{min_lon:.6f}, {max_lon:.6f}], lat [{min_lat:.6f}, {max_lat:.6f}]")
-print(f"Total GPS points (approx): {total_points:,} - time {time.time()-t0:.1f}s")
-
-# 3) Create a datashader Canvas
-# choose resolution that suits you (higher = more detail, slower)
+# 3) Count the points per pixel into a preallocated grid
+# choose resolution that suits you (higher = more detail, slower).
+# heatmap_raster.py does the same straight from points_clean.csv or the Point table.
 plot_width, plot_height = 24000, 18000
-cvs = ds.Canvas(plot_width=plot_width,
-                plot_height=plot_height,
-                x_range=(min_lon, max_lon),
-                y_range=(min_lat, max_lat))
-
-# 4) Aggregate in chunks to avoid building a huge intermediate DataFrame
-# We'll sum partial aggregations into `agg_total`.
-chunk_trip_count = 5000   # tune: how many trips' points to process per chunk
-agg_total = None
-n = len(df)
+grid = RasterGrid((lon_min, lon_max), (lat_min, lat_max), plot_width, plot_height)
+
+print("Aggregating points into raster ...")
 t0 = time.time()
-chunk = []
-count_trips = 0
-
-print("Aggregating points into raster (chunked) ...")
-for i, poly in enumerate(df["POLYLINE_LIST"]):
-    if poly:
-        # extend chunk with tuples (lon, lat)
-        for lon, lat in poly:
-            chunk.append((lon, lat))
-
-    count_trips += 1
-    if (count_trips % chunk_trip_count == 0) or (i == n - 1):
-        # convert to DataFrame (smallish chunk)
-        if chunk:
-            chunk_df = pd.DataFrame(chunk, columns=["lon", "lat"])
-            partial = cvs.points(chunk_df, 'lon', 'lat', ds.count())
-            if agg_total is None:
-                agg_total = partial
-            else:
-                agg_total = agg_total + partial
-            chunk = []  # reset chunk
-        # progress print
-        progress = (i + 1) / n * 100
-        print(f"  processed trips {(i+1):,}/{n:,} ({progress:.1f}%), elapsed {time.time()-t0:.1f}s")
+counts = grid.empty()
+grid.add(counts, point_lat, point_lon)
+print(f"Rasterized in {time.time()-t0:.1f}s")
 
 # if no points at all
-if agg_total is None:
-    raise RuntimeError("No GPS points were aggregated - check POLYLINE_LIST content")
+if counts.max() == 0:
+    raise RuntimeError("No GPS points were aggregated - check the parsed POLYLINE data")
+
+# 4) Wrap the counts like a datashader aggregate for shading
+agg_total = to_datashader(counts, grid)
 
 # 5) Colorize the aggregated image
 cmap = LinearSegmentedColormap.from_list('black_orange_yellow', ['black', 'orange', 'yellow'])
@@ -470,8 +448,8 @@ plt.show()
 #     plt.figure(figsize=(10,8))
 #     plt.imshow(img2.to_pil())
 #     plt.scatter(
-#         [(x - min_lon) / (max_lon - min_lon) * plot_width for x in xs],
-#         [(y - min_lat) / (max_lat - min_lat) * plot_height for y in ys],
+#         [(x - lon_min) / (lon_max - lon_min) * plot_width for x in xs],
+#         [(y - lat_min) / (lat_max - lat_min) * plot_height for y in ys],
 #         s=4, c='red', alpha=0.6, label='Missing Data (sampled)'
 #     )
 #     plt.legend()
@@ -6,13 +6,18 @@ import json
 import pandas as pd
 import ast
 
+from porto_schema import RAW_DTYPES, cast_codes
+from validation_rules import CALL_TYPE_RULES, UNKNOWN_CALL_TYPE, RuleSet
+
 # ------------------------------------------------------------
 # Step 1. Load raw dataset
 # ------------------------------------------------------------
 print("\n===== STEP 1: LOADING RAW DATA =====")
 file_path = "porto.csv"
-df = pd.read_csv(file_path)
+# Compact types (porto_schema.py): integer ids, categorical codes
+df = pd.read_csv(file_path, dtype=RAW_DTYPES)
 print(f"Loaded dataset with shape: {df.shape}")
+print(f"Memory usage (excluding POLYLINE): {df.drop(columns='POLYLINE').memory_usage(deep=True).sum() / 1e6:.1f} MB")
 
 # ------------------------------------------------------------
 # Step 2. Remove incomplete trips (MISSING_DATA=True)
@@ -40,17 +45,11 @@ print(f"Remaining trips: {len(df)}")
 print("\n===== STEP 4: VALIDATE CALL_TYPE RULES =====")
 before_ct = len(df)
 
-# Rule for A: must have ORIGIN_CALL (not null), ORIGIN_STAND should be NaN
-mask_A = (df["CALL_TYPE"] == "A") & (df["ORIGIN_CALL"].notna())
-
-# Rule for B: must have ORIGIN_STAND (not null), ORIGIN_CALL should be NaN
-mask_B = (df["CALL_TYPE"] == "B") & (df["ORIGIN_STAND"].notna())
-
-# Rule for C: both ORIGIN_CALL and ORIGIN_STAND must be NaN
-mask_C = (df["CALL_TYPE"] == "C") & (df["ORIGIN_CALL"].isna()) & (df["ORIGIN_STAND"].isna())
-
-# Keep only rows that match any of the valid rules
-df = df[mask_A | mask_B | mask_C]
+# Same rules as the EDA (validation_rules.py): A needs ORIGIN_CALL, B needs
+# ORIGIN_STAND, C needs neither, and unknown call types are removed
+call_type_rules = RuleSet(CALL_TYPE_RULES + [UNKNOWN_CALL_TYPE])
+df = cast_codes(call_type_rules.apply(df))
+print(call_type_rules.summary().to_string(index=False))
 
 removed_ct = before_ct - len(df)
 print(f"Removed {removed_ct} rows that violated CALL_TYPE rules.")
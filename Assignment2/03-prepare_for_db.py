@@ -1,18 +1,36 @@
 # ------------------------------------------------------------
 # Prepare cleaned Porto dataset for database insertion (streaming)
-# Splits porto_preprocessed.csv into trips_clean.csv and points_clean.csv
+# Splits porto_preprocessed.csv into trips_clean.csv and points_clean.csv,
+# and writes every trajectory to one binary file (see trajectory_file.py)
+#
+#   python 03-prepare_for_db.py [--trajectories trajectories.ptrj]
+#                               [--encoding varint|fixed] [--no-trajectories]
 # ------------------------------------------------------------
 
+import argparse
+import os
+
 import pandas as pd
 import json
 import csv
 
+from porto_schema import PREPROCESSED_DTYPES
+from trajectory_file import ENCODINGS, TrajectoryWriter
+from trajectory_utils import parse_polylines
+
+parser = argparse.ArgumentParser(description="Prepare the cleaned Porto data for the database.")
+parser.add_argument("--trajectories", default="trajectories.ptrj", help="Binary trajectory file to write")
+parser.add_argument("--encoding", choices=sorted(ENCODINGS), default="varint",
+                    help="varint: smallest file; fixed: int32 points, zero-copy per-trip views")
+parser.add_argument("--no-trajectories", action="store_true", help="Skip the binary trajectory file")
+args = parser.parse_args()
+
 # ------------------------------------------------------------
 # Step 1. Load cleaned dataset
 # ------------------------------------------------------------
 print("\n===== STEP 1: LOADING CLEANED DATA =====")
 file_path = "porto_preprocessed.csv"
-df = pd.read_csv(file_path)
+df = pd.read_csv(file_path, dtype=PREPROCESSED_DTYPES)
 print(f"Loaded cleaned dataset with shape: {df.shape}")
 
 # ------------------------------------------------------------
@@ -79,4 +97,22 @@ with open(output_file, "w", newline="", encoding="utf-8") as f:
             print(f"Processing points: {progress}% done...")
 
 print(f"Finished streaming all points to {output_file}")
+
+# ------------------------------------------------------------
+# Step 4. Write the binary trajectory file
+# ------------------------------------------------------------
+if not args.no_trajectories:
+    print("\n===== STEP 4: WRITE BINARY TRAJECTORY FILE =====")
+    chunk_rows = 100_000
+    with TrajectoryWriter(args.trajectories, encoding=args.encoding) as trajectory_writer:
+        for lo in range(0, len(df), chunk_rows):
+            chunk = df.iloc[lo:lo + chunk_rows]
+            lat, lon, offsets = parse_polylines(chunk["POLYLINE"].fillna("[]"))
+            trajectory_writer.add(chunk["TRIP_ID"].to_numpy(), lat, lon, offsets)
+
+    size = os.path.getsize(args.trajectories)
+    points = os.path.getsize(output_file)
+    print(f"Saved {args.trajectories} ({args.encoding}): {size / 2**20:.1f} MB "
+          f"vs {points / 2**20:.1f} MB for {output_file}")
+
 print("\n=== DATABASE PREPARATION COMPLETED SUCCESSFULLY ===")
@@ -1,11 +1,72 @@
 # ------------------------------------------------------------
 # Insert cleaned Porto dataset into MySQL database
+# Both files are loaded in shards with a checkpoint per shard (see
+# checkpoint_loader.py); rerunning the script after a crash or a lost
+# connection resumes where the last run stopped. With --partition-by
+# month, Trip and Point get one partition per month (month_partitions.py)
+# and a single month can be dropped or reloaded later. After the load the
+# per-taxi daily rollup used by tasks 2, 3, 4a, 5 and 11 is built.
+#
+#   python 04-insert_to_db.py [--restart] [--shard-mb 8] [--max-retries 5]
+#                             [--storage points|trajectory|both]
+#                             [--partition-by none|month]
+#                             [--drop-month YYYY-MM | --reload-month YYYY-MM]
+#                             [--no-rollup]
 # ------------------------------------------------------------
 
+import argparse
+import os
+import sys
+
 from DbConnector import DbConnector
-import pandas as pd
 from mysql.connector import Error
-import gc  # garbage collector
+
+from checkpoint_loader import CHECKPOINT_DDL, CheckpointedLoader
+from month_partitions import (delete_orphan_trajectories, first_rows, first_trips, in_partition, is_partitioned,
+                              parse_month, partition_rows, truncate_month, with_trip_month)
+from porto_schema import (PARTITIONED_POINT_DDL, PARTITIONED_TRAJECTORY_DDL, PARTITIONED_TRIP_DDL, POINT_DDL,
+                          POINT_DTYPES, TRAJECTORY_DDL, TRIP_DDL, TRIP_DTYPES, db_rows, month_keys)
+from trajectory_codec import trajectory_rows
+
+# The rollup is a staged table of the task runner (task2/helpers/staging_manager.py)
+TASK2_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "task2")
+sys.path.append(TASK2_DIR)
+
+from helpers.staging_manager import StagingManager
+
+parser = argparse.ArgumentParser(description="Load trips_clean.csv and points_clean.csv into MySQL.")
+parser.add_argument("--trips", default="trips_clean.csv")
+parser.add_argument("--points", default="points_clean.csv")
+parser.add_argument("--shard-mb", type=float, default=8,
+                    help="size of one committed shard of the CSV files (default: 8 MB)")
+parser.add_argument("--max-retries", type=int, default=5,
+                    help="retries per shard after a lost connection (default: 5)")
+parser.add_argument("--storage", choices=["points", "trajectory", "both"], default="points",
+                    help="GPS points as one Point row per point, one TripTrajectory row per trip "
+                         "(compressed blob, see trajectory_codec.py) or both (default: points)")
+parser.add_argument("--partition-by", choices=["none", "month"], default="none",
+                    help="create Trip and Point partitioned by trip month (no foreign keys; default: none)")
+months = parser.add_mutually_exclusive_group()
+months.add_argument("--drop-month", metavar="YYYY-MM",
+                    help="empty one month of a month-partitioned database and exit")
+months.add_argument("--reload-month", metavar="YYYY-MM",
+                    help="empty one month of a month-partitioned database and load it again from the CSV files")
+parser.add_argument("--no-rollup", action="store_true",
+                    help="skip building the per-taxi daily rollup table taxi_day_rollup")
+parser.add_argument("--restart", action="store_true",
+                    help="drop the tables and the checkpoints and load from scratch")
+args = parser.parse_args()
+
+month = None
+if args.drop_month or args.reload_month:
+    if args.restart:
+        parser.error("--restart cannot be combined with --drop-month/--reload-month")
+    try:
+        month = parse_month(args.drop_month or args.reload_month)
+    except ValueError as e:
+        parser.error(str(e))
+    args.partition_by = "month"
+partitioned = args.partition_by == "month"
 
 # ------------------------------------------------------------
 # Step 1. Connect to the database
@@ -25,163 +86,236 @@ except Exception as e:
 # ------------------------------------------------------------
 print("\n===== STEP 2: CREATING TABLES =====")
 
+# BIGINT/INT/ENUM column types, see porto_schema.py
 try:
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Trip (
-            trip_id VARCHAR(50) PRIMARY KEY,
-            taxi_id VARCHAR(20),
-            call_type CHAR(1),
-            origin_call VARCHAR(20) NULL,
-            origin_stand INT NULL,
-            timestamp DATETIME,
-            day_type CHAR(1)
-        );
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Point (
-            point_id INT AUTO_INCREMENT PRIMARY KEY,
-            trip_id VARCHAR(50),
-            seq INT,
-            latitude FLOAT,
-            longitude FLOAT,
-            FOREIGN KEY (trip_id) REFERENCES Trip(trip_id)
-        );
-    """)
+    if args.restart:
+        for table in ["Point", "TripTrajectory", "Trip", "LoadCheckpoint", "taxi_day_rollup"]:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        print("Dropped Trip, Point, TripTrajectory, LoadCheckpoint and taxi_day_rollup (--restart).")
+    cursor.execute(PARTITIONED_TRIP_DDL if partitioned else TRIP_DDL)
+    if args.storage in ("points", "both"):
+        cursor.execute(PARTITIONED_POINT_DDL if partitioned else POINT_DDL)
+    if args.storage in ("trajectory", "both"):
+        cursor.execute(PARTITIONED_TRAJECTORY_DDL if partitioned else TRAJECTORY_DDL)
+    cursor.execute(CHECKPOINT_DDL)
 
     db.commit()
-    print("Tables Trip and Point are ready.")
+    print(f"Tables for storage mode '{args.storage}' are ready"
+          f"{' (partitioned by month)' if partitioned else ''}.")
 except Error as e:
     print("ERROR creating tables:", e)
     connection.close_connection()
     exit(1)
 
-# ------------------------------------------------------------
-# Step 3. Load data from CSVs
-# ------------------------------------------------------------
-print("\n===== STEP 3: LOADING CLEANED CSV FILES =====")
+# CREATE TABLE IF NOT EXISTS keeps tables of an earlier load as they are
+point_tables = [t for t, mode in [("Point", "points"), ("TripTrajectory", "trajectory")]
+                if args.storage in (mode, "both")]
+for table in ["Trip"] + [t for t in point_tables if t == "Point"]:
+    if is_partitioned(cursor, table) != partitioned:
+        print(f"ERROR: {table} already exists {'without' if partitioned else 'with'} month partitions; "
+              f"use --restart to recreate it{' with --partition-by month' if partitioned else ''}.")
+        connection.close_connection()
+        exit(1)
 
-trips_file = "trips_clean.csv"
-points_file = "points_clean.csv"
+shard_bytes = int(args.shard_mb * (1 << 20))
 
-try:
-    trips_df = pd.read_csv(trips_file, dtype=str)
-    print(f"Loaded {len(trips_df):,} trips from {trips_file}")
-except Exception as e:
-    print("ERROR loading trips CSV:", e)
-    connection.close_connection()
-    exit(1)
+# Point rows carry the start month of their trip, so MySQL puts them in the
+# same month partition as the trip. A partitioned Trip only gets the first
+# row of every trip_id. With --reload-month every loader only reads the
+# rows of that month's partition and keeps its checkpoints under its own name.
+trips_by_id = first_trips(args.trips) if partitioned else None
 
-# ------------------------------------------------------------
-# Step 4. Insert Trip data (IGNORE duplicates)
-# ------------------------------------------------------------
-print("\n===== STEP 4: INSERTING TRIP DATA (IGNORE duplicates) =====")
 
-trip_insert_query = """
-    INSERT IGNORE INTO Trip (trip_id, taxi_id, call_type, origin_call, origin_stand, timestamp, day_type)
-    VALUES (%s, %s, %s, %s, %s, %s, %s)
-"""
+def _first_trip_rows(frame):
+    return first_rows(frame, trips_by_id)
 
-try:
-    data = [tuple(x) for x in trips_df.to_numpy()]
-    batch_size = 5000
-    total = len(data)
 
-    for i in range(0, total, batch_size):
-        batch = data[i:i + batch_size]
-        cursor.executemany(trip_insert_query, batch)
-        db.commit()
-        print(f"Inserted {i + len(batch):,} / {total:,} trips...")
+def _month_trip_rows(frame):
+    frame = first_rows(frame, trips_by_id)
+    return frame[in_partition(month_keys(frame["timestamp"]), month)]
 
-    print(f"Inserted all {total:,} trips into Trip table (duplicates ignored).")
-except Error as e:
-    print("ERROR inserting trips:", e)
-    db.rollback()
-    connection.close_connection()
-    exit(1)
 
-# ------------------------------------------------------------
-# Step 5. Insert Point data (chunked, IGNORE + memory safe)
-# ------------------------------------------------------------
-print("\n===== STEP 5: INSERTING POINT DATA (CHUNKED + MEMORY SAFE) =====")
+def _month_point_rows(frame):
+    return frame[in_partition(trips_by_id["trip_month"].reindex(frame["trip_id"].to_numpy()), month)]
 
-cursor.execute("SET FOREIGN_KEY_CHECKS = 0;")
-db.commit()
 
-point_insert_query = """
-    INSERT IGNORE INTO Point (trip_id, seq, latitude, longitude)
-    VALUES (%s, %s, %s, %s)
-"""
+if month is not None:
+    trip_filter = _month_trip_rows
+else:
+    trip_filter = _first_trip_rows if partitioned else None
+point_filter = _month_point_rows if month is not None else None
 
-def normalize_trip_id(trip_id):
-    try:
-        if pd.isna(trip_id):
-            return None
-        s = str(trip_id).strip()
-        if "e" in s or "E" in s or "." in s:
-            s = str(int(float(s)))
-        return s
-    except Exception:
-        return str(trip_id)
 
-try:
-    chunk_size = 50000
-    total_inserted = 0
+def month_source(table, path):
+    return f"{table}:{os.path.basename(path)}:{month}" if month is not None else None
+
 
-    for chunk in pd.read_csv(points_file, chunksize=chunk_size):
-        chunk["trip_id"] = chunk["trip_id"].apply(normalize_trip_id)
+trip_loader = CheckpointedLoader(
+    connection, args.trips, "Trip",
+    """
+    INSERT IGNORE INTO Trip (trip_id, taxi_id, call_type, origin_call, origin_stand, timestamp, day_type)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """,
+    dtypes=TRIP_DTYPES, key_column="trip_id",
+    shard_bytes=shard_bytes, batch_rows=5000, max_retries=args.max_retries,
+    row_filter=trip_filter, source=month_source("Trip", args.trips),
+)
 
-        if chunk.empty:
-            continue
+# Foreign key checks are a session setting, so they are switched off again
+# on every (re)connected session that inserts a point shard
+if partitioned:
+    point_loader = CheckpointedLoader(
+        connection, args.points, "Point",
+        """
+        INSERT IGNORE INTO Point (trip_id, trip_month, seq, latitude, longitude)
+        VALUES (%s, %s, %s, %s, %s)
+        """,
+        dtypes=POINT_DTYPES, id_column="point_id",
+        transform=lambda frame: db_rows(with_trip_month(frame, trips_by_id)),
+        shard_bytes=shard_bytes, batch_rows=50000, max_retries=args.max_retries,
+        row_filter=point_filter, source=month_source("Point", args.points),
+    )
+else:
+    point_loader = CheckpointedLoader(
+        connection, args.points, "Point",
+        """
+        INSERT IGNORE INTO Point (trip_id, seq, latitude, longitude)
+        VALUES (%s, %s, %s, %s)
+        """,
+        dtypes=POINT_DTYPES, id_column="point_id",
+        shard_bytes=shard_bytes, batch_rows=50000, max_retries=args.max_retries,
+        session_sql=["SET FOREIGN_KEY_CHECKS = 0"],
+    )
 
-        data = [
-            (str(r["trip_id"]), int(r["seq"]), float(r["latitude"]), float(r["longitude"]))
-            for _, r in chunk.iterrows()
-        ]
+# One row per trip from the same points file; shards end between trips
+trajectory_loader = CheckpointedLoader(
+    connection, args.points, "TripTrajectory",
+    """
+    INSERT IGNORE INTO TripTrajectory (trip_id, n_points, points)
+    VALUES (%s, %s, %s)
+    """,
+    dtypes=POINT_DTYPES, key_column="trip_id", group_column="trip_id", transform=trajectory_rows,
+    shard_bytes=shard_bytes, batch_rows=2000, max_retries=args.max_retries,
+    session_sql=["SET FOREIGN_KEY_CHECKS = 0"],
+    row_filter=point_filter, source=month_source("TripTrajectory", args.points),
+)
 
-        cursor.executemany(point_insert_query, data)
+point_loaders = []
+if args.storage in ("points", "both"):
+    point_loaders.append(("Point", point_loader))
+if args.storage in ("trajectory", "both"):
+    point_loaders.append(("TripTrajectory", trajectory_loader))
+
+# ------------------------------------------------------------
+# Step 2b. Empty one month (--drop-month / --reload-month)
+# ------------------------------------------------------------
+if month is not None:
+    print(f"\n===== STEP 2b: EMPTYING MONTH {month} =====")
+    try:
+        tables = ["Trip"] + (["Point"] if "Point" in point_tables else [])
+        truncate_month(cursor, month, tables)
+        print(f"Truncated partition p{month} of {', '.join(tables)}.")
+        cursor.execute("SHOW TABLES LIKE 'TripTrajectory'")
+        if cursor.fetchall():
+            print(f"Deleted {delete_orphan_trajectories(cursor):,} TripTrajectory rows of that month.")
         db.commit()
-        total_inserted += len(data)
-        print(f"Inserted {total_inserted:,} points...")
+        for _, loader in [("Trip", trip_loader)] + point_loaders:
+            loader.reset()
+    except Error as e:
+        print(f"ERROR emptying month {month}:", e)
+        connection.close_connection()
+        exit(1)
 
-        del chunk, data
-        gc.collect()
+    if args.drop_month:
+        # The checkpoints of the full load still cover this month, so a plain
+        # rerun does not bring it back; --reload-month does
+        connection.close_connection()
+        print(f"Month {month} dropped; load it again with --reload-month {args.drop_month}.")
+        exit(0)
 
-    print(f"Finished inserting {total_inserted:,} points into Point table (duplicates ignored).")
-except Error as e:
-    print("ERROR inserting points:", e)
-    db.rollback()
+# ------------------------------------------------------------
+# Step 3. Insert Trip data (checkpointed, IGNORE duplicates)
+# ------------------------------------------------------------
+print("\n===== STEP 3: INSERTING TRIP DATA (CHECKPOINTED) =====")
+try:
+    total = trip_loader.load()
+    print(f"Inserted {total:,} trips into Trip table in this run (duplicates ignored).")
+except Exception as e:
+    print("ERROR inserting trips:", e)
+    print("Committed shards are kept; rerun the script to resume.")
     connection.close_connection()
     exit(1)
+
+# ------------------------------------------------------------
+# Step 4. Insert Point data (checkpointed, memory safe)
+# ------------------------------------------------------------
+print("\n===== STEP 4: INSERTING POINT DATA (CHECKPOINTED) =====")
+try:
+    for name, loader in point_loaders:
+        total_inserted = loader.load()
+        print(f"Inserted {total_inserted:,} rows into {name} table in this run.")
 except Exception as e:
-    print("Unexpected error inserting points:", e)
-    db.rollback()
+    print("ERROR inserting points:", e)
+    print("Committed shards are kept; rerun the script to resume.")
     connection.close_connection()
     exit(1)
-finally:
+
+connection.cursor.execute("SET FOREIGN_KEY_CHECKS = 1;")
+connection.db_connection.commit()
+
+# ------------------------------------------------------------
+# Step 5. Verify row counts per shard
+# ------------------------------------------------------------
+print("\n===== STEP 5: VERIFYING ROW COUNTS PER SHARD =====")
+failed = False
+for name, loader in [("Trip", trip_loader)] + point_loaders:
     try:
-        if db.is_connected():
-            cursor.execute("SET FOREIGN_KEY_CHECKS = 1;")
-            db.commit()
-    except Exception:
-        pass
+        shards = loader.committed()
+        problems = loader.verify()
+    except Exception as e:
+        print(f"Verification of {name} failed:", e)
+        failed = True
+        continue
+
+    rows_read = int(shards["rows_read"].sum()) if len(shards) else 0
+    rows_inserted = int(shards["rows_inserted"].sum()) if len(shards) else 0
+    print(f"{name}: {len(shards):,} shards, {rows_read:,} rows read, {rows_inserted:,} inserted, "
+          f"{rows_read - rows_inserted:,} ignored as duplicates")
+    if len(problems):
+        failed = True
+        print(f"  {len(problems)} shard(s) with missing rows:")
+        print(problems.to_string(index=False))
+    else:
+        print("  All shards verified.")
+
+if partitioned:
+    rows = partition_rows(cursor, "Trip")
+    print("\nTrip rows per month partition (estimates):")
+    print(rows.to_string(index=False))
 
 # ------------------------------------------------------------
-# Step 6. Verification summary
+# Step 6. Build the per-taxi daily rollup
 # ------------------------------------------------------------
-print("\n===== STEP 6: VERIFYING DATABASE COUNTS =====")
-try:
-    cursor.execute("SELECT COUNT(*) FROM Trip;")
-    trips_count = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM Point;")
-    points_count = cursor.fetchone()[0]
-    print(f"Database now contains {trips_count:,} trips and {points_count:,} points.")
-except Exception as e:
-    print("Verification failed:", e)
+# One row per taxi and day (trips, per call type, active/idle seconds,
+# distance) that tasks 2, 3, 4a, 5 and 11 aggregate instead of Trip and
+# Point. It needs the Point table and is skipped if the load is incomplete.
+if not args.no_rollup and not failed and "Point" in point_tables:
+    print("\n===== STEP 6: BUILDING TAXI DAY ROLLUP =====")
+    try:
+        StagingManager(cursor, db, os.path.join(TASK2_DIR, "sql_tasks")).ensure("taxi_day_rollup")
+        cursor.execute("SELECT COUNT(*), COUNT(DISTINCT taxi_id), SUM(trips) FROM taxi_day_rollup")
+        days, taxis, trips = cursor.fetchone()
+        print(f"taxi_day_rollup: {days:,} taxi days, {taxis:,} taxis, {int(trips or 0):,} trips.")
+    except Error as e:
+        # The task runner builds it on first use instead
+        print("WARNING: could not build taxi_day_rollup:", e)
 
 # ------------------------------------------------------------
 # Step 7. Close connection
 # ------------------------------------------------------------
 print("\n===== STEP 7: CLOSING CONNECTION =====")
 connection.close_connection()
-print("Database insertion completed successfully (FULL LOAD, duplicates ignored).")
+if failed:
+    print("Database insertion finished, but the verification found problems (see Step 5).")
+    exit(1)
+print("Database insertion completed successfully (checkpointed load, all shards verified).")
@@ -1,4 +1,9 @@
+import os
+import threading
+from contextlib import contextmanager
+
 import mysql.connector as mysql
+from mysql.connector import errors, pooling
 
 
 class DbConnector:
@@ -7,21 +12,42 @@ class DbConnector:
     Connector needs HOST, DATABASE, USER and PASSWORD to connect,
     while PORT is optional and should be 3306.
 
+    Besides the single connection/cursor used by the scripts, the connector
+    owns a lazily created connection pool (POOL_SIZE connections) so helpers
+    and loaders can run queries concurrently:
+
+        with connection.pooled_cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM Trip")
+
     Example:
     HOST = "tdt4225-00.idi.ntnu.no" // Your server IP address/domain name
     DATABASE = "testdb" // Database name, if you just want to connect to MySQL server, leave it empty
     USER = "testuser" // This is the user you created and added privileges for
     PASSWORD = "test123" // The password you set for said user
+
+    The defaults can be overridden with the DB_HOST, DB_NAME, DB_USER,
+    DB_PASSWORD and DB_PORT environment variables, e.g. to run the scripts
+    against a local MySQL instance.
     """
 
     def __init__(self,
-                 HOST="100.98.158.19",
-                 DATABASE="db",
-                 USER="user",
-                 PASSWORD="password"):
+                 HOST=os.environ.get("DB_HOST", "100.98.158.19"),
+                 DATABASE=os.environ.get("DB_NAME", "db"),
+                 USER=os.environ.get("DB_USER", "user"),
+                 PASSWORD=os.environ.get("DB_PASSWORD", "password"),
+                 PORT=int(os.environ.get("DB_PORT", 3308)),
+                 POOL_SIZE=4):
+        self.config = dict(host=HOST, database=DATABASE, user=USER, password=PASSWORD, port=PORT)
+        self.pool_size = POOL_SIZE
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # get_connection() fails instead of waiting when the pool is empty,
+        # so borrowers queue on this semaphore first
+        self._pool_slots = threading.BoundedSemaphore(POOL_SIZE)
+
         # Connect to the database
         try:
-            self.db_connection = mysql.connect(host=HOST, database=DATABASE, user=USER, password=PASSWORD, port=3308)
+            self.db_connection = mysql.connect(**self.config)
         except Exception as e:
             print("ERROR: Failed to connect to db:", e)
 
@@ -35,7 +61,103 @@ class DbConnector:
         print("You are connected to the database:", database_name)
         print("-----------------------------------------------\n")
 
+    # ------------------------------------------------------------
+    # Connection pool
+    # ------------------------------------------------------------
+    @property
+    def pool(self):
+        """The shared MySQLConnectionPool, created on first use."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = pooling.MySQLConnectionPool(
+                        pool_name="tdt4225_pool",
+                        pool_size=self.pool_size,
+                        pool_reset_session=True,
+                        **self.config,
+                    )
+        return self._pool
+
+    @staticmethod
+    def _is_healthy(cnx):
+        try:
+            cnx.ping(reconnect=True, attempts=3, delay=1)
+            return True
+        except errors.Error:
+            return False
+
+    @contextmanager
+    def pooled_connection(self, timeout=60):
+        """
+        Borrow a connection from the pool and return it afterwards.
+        The connection is pinged (and reconnected if it was dropped)
+        before it is handed out.
+        """
+        if not self._pool_slots.acquire(timeout=timeout):
+            raise errors.PoolError(f"No pooled connection available after {timeout}s")
+
+        cnx = None
+        try:
+            cnx = self.pool.get_connection()
+            if not self._is_healthy(cnx):
+                raise errors.InterfaceError("Pooled connection is down and could not reconnect")
+            yield cnx
+        finally:
+            if cnx is not None:
+                self._release(cnx)
+            self._pool_slots.release()
+
+    @staticmethod
+    def _release(cnx):
+        # PooledMySQLConnection.close() puts the connection back in the pool
+        # even when resetting its session fails, so the pool keeps its size.
+        # A dropped connection is reconnected first; if that fails as well,
+        # the pool reconnects it on the next get_connection().
+        try:
+            if not cnx.is_connected():
+                cnx.reconnect(attempts=3, delay=1)
+        except errors.Error as e:
+            print("WARNING: Could not reconnect pooled connection:", e)
+        try:
+            cnx.close()  # resets the session and returns the connection to the pool
+        except errors.Error as e:
+            print("WARNING: Could not reset pooled connection:", e)
+
+    @contextmanager
+    def pooled_cursor(self, buffered=False, timeout=60):
+        """Borrow a pooled connection and yield a cursor; commits on success, rolls back on error."""
+        with self.pooled_connection(timeout=timeout) as cnx:
+            cursor = cnx.cursor(buffered=buffered)
+            try:
+                yield cursor
+                cnx.commit()
+            except Exception:
+                try:
+                    cnx.rollback()
+                except errors.Error:
+                    pass
+                raise
+            finally:
+                cursor.close()
+
+    def ensure_connected(self):
+        """Reconnect the main connection (and its cursor) if the server dropped it."""
+        if self.db_connection.is_connected():
+            return
+        self.db_connection.ping(reconnect=True, attempts=3, delay=1)
+        self.cursor = self.db_connection.cursor()
+
     def close_connection(self):
+        if self._pool is not None:
+            # Take every idle connection out of the pool and disconnect it;
+            # get_connection() raises PoolError once the pool is empty
+            while True:
+                try:
+                    cnx = self._pool.get_connection()
+                except errors.Error:
+                    break
+                cnx.disconnect()
+            self._pool = None
         # close the cursor
         self.cursor.close()
         # close the DB connection
@@ -0,0 +1,103 @@
+# ------------------------------------------------------------
+# Benchmark: Task 5 per-taxi aggregation (loop vs vectorized)
+# Runs the original per-taxi loop and Task5Helper.taxi_totals on
+# synthetic trips and checks that they produce the same results.
+#
+#   python benchmarks/bench_task5.py --taxis 450 --trips 200000
+# ------------------------------------------------------------
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ASSIGNMENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.extend([ASSIGNMENT_DIR, os.path.join(ASSIGNMENT_DIR, "task2")])
+
+from helpers.haversine_helper import haversine
+from helpers.task5_helper import Task5Helper
+
+
+def make_trips(n_taxis, n_trips, seed=42):
+    """Synthetic rows shaped like the result of task5_taxi_hours_distance.sql."""
+    rng = np.random.default_rng(seed)
+    taxi_ids = rng.integers(20000001, 20000001 + n_taxis, size=n_trips)
+    start = pd.Timestamp("2013-07-01") + pd.to_timedelta(rng.integers(0, 365 * 86400, size=n_trips), unit="s")
+    duration = pd.to_timedelta(rng.integers(3, 120, size=n_trips) * 15, unit="s")
+    start_lat = 41.15 + rng.normal(0, 0.02, size=n_trips)
+    start_lon = -8.61 + rng.normal(0, 0.02, size=n_trips)
+
+    df = pd.DataFrame({
+        "trip_id": np.arange(n_trips),
+        "taxi_id": taxi_ids,
+        "start_time": start,
+        "end_time": start + duration,
+        "start_lat": start_lat,
+        "start_lon": start_lon,
+        "end_lat": start_lat + rng.normal(0, 0.01, size=n_trips),
+        "end_lon": start_lon + rng.normal(0, 0.01, size=n_trips),
+    })
+    return df.sort_values(["taxi_id", "start_time"]).reset_index(drop=True)
+
+
+def taxi_totals_loop(df, chunk_size=10000):
+    """Original per-taxi loop (one full scan per taxi), the baseline for Task5Helper.taxi_totals."""
+    results = []
+    taxis = df["taxi_id"].unique()
+    total_taxis = len(taxis)
+    start_time = time.time()
+
+    for i, taxi_id in enumerate(taxis, start=1):
+        tdf = df[df["taxi_id"] == taxi_id]
+        total_hours = ((tdf["end_time"] - tdf["start_time"]).dt.total_seconds() / 3600).sum()
+
+        distance_km = pd.Series([
+            haversine(row.start_lat, row.start_lon, row.end_lat, row.end_lon)
+            for row in tdf.itertuples(index=False)
+        ], dtype=float)
+        total_distance = distance_km.sum()
+
+        results.append({
+            "taxi_id": taxi_id,
+            "total_hours": round(total_hours, 2),
+            "total_distance_km": round(total_distance, 2)
+        })
+
+        if i % chunk_size == 0 or i == total_taxis:
+            elapsed = time.time() - start_time
+            print(f"Processed {i}/{total_taxis} taxis ({(i/total_taxis)*100:.1f}%) | {elapsed/60:.1f} min")
+
+    return pd.DataFrame(results).sort_values("total_hours", ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--taxis", type=int, default=450)
+    parser.add_argument("--trips", type=int, default=200000)
+    args = parser.parse_args()
+
+    df = Task5Helper.prepare_trips(make_trips(args.taxis, args.trips))
+    print(f"Synthetic data: {len(df):,} trips over {df['taxi_id'].nunique()} taxis")
+
+    start = time.perf_counter()
+    loop_df = taxi_totals_loop(df, chunk_size=max(args.taxis // 5, 1))
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vec_df = Task5Helper.taxi_totals(df)
+    vec_s = time.perf_counter() - start
+
+    # Sums in another order can differ in the last bit, so a total may round one cent apart
+    pd.testing.assert_frame_equal(loop_df.sort_values("taxi_id").reset_index(drop=True),
+                                  vec_df.sort_values("taxi_id").reset_index(drop=True),
+                                  check_dtype=False, check_exact=False, atol=0.011, rtol=0)
+
+    print(f"\nLoop:       {loop_s:8.3f}s")
+    print(f"Vectorized: {vec_s:8.3f}s")
+    print(f"Speed-up:   {loop_s / vec_s:8.1f}x (results match)")
+
+
+if __name__ == "__main__":
+    main()
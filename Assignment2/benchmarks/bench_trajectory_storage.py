@@ -0,0 +1,117 @@
+# ------------------------------------------------------------
+# Benchmark: row-per-point (Point) vs blob-per-trip (TripTrajectory)
+# Needs a database loaded with both layouts:
+#
+#   python 04-insert_to_db.py --storage both
+#   python benchmarks/bench_trajectory_storage.py --repeat 3
+#
+# Reports the on-disk size of both tables (data + indexes) and the wall
+# time and peak RSS of tasks 4b, 5, 8 and 10 in each storage mode, each
+# task run through run_tasks.py as its own process (with --no-rollup, so
+# task 5 reads the points in both layouts).
+# ------------------------------------------------------------
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from tabulate import tabulate
+
+from run_pipeline_benchmark import ASSIGNMENT_DIR, RUNS_DIR, TASK_RUNNER, db_env, git_version, run_stage
+
+TASKS = ["task4b", "task5", "task8", "task10"]
+TABLES = ["Point", "TripTrajectory"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare the Point and TripTrajectory storage layouts.")
+    parser.add_argument("--tasks", nargs="*", default=TASKS)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per task and layout; the fastest is kept")
+    parser.add_argument("--work-dir", default=RUNS_DIR)
+    parser.add_argument("--output", help="Results file (default: <work-dir>/trajectory-storage-<timestamp>.json)")
+    for name in ("host", "port", "name", "user", "password"):
+        parser.add_argument(f"--db-{name}")
+    return parser.parse_args()
+
+
+def table_sizes(env):
+    """Rows, data and index size per table from information_schema (InnoDB estimates)."""
+    os.environ.update({k: v for k, v in env.items() if k.startswith("DB_")})
+    sys.path.append(ASSIGNMENT_DIR)
+    from DbConnector import DbConnector
+
+    connection = DbConnector()
+    try:
+        cursor = connection.cursor
+        sizes = {}
+        for table in TABLES:
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            rows = cursor.fetchone()[0]
+            cursor.execute("""
+                SELECT data_length, index_length FROM information_schema.TABLES
+                WHERE table_schema = DATABASE() AND table_name = %s
+            """, (table,))
+            data, index = cursor.fetchone()
+            sizes[table] = {"rows": rows, "data_mb": round(data / 2**20, 1), "index_mb": round(index / 2**20, 1),
+                            "total_mb": round((data + index) / 2**20, 1)}
+        return sizes
+    finally:
+        connection.close_connection()
+
+
+def main():
+    args = parse_args()
+    work_dir = os.path.join(os.path.abspath(args.work_dir), "trajectory-storage")
+    log_dir = os.path.join(work_dir, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    env = db_env(args)
+
+    print("\n===== TABLE SIZES =====")
+    sizes = table_sizes(env)
+    print(tabulate([[t, f"{s['rows']:,}", s["data_mb"], s["index_mb"], s["total_mb"]] for t, s in sizes.items()],
+                   headers=["table", "rows", "data MB", "index MB", "total MB"], tablefmt="fancy_grid"))
+
+    print("\n===== TASKS =====")
+    runs = []
+    for task in args.tasks:
+        for storage in ("points", "trajectory"):
+            best = None
+            for i in range(args.repeat):
+                record = run_stage(f"{task}-{storage}-{i}", [
+                    sys.executable, TASK_RUNNER, task, "--storage", storage, "--no-cache", "--no-rollup",
+                    "--jobs", "1"],
+                    work_dir, log_dir, env)
+                if record["returncode"] == 0 and (best is None or record["wall_s"] < best["wall_s"]):
+                    best = record
+            runs.append({"task": task, "storage": storage, **(best or {"returncode": 1})})
+
+    rows = []
+    for task in args.tasks:
+        by_storage = {r["storage"]: r for r in runs if r["task"] == task}
+        points, blob = by_storage["points"], by_storage["trajectory"]
+        speedup = (f"{points['wall_s'] / blob['wall_s']:.2f}x"
+                   if points.get("wall_s") and blob.get("wall_s") else "n/a")
+        rows.append([task, points.get("wall_s"), blob.get("wall_s"), speedup,
+                     points.get("peak_rss_mb"), blob.get("peak_rss_mb")])
+    print(tabulate(rows, headers=["task", "Point s", "TripTrajectory s", "speedup", "Point MB", "TripTrajectory MB"],
+                   tablefmt="fancy_grid"))
+
+    results = {
+        "version": git_version(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "repeat": args.repeat,
+        "tables": sizes,
+        "runs": runs,
+    }
+    output = args.output or os.path.join(
+        args.work_dir, f"trajectory-storage-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# ------------------------------------------------------------
+# EXPLAIN comparison: Task 5 GROUP_CONCAT baseline vs index-based query
+# Runs EXPLAIN FORMAT=JSON (and optionally EXPLAIN ANALYZE) for both
+# queries and reports the temporary tables each execution created.
+#
+#   python benchmarks/explain_task5.py [--no-analyze]
+# ------------------------------------------------------------
+import argparse
+import json
+import os
+import sys
+import time
+
+from tabulate import tabulate
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from DbConnector import DbConnector
+
+QUERIES = {
+    "group_concat (baseline)": os.path.join(BASE_DIR, "benchmarks", "sql", "task5_group_concat_baseline.sql"),
+    "index endpoints": os.path.join(BASE_DIR, "task2", "sql_tasks", "task5_taxi_hours_distance.sql"),
+}
+
+STATUS_VARS = (
+    "Created_tmp_tables",
+    "Created_tmp_disk_tables",
+    "Sort_merge_passes",
+    "Handler_read_key",
+    "Handler_read_next",
+    "Handler_read_rnd_next",
+)
+
+
+def read_query(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip().rstrip(";")
+
+
+def session_status(cursor):
+    cursor.execute("SHOW SESSION STATUS")
+    status = dict(cursor.fetchall())
+    return {name: int(status.get(name, 0)) for name in STATUS_VARS}
+
+
+def temp_tables_in_plan(node, found=None):
+    """Collect every plan node that materializes or sorts via a temporary table."""
+    found = [] if found is None else found
+    if isinstance(node, dict):
+        if node.get("using_temporary_table") or node.get("materialized_from_subquery"):
+            found.append(node.get("table_name") or node.get("select_id") or "?")
+        for value in node.values():
+            temp_tables_in_plan(value, found)
+    elif isinstance(node, list):
+        for value in node:
+            temp_tables_in_plan(value, found)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Task 5 query plans.")
+    parser.add_argument("--no-analyze", action="store_true",
+                        help="Only show the estimated plans, do not execute the queries")
+    args = parser.parse_args()
+
+    connection = DbConnector()
+    cursor = connection.cursor
+    cursor.execute("SHOW VARIABLES LIKE 'group_concat_max_len'")
+    print("group_concat_max_len =", cursor.fetchone()[1])
+
+    summary = []
+    for label, path in QUERIES.items():
+        query = read_query(path)
+        print(f"\n===== {label} =====")
+
+        cursor.execute("EXPLAIN FORMAT=JSON " + query)
+        plan = json.loads(cursor.fetchone()[0])
+        cost = plan.get("query_block", {}).get("cost_info", {}).get("query_cost")
+        temp_nodes = temp_tables_in_plan(plan)
+        print(f"Estimated cost: {cost} | temporary tables in plan: {temp_nodes or 'none'}")
+
+        row = {"query": label, "estimated_cost": cost, "plan_temp_tables": len(temp_nodes)}
+        if not args.no_analyze:
+            before = session_status(cursor)
+            start = time.time()
+            cursor.execute("EXPLAIN ANALYZE " + query)
+            print(cursor.fetchone()[0])
+            row["wall_s"] = round(time.time() - start, 2)
+            after = session_status(cursor)
+            # SHOW SESSION STATUS itself creates one temporary table
+            for name in STATUS_VARS:
+                row[name] = after[name] - before[name] - (1 if name == "Created_tmp_tables" else 0)
+        summary.append(row)
+
+    print("\n===== Summary =====")
+    print(tabulate(summary, headers="keys", tablefmt="fancy_grid"))
+    connection.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+# ------------------------------------------------------------
+# Benchmark: end-to-end Porto pipeline
+# Generates synthetic datasets at several scales and runs
+# 02-preprocess, 03-prepare, 04-insert and the Part 2 tasks on each,
+# recording wall time, peak RSS and rows/s per stage to a JSON file.
+# Every stage runs as its own process, exactly as from the shell.
+#
+#   python benchmarks/run_pipeline_benchmark.py --scales 10000 100000 1000000 \
+#       --db-host 127.0.0.1 --db-port 3306 --db-name porto_bench
+#   python benchmarks/run_pipeline_benchmark.py --scales 10000 --compare benchmarks/runs/<old>.json
+# ------------------------------------------------------------
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from tabulate import tabulate
+
+ASSIGNMENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS_DIR = os.path.join(ASSIGNMENT_DIR, "benchmarks", "runs")
+TASK_RUNNER = os.path.join(ASSIGNMENT_DIR, "task2", "run_tasks.py")
+
+# Staged tables are built as their own stage so their cost is not charged to the first task using them
+TASKS = ["trip_times_stage", "task1", "task2", "task3", "task4a", "task4b", "task5",
+         "task6", "task7", "task8", "task9", "task10", "task11"]
+
+# Tables created by the loader and the task runner; dropped before every scale
+DB_TABLES = ["trip_times_stage", "taxi_day_rollup", "stage_fingerprint", "LoadCheckpoint", "Point", "TripTrajectory", "Trip"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the Porto pipeline.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="Dataset sizes in trips")
+    parser.add_argument("--seed", type=int, default=4225)
+    parser.add_argument("--work-dir", default=RUNS_DIR, help="Where datasets, logs and results are written")
+    parser.add_argument("--output", help="Results file (default: <work-dir>/pipeline-<timestamp>.json)")
+    parser.add_argument("--tasks", nargs="*", default=TASKS, help="Part 2 tasks to run after loading")
+    parser.add_argument("--jobs", type=int, default=1, help="--jobs passed to run_tasks.py")
+    parser.add_argument("--skip-db", action="store_true",
+                        help="Only run the file stages (02 and 03), no database needed")
+    parser.add_argument("--db-host")
+    parser.add_argument("--db-port")
+    parser.add_argument("--db-name")
+    parser.add_argument("--db-user")
+    parser.add_argument("--db-password")
+    parser.add_argument("--compare", help="Earlier results file to compare wall times against")
+    parser.add_argument("--tolerance", type=float, default=0.20,
+                        help="Relative slowdown reported as a regression by --compare (default: 0.20)")
+    return parser.parse_args()
+
+
+def db_env(args):
+    """Environment for the stages; DbConnector picks the connection settings up from DB_*."""
+    env = dict(os.environ)
+    for name in ("host", "port", "name", "user", "password"):
+        value = getattr(args, f"db_{name}")
+        if value is not None:
+            env[f"DB_{name.upper()}"] = str(value)
+    return env
+
+
+def count_rows(path):
+    """Data rows of a CSV file (lines minus the header), without parsing it."""
+    lines = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+    return max(lines - 1, 0)
+
+
+def git_version():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ASSIGNMENT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+# ------------------------------------------------------------
+# Stages
+# ------------------------------------------------------------
+def run_stage(name, command, cwd, log_dir, env):
+    """
+    Run one stage as a child process with its output in <log_dir>/<name>.log.
+    os.wait4 gives the resource usage of exactly this child, so peak RSS is
+    per stage rather than the maximum over all children so far.
+    """
+    log_path = os.path.join(log_dir, f"{name}.log")
+    print(f"  {name:<18}", end="", flush=True)
+
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    print(f"{wall:8.2f}s  {peak_rss:8.1f} MB  {'ok' if proc.returncode == 0 else 'FAILED'}")
+
+    return {
+        "stage": name,
+        "command": " ".join(os.path.basename(part) for part in command[1:]),
+        "returncode": proc.returncode,
+        "wall_s": round(wall, 3),
+        "user_s": round(usage.ru_utime, 3),
+        "sys_s": round(usage.ru_stime, 3),
+        "peak_rss_mb": round(peak_rss, 1),
+        "log": os.path.relpath(log_path, ASSIGNMENT_DIR),
+    }
+
+
+def set_rows(record, rows):
+    record["rows"] = rows
+    record["rows_per_s"] = round(rows / record["wall_s"], 1) if record["wall_s"] > 0 else None
+
+
+def reset_database(env):
+    """Drop the pipeline tables so every scale loads into an empty database."""
+    os.environ.update({k: v for k, v in env.items() if k.startswith("DB_")})
+    sys.path.append(ASSIGNMENT_DIR)
+    from DbConnector import DbConnector
+
+    connection = DbConnector()
+    try:
+        connection.cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in DB_TABLES:
+            connection.cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        connection.cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        connection.db_connection.commit()
+    finally:
+        connection.close_connection()
+
+
+def run_scale(trips, args, env):
+    scale_dir = os.path.join(args.work_dir, f"scale-{trips}")
+    log_dir = os.path.join(scale_dir, "logs")
+    results_dir = os.path.join(scale_dir, "task_results")
+    os.makedirs(log_dir, exist_ok=True)
+    os.makedirs(results_dir, exist_ok=True)
+
+    def script(name):
+        return [sys.executable, os.path.join(ASSIGNMENT_DIR, name)]
+
+    print(f"\n===== SCALE: {trips:,} trips =====")
+    stages = []
+
+    # The dataset itself is not part of the pipeline; its stage is reported separately
+    generate = run_stage("generate", script("00-generate_synthetic_data.py") + [
+        "--trips", str(trips), "--seed", str(args.seed), "--output", "porto.csv"], scale_dir, log_dir, env)
+    if generate["returncode"] != 0:
+        return {"trips": trips, "generate": generate, "stages": stages, "completed": False}
+    set_rows(generate, count_rows(os.path.join(scale_dir, "porto.csv")))
+
+    pipeline = [
+        ("preprocess", script("02-preprocess_data.py"), ["porto.csv"]),
+        ("prepare", script("03-prepare_for_db.py"), ["porto_preprocessed.csv"]),
+    ]
+    if not args.skip_db:
+        pipeline.append(("insert", script("04-insert_to_db.py"), ["trips_clean.csv", "points_clean.csv"]))
+
+    for name, command, inputs in pipeline:
+        if name == "insert":
+            reset_database(env)
+        record = run_stage(name, command, scale_dir, log_dir, env)
+        stages.append(record)
+        if record["returncode"] != 0:
+            return {"trips": trips, "generate": generate, "stages": stages, "completed": False}
+        set_rows(record, sum(count_rows(os.path.join(scale_dir, f)) for f in inputs))
+
+    if not args.skip_db:
+        # Tasks scan the loaded points, so their throughput is reported in points/s
+        points = count_rows(os.path.join(scale_dir, "points_clean.csv"))
+        for task in args.tasks:
+            record = run_stage(task, [sys.executable, TASK_RUNNER, task, "--no-cache", "--jobs", str(args.jobs)],
+                               results_dir, log_dir, env)
+            set_rows(record, points)
+            stages.append(record)
+
+    completed = all(s["returncode"] == 0 for s in stages)
+    return {
+        "trips": trips,
+        "generate": generate,
+        "stages": stages,
+        "total_wall_s": round(sum(s["wall_s"] for s in stages), 3),
+        "peak_rss_mb": max(s["peak_rss_mb"] for s in stages),
+        "completed": completed,
+    }
+
+
+# ------------------------------------------------------------
+# Reporting
+# ------------------------------------------------------------
+def print_summary(results):
+    rows = []
+    for scale in results["scales"]:
+        for s in scale["stages"]:
+            rows.append([f"{scale['trips']:,}", s["stage"], s["wall_s"], s["peak_rss_mb"],
+                         s.get("rows_per_s"), "ok" if s["returncode"] == 0 else "FAILED"])
+    print("\n===== SUMMARY =====")
+    print(tabulate(rows, headers=["trips", "stage", "wall s", "peak RSS MB", "rows/s", "status"],
+                   tablefmt="fancy_grid"))
+
+
+def compare(results, baseline_path, tolerance):
+    """Print wall-time ratios against an earlier run; returns the number of regressions."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    before = {(scale["trips"], s["stage"]): s for scale in baseline["scales"] for s in scale["stages"]}
+
+    rows, regressions = [], 0
+    for scale in results["scales"]:
+        for s in scale["stages"]:
+            old = before.get((scale["trips"], s["stage"]))
+            if old is None or old["wall_s"] <= 0:
+                continue
+            ratio = s["wall_s"] / old["wall_s"]
+            flag = ""
+            if ratio > 1 + tolerance:
+                flag = "REGRESSION"
+                regressions += 1
+            elif ratio < 1 - tolerance:
+                flag = "faster"
+            rows.append([f"{scale['trips']:,}", s["stage"], old["wall_s"], s["wall_s"], f"{ratio:.2f}x", flag])
+
+    print(f"\n===== COMPARED TO {baseline.get('version') or baseline_path} =====")
+    print(tabulate(rows, headers=["trips", "stage", "before s", "now s", "ratio", ""], tablefmt="fancy_grid"))
+    return regressions
+
+
+def main():
+    args = parse_args()
+    args.work_dir = os.path.abspath(args.work_dir)
+    os.makedirs(args.work_dir, exist_ok=True)
+    env = db_env(args)
+
+    results = {
+        "version": git_version(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "skip_db": args.skip_db,
+        "scales": [],
+    }
+    for trips in sorted(args.scales):
+        results["scales"].append(run_scale(trips, args, env))
+
+    output = args.output or os.path.join(
+        args.work_dir, f"pipeline-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print_summary(results)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            sys.exit(f"{regressions} stage(s) slower than the baseline by more than {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
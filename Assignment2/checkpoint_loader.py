@@ -0,0 +1,271 @@
+# ------------------------------------------------------------
+# Checkpointed, resumable CSV loading into MySQL
+# A CSV file is loaded in shards: line-aligned byte ranges of about
+# shard_bytes. Every shard is inserted in one transaction together with
+# its row in the LoadCheckpoint table, so after a crash or a dropped
+# connection the table says exactly which shards are in the database and
+# the load resumes at the end byte of the last one. Lost connections are
+# retried with backoff; at the end every shard's row count is verified
+# against the database. With a group_column, shards end between groups
+# (e.g. trips) so a transform can turn each group into one row, and a
+# row_filter loads only part of a file (e.g. one month) under its own
+# source name.
+# ------------------------------------------------------------
+import csv
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from mysql.connector import errors
+
+from porto_schema import db_rows
+
+SHARD_BYTES = 8 << 20
+
+CHECKPOINT_DDL = """
+    CREATE TABLE IF NOT EXISTS LoadCheckpoint (
+        source VARCHAR(255) NOT NULL,
+        shard INT NOT NULL,
+        start_byte BIGINT NOT NULL,
+        end_byte BIGINT NOT NULL,
+        rows_read INT NOT NULL,
+        rows_inserted INT NOT NULL,
+        first_id BIGINT NULL,
+        last_id BIGINT NULL,
+        source_size BIGINT NOT NULL,
+        source_mtime_ns BIGINT NOT NULL,
+        committed_at DATETIME NOT NULL,
+        PRIMARY KEY (source, shard)
+    );
+"""
+
+# Errors after which the shard is retried on a fresh connection
+RETRYABLE = (errors.OperationalError, errors.InterfaceError)
+
+
+def _columns(f):
+    return next(csv.reader([f.readline().decode("utf-8")]))
+
+
+def csv_shards(path, start=0, shard_bytes=SHARD_BYTES, dtype=None, group_column=None):
+    """
+    Yield (start, end, frame) for consecutive line-aligned byte ranges of
+    `path`, from byte `start` on. With `group_column`, rows with the same
+    value must be consecutive and a shard never splits such a group: the
+    last group of a shard is moved to the next one (shards grow past
+    shard_bytes when a single group is bigger).
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        columns = _columns(f)
+        start = max(start, f.tell())
+        f.seek(start)
+        buf = b""
+        while True:
+            buf += f.read(shard_bytes)
+            if not buf.strip():
+                break
+            buf += f.readline()  # finish the last row of the shard
+            frame = pd.read_csv(io.BytesIO(buf), header=None, names=columns, dtype=dtype)
+
+            if group_column is not None and start + len(buf) < size:
+                keys = frame[group_column].to_numpy()
+                last = len(keys) - int(np.argmax(keys[::-1] != keys[-1])) if (keys != keys[-1]).any() else 0
+                if last == 0:
+                    continue  # one group fills the whole shard, read on
+                # Cut before the first row of the last group (rows are one line each)
+                newlines = np.flatnonzero(np.frombuffer(buf, dtype=np.uint8) == ord("\n"))
+                cut = int(newlines[last - 1]) + 1
+                frame, rest = frame.iloc[:last], buf[cut:]
+                buf = buf[:cut]
+            else:
+                rest = b""
+
+            end = start + len(buf)
+            yield start, end, frame
+            start, buf = end, rest
+
+
+def read_shard(path, start, end, dtype=None):
+    """The rows of one shard written by csv_shards()."""
+    with open(path, "rb") as f:
+        columns = _columns(f)
+        f.seek(start)
+        buf = f.read(end - start)
+    return pd.read_csv(io.BytesIO(buf), header=None, names=columns, dtype=dtype)
+
+
+class CheckpointedLoader:
+    """
+    Loads one CSV file into `table` with `insert_query`. The per-shard check
+    at the end uses `id_column` (an AUTO_INCREMENT key: the shard's rows are
+    the ids assigned while it was inserted) or else `key_column` (the
+    shard's keys are read back from the file and looked up). `row_filter`
+    (frame -> frame) selects the rows to load; give such a partial load
+    its own `source` so its checkpoints are kept apart.
+    """
+
+    def __init__(self, connection, path, table, insert_query, dtypes=None, id_column=None, key_column=None,
+                 shard_bytes=SHARD_BYTES, batch_rows=5000, max_retries=5, session_sql=(),
+                 group_column=None, transform=db_rows, row_filter=None, source=None):
+        if id_column is None and key_column is None:
+            raise ValueError("Either id_column or key_column is needed to verify the shards")
+        self.connection = connection
+        self.path = path
+        # One file can be loaded into several tables (Point and TripTrajectory)
+        self.source = source or f"{table}:{os.path.basename(path)}"
+        self.table = table
+        self.insert_query = insert_query
+        self.dtypes = dtypes
+        self.id_column = id_column
+        self.key_column = key_column
+        self.shard_bytes = shard_bytes
+        self.batch_rows = batch_rows
+        self.max_retries = max_retries
+        self.session_sql = list(session_sql)
+        self.group_column = group_column
+        self.transform = transform
+        self.row_filter = row_filter
+
+    # ------------------------------------------------------------
+    # Checkpoint table
+    # ------------------------------------------------------------
+    def _fingerprint(self):
+        stat = os.stat(self.path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def committed(self):
+        """Committed shards of this source as a DataFrame ordered by shard number."""
+        cursor = self.connection.cursor
+        cursor.execute("""
+            SELECT shard, start_byte, end_byte, rows_read, rows_inserted, first_id, last_id,
+                   source_size, source_mtime_ns
+            FROM LoadCheckpoint WHERE source = %s ORDER BY shard
+        """, (self.source,))
+        return pd.DataFrame(cursor.fetchall(), columns=cursor.column_names)
+
+    def reset(self):
+        self.connection.cursor.execute("DELETE FROM LoadCheckpoint WHERE source = %s", (self.source,))
+        self.connection.db_connection.commit()
+
+    def _is_committed(self, cursor, shard):
+        cursor.execute("SELECT 1 FROM LoadCheckpoint WHERE source = %s AND shard = %s", (self.source, shard))
+        return cursor.fetchone() is not None
+
+    # ------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------
+    def load(self):
+        """Insert the shards that are not committed yet; returns the number of rows inserted by this run."""
+        done = self.committed()
+        size, mtime_ns = self._fingerprint()
+        if len(done) and ((done["source_size"] != size).any() or (done["source_mtime_ns"] != mtime_ns).any()):
+            raise RuntimeError(f"{self.source} changed since its checkpoint was written; "
+                               f"reload from scratch (--restart)")
+
+        shard = int(done["shard"].max()) + 1 if len(done) else 0
+        start = int(done["end_byte"].max()) if len(done) else 0
+        if len(done):
+            print(f"Resuming {self.source} at shard {shard} (byte {start:,}, "
+                  f"{int(done['rows_read'].sum()):,} rows already loaded)")
+
+        inserted = 0
+        started = time.time()
+        for shard_start, shard_end, frame in csv_shards(self.path, start, self.shard_bytes, self.dtypes,
+                                                        self.group_column):
+            inserted += self._load_shard(shard, shard_start, shard_end, frame, size, mtime_ns)
+            print(f"  {self.source} shard {shard}: {shard_end / size:6.1%} | {inserted:,} rows "
+                  f"| Elapsed: {time.time() - started:.1f}s")
+            shard += 1
+        return inserted
+
+    def _load_shard(self, shard, start, end, frame, size, mtime_ns):
+        if self.row_filter is not None:
+            frame = self.row_filter(frame)
+        rows = self.transform(frame)
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.connection.ensure_connected()
+                cursor = self.connection.cursor
+                for statement in self.session_sql:
+                    cursor.execute(statement)
+                if self._is_committed(cursor, shard):
+                    # The commit went through before the connection dropped
+                    return 0
+
+                first_id = last_id = None
+                if self.id_column:
+                    cursor.execute(f"SELECT COALESCE(MAX({self.id_column}), 0) FROM {self.table}")
+                    first_id = cursor.fetchone()[0] + 1
+
+                inserted = 0
+                for i in range(0, len(rows), self.batch_rows):
+                    cursor.executemany(self.insert_query, rows[i:i + self.batch_rows])
+                    inserted += max(cursor.rowcount, 0)
+
+                if self.id_column:
+                    cursor.execute(f"SELECT COALESCE(MAX({self.id_column}), 0) FROM {self.table}")
+                    last_id = cursor.fetchone()[0]
+
+                cursor.execute("""
+                    INSERT INTO LoadCheckpoint (source, shard, start_byte, end_byte, rows_read, rows_inserted,
+                                                first_id, last_id, source_size, source_mtime_ns, committed_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+                """, (self.source, shard, start, end, len(rows), inserted, first_id, last_id, size, mtime_ns))
+                self.connection.db_connection.commit()
+                return inserted
+            except RETRYABLE as e:
+                try:
+                    self.connection.db_connection.rollback()
+                except errors.Error:
+                    pass
+                if attempt == self.max_retries:
+                    raise
+                wait = min(2 ** attempt, 60)
+                print(f"  WARNING: shard {shard} failed ({e}); retrying in {wait}s "
+                      f"({attempt + 1}/{self.max_retries})")
+                time.sleep(wait)
+
+    # ------------------------------------------------------------
+    # Verification
+    # ------------------------------------------------------------
+    def verify(self, key_batch=5000):
+        """
+        Count every committed shard's rows in the database. Returns a
+        DataFrame with one row per shard whose count does not match: for
+        id_column, that the rows the shard inserted are present; for
+        key_column, that every distinct key read from the file is present
+        in the table (rows ignored as duplicates must already exist).
+        """
+        cursor = self.connection.cursor
+        problems = []
+        for shard in self.committed().itertuples(index=False):
+            if self.id_column:
+                expected = shard.rows_inserted
+                if shard.rows_inserted == 0:
+                    found = 0
+                else:
+                    cursor.execute(f"SELECT COUNT(*) FROM {self.table} WHERE {self.id_column} BETWEEN %s AND %s",
+                                   (int(shard.first_id), int(shard.last_id)))
+                    found = cursor.fetchone()[0]
+            else:
+                frame = read_shard(self.path, shard.start_byte, shard.end_byte, self.dtypes)
+                if self.row_filter is not None:
+                    frame = self.row_filter(frame)
+                keys = frame[self.key_column]
+                keys = keys.drop_duplicates().astype(object).tolist()
+                expected = len(keys)
+                found = 0
+                for i in range(0, len(keys), key_batch):
+                    batch = keys[i:i + key_batch]
+                    placeholders = ",".join(["%s"] * len(batch))
+                    cursor.execute(f"SELECT COUNT(*) FROM {self.table} WHERE {self.key_column} IN ({placeholders})",
+                                   tuple(batch))
+                    found += cursor.fetchone()[0]
+
+            if found != expected:
+                problems.append({"shard": shard.shard, "rows_read": shard.rows_read,
+                                 "rows_inserted": shard.rows_inserted, "expected": expected, "found": found})
+        return pd.DataFrame(problems, columns=["shard", "rows_read", "rows_inserted", "expected", "found"])
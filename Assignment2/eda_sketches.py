@@ -0,0 +1,160 @@
+# ------------------------------------------------------------
+# Streaming sketches for the approximate EDA
+# Each sketch is fed chunk by chunk (e.g. from pd.read_csv(chunksize=...))
+# and keeps a small, fixed amount of state:
+#   ReservoirSample - uniform random sample of k rows
+#   HyperLogLog     - approximate number of distinct values
+#   QuantileSketch  - quantiles with bounded relative error (DDSketch-style)
+# ------------------------------------------------------------
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class ReservoirSample:
+    """
+    Uniform random sample of k rows over a stream of DataFrame chunks.
+    Every row gets a random key and the k rows with the smallest keys are
+    kept, which is equivalent to reservoir sampling and works per chunk.
+    """
+
+    def __init__(self, k, seed=None):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.rows = None
+        self.keys = np.empty(0)
+        self.seen = 0
+
+    def add(self, chunk):
+        self.seen += len(chunk)
+        keys = self.rng.random(len(chunk))
+        if self.rows is not None:
+            chunk = pd.concat([self.rows, chunk])
+            keys = np.concatenate([self.keys, keys])
+        if len(chunk) > self.k:
+            keep = np.argpartition(keys, self.k)[:self.k]
+            chunk, keys = chunk.iloc[keep], keys[keep]
+        self.rows, self.keys = chunk, keys
+
+    def frame(self):
+        """The sample in file order (the chunked reader numbers rows across chunks)."""
+        if self.rows is None:
+            return pd.DataFrame()
+        return self.rows.sort_index()
+
+
+def _bit_length(values):
+    """Number of significant bits of each uint64 (0 for 0)."""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    # log2 is exact enough on 32-bit halves (values up to 2**32 are exact floats)
+    with np.errstate(divide="ignore"):
+        bits_high = np.where(high > 0, np.floor(np.log2(high)) + 33, 0)
+        bits_low = np.where(low > 0, np.floor(np.log2(low)) + 1, 0)
+    return np.where(high > 0, bits_high, bits_low).astype(np.uint8)
+
+
+class HyperLogLog:
+    """Approximate distinct count with 2**p registers (standard error about 1.04 / sqrt(2**p))."""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, values):
+        values = pd.Series(values).dropna()
+        if values.empty:
+            return
+        hashes = pd.util.hash_array(values.to_numpy())
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # Position of the first 1-bit in the remaining 64 - p bits
+        rank = (64 - self.p) - _bit_length(rest).astype(np.int64) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and zeros:
+            # Small cardinalities: linear counting is more accurate
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+
+class QuantileSketch:
+    """
+    Streaming quantiles of non-negative values with relative error `alpha`:
+    values are counted in logarithmic buckets [gamma**(k-1), gamma**k) with
+    gamma = (1 + alpha) / (1 - alpha), like DDSketch. Zeros are counted
+    separately; min, max, count and sum are exact.
+    """
+
+    def __init__(self, alpha=0.01):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        if (values < 0).any():
+            raise ValueError("QuantileSketch only accepts non-negative values")
+
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        positive = values[values > 0]
+        self.zeros += len(values) - len(positive)
+        keys, n = np.unique(np.ceil(np.log(positive) / self.log_gamma).astype(np.int64), return_counts=True)
+        for key, c in zip(keys.tolist(), n.tolist()):
+            self.buckets[key] = self.buckets.get(key, 0) + c
+
+    def merge(self, other):
+        for key, c in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + c
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zeros:
+            return 0.0
+        seen = self.zeros
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def summary(self, quantiles=(0.01, 0.25, 0.5, 0.75, 0.9, 0.99)):
+        """count/mean/min/max plus the requested quantiles, as a dict."""
+        result = {"count": self.count, "mean": self.mean(),
+                  "min": self.min if self.count else None, "max": self.max if self.count else None}
+        for q in quantiles:
+            result[f"p{round(q * 100):g}"] = self.quantile(q)
+        return result
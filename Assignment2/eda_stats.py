@@ -0,0 +1,198 @@
+# ------------------------------------------------------------
+# Streaming EDA statistics
+# Computes the metrics of Steps 2-8 of 01-eda.py (null counts, unique
+# values, duplicates, CALL_TYPE rule violations, polyline lengths,
+# bounding box, distance and duration distributions) in one chunked pass
+# over porto.csv and writes them to a JSON report.
+#
+#   python eda_stats.py --input porto.csv --output eda_report.json
+# ------------------------------------------------------------
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from eda_sketches import QuantileSketch
+from trajectory_utils import parse_polylines, trip_distances, trip_durations
+from validation_rules import CALL_TYPE_RULES, RuleSet
+
+# Columns whose value counts are reported in full
+CATEGORICAL = ["CALL_TYPE", "DAY_TYPE", "MISSING_DATA"]
+
+DISTANCE_BIN_KM = 1.0
+DISTANCE_BINS = 100  # 0-100 km in 1 km bins, longer trips in the last bin
+
+
+def _duplicates(hashes):
+    """(rows sharing their key with another row, distinct keys) for an array of 64-bit keys."""
+    _, counts = np.unique(hashes, return_counts=True)
+    return int(counts[counts > 1].sum()), len(counts)
+
+
+def _plain(value):
+    """numpy scalars to plain Python for json.dump."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class StreamingEdaStats:
+    """Accumulates the EDA metrics chunk by chunk; report() returns them as a dict."""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = None
+        self.dtypes = None
+        self.nulls = None
+        self.value_counts = {col: {} for col in CATEGORICAL}
+        self.call_type_rules = RuleSet(CALL_TYPE_RULES)
+
+        # 64-bit keys per row, deduplicated at the end (8 bytes per row each)
+        self.trip_keys = []
+        self.taxi_time_keys = []
+        self.row_keys = []
+        self.taxis = set()
+        self.timestamp_range = [None, None]
+
+        self.length_hist = np.zeros(1, dtype=np.int64)
+        self.bbox = [np.inf, -np.inf, np.inf, -np.inf]  # lon_min, lon_max, lat_min, lat_max
+        self.points = 0
+        self.distance = QuantileSketch()
+        self.distance_hist = np.zeros(DISTANCE_BINS + 1, dtype=np.int64)
+        self.duration = QuantileSketch()
+
+    def update(self, chunk):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self.dtypes = {col: str(dtype) for col, dtype in chunk.dtypes.items()}
+            self.nulls = pd.Series(0, index=chunk.columns, dtype=np.int64)
+        self.rows += len(chunk)
+        self.nulls += chunk.isnull().sum()
+
+        for col in CATEGORICAL:
+            if col in chunk.columns:
+                for value, n in chunk[col].value_counts(dropna=False).items():
+                    key = str(value)
+                    self.value_counts[col][key] = self.value_counts[col].get(key, 0) + int(n)
+
+        self.call_type_rules.count(chunk)
+
+        # Keys for the duplicate analyses
+        self.trip_keys.append(pd.util.hash_array(chunk["TRIP_ID"].to_numpy()))
+        self.taxi_time_keys.append(pd.util.hash_pandas_object(chunk[["TAXI_ID", "TIMESTAMP"]], index=False).to_numpy())
+        self.row_keys.append(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+        self.taxis.update(chunk["TAXI_ID"].dropna().unique().tolist())
+        ts_min, ts_max = chunk["TIMESTAMP"].min(), chunk["TIMESTAMP"].max()
+        self.timestamp_range = [ts_min if self.timestamp_range[0] is None else min(self.timestamp_range[0], ts_min),
+                                ts_max if self.timestamp_range[1] is None else max(self.timestamp_range[1], ts_max)]
+
+        # Trajectories
+        lat, lon, offsets = parse_polylines(chunk["POLYLINE"])
+        lengths = np.diff(offsets)
+        hist = np.bincount(lengths)
+        if len(hist) > len(self.length_hist):
+            self.length_hist = np.pad(self.length_hist, (0, len(hist) - len(self.length_hist)))
+        self.length_hist[:len(hist)] += hist
+
+        if len(lat):
+            self.points += len(lat)
+            self.bbox = [min(self.bbox[0], lon.min()), max(self.bbox[1], lon.max()),
+                         min(self.bbox[2], lat.min()), max(self.bbox[3], lat.max())]
+        distances = trip_distances(lat, lon, offsets)
+        self.distance.add(distances)
+        bins = np.minimum((distances // DISTANCE_BIN_KM).astype(np.int64), DISTANCE_BINS)
+        self.distance_hist += np.bincount(bins, minlength=DISTANCE_BINS + 1)
+        self.duration.add(trip_durations(offsets))
+
+    def report(self):
+        trip_dupes, unique_trips = _duplicates(np.concatenate(self.trip_keys)) if self.trip_keys else (0, 0)
+        taxi_time_dupes, _ = _duplicates(np.concatenate(self.taxi_time_keys)) if self.taxi_time_keys else (0, 0)
+        row_dupes, _ = _duplicates(np.concatenate(self.row_keys)) if self.row_keys else (0, 0)
+
+        lengths = np.flatnonzero(self.length_hist)
+        return {
+            "rows": self.rows,
+            "columns": self.columns,
+            "dtypes": self.dtypes,
+            "missing_values": {col: {"count": int(n), "percent": round(100 * n / self.rows, 2) if self.rows else 0.0}
+                               for col, n in (self.nulls.items() if self.nulls is not None else [])},
+            "value_counts": self.value_counts,
+            "unique": {
+                "taxis": len(self.taxis),
+                "trip_ids": unique_trips,
+                "duplicate_trip_id_rows": self.rows - unique_trips,
+                "rows_sharing_trip_id": trip_dupes,
+                "rows_sharing_taxi_and_timestamp": taxi_time_dupes,
+                "fully_duplicate_rows": row_dupes,
+            },
+            "timestamp_range": [_plain(v) for v in self.timestamp_range],
+            "call_type_violations": {rule.description: int(n) for rule, n in
+                                     zip(self.call_type_rules.rules, self.call_type_rules.violations)},
+            "inconsistent_rows": self.call_type_rules.invalid_rows,
+            "polyline_length": {
+                "histogram": [[int(n_points), int(self.length_hist[n_points])] for n_points in lengths],
+                "empty_trips": int(self.length_hist[0]),
+                "trips_below_3_points": int(self.length_hist[:3].sum()),
+            },
+            "points": self.points,
+            "bounding_box": dict(zip(["lon_min", "lon_max", "lat_min", "lat_max"],
+                                     [_plain(v) if np.isfinite(v) else None for v in self.bbox])),
+            "distance_km": {
+                **self.distance.summary(),
+                "histogram_bin_km": DISTANCE_BIN_KM,
+                "histogram": self.distance_hist.tolist(),  # last bin: everything longer
+            },
+            "duration_sec": self.duration.summary(),
+        }
+
+
+def compute_report(path, chunk_size=200000):
+    """Run the single pass over `path` and return the report dict."""
+    stats = StreamingEdaStats()
+    start = time.time()
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        stats.update(chunk)
+        print(f"  processed {stats.rows:,} rows | Elapsed: {time.time() - start:.1f}s")
+    return stats.report()
+
+
+def print_report(report):
+    print(tabulate(
+        [["Rows", f"{report['rows']:,}"],
+         ["Unique taxis", f"{report['unique']['taxis']:,}"],
+         ["Unique TRIP_IDs", f"{report['unique']['trip_ids']:,}"],
+         ["Fully duplicate rows", f"{report['unique']['fully_duplicate_rows']:,}"],
+         ["Inconsistent CALL_TYPE rows", f"{report['inconsistent_rows']:,}"],
+         ["GPS points", f"{report['points']:,}"],
+         ["Trips with < 3 points", f"{report['polyline_length']['trips_below_3_points']:,}"],
+         ["Median distance (km)", f"{report['distance_km']['p50'] or 0:.2f}"],
+         ["Median duration (s)", f"{report['duration_sec']['p50'] or 0:.0f}"]],
+        headers=["Metric", "Value"], tablefmt="fancy_grid"))
+    print(tabulate(report["call_type_violations"].items(), headers=["Violation Description", "Count"],
+                   tablefmt="fancy_grid"))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Single-pass EDA statistics for porto.csv.")
+    parser.add_argument("--input", default="porto.csv")
+    parser.add_argument("--output", default="eda_report.json")
+    parser.add_argument("--chunk-size", type=int, default=200000)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.time()
+    print(f"\n===== STREAMING EDA STATISTICS: {args.input} =====")
+    report = compute_report(args.input, args.chunk_size)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=_plain)
+    print_report(report)
+    print(f"\nReport written to {args.output} in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
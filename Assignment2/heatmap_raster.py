@@ -0,0 +1,402 @@
+# ------------------------------------------------------------
+# Streaming heatmap rasterizer
+# Counts GPS points per pixel of a preallocated grid, reading the points
+# in large blocks from points_clean.csv, a binary trajectory file (.ptrj,
+# see trajectory_file.py) or the Point table, so the route density map
+# never needs the parsed dataset in memory. With --workers the input is
+# split into shards (byte ranges of the CSV, trip ranges of the .ptrj
+# file or point_id ranges of the table) that are counted in parallel
+# and summed.
+#
+#   python heatmap_raster.py --source points_clean.csv --width 24000 --height 18000 --workers 4
+#   python heatmap_raster.py --source trajectories.ptrj --workers 4
+#   python heatmap_raster.py --source db --bounds -8.73 -8.50 41.10 41.25
+#   python heatmap_raster.py --width 24000 --height 18000 --tiles heatmap_tiles
+# ------------------------------------------------------------
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+# Grids up to this many cells are counted with np.bincount; larger grids
+# use sort + unique so no block allocates a full-size int64 histogram.
+BINCOUNT_MAX_CELLS = 1 << 24
+BLOCK_ROWS = 4_000_000
+
+HEATMAP_COLORS = ["black", "orange", "yellow"]
+
+
+class RasterGrid:
+    """A width x height pixel grid over a lon/lat box. Row 0 is the northern edge."""
+
+    def __init__(self, lon_range, lat_range, width, height):
+        self.lon_min, self.lon_max = (float(v) for v in lon_range)
+        self.lat_min, self.lat_max = (float(v) for v in lat_range)
+        self.width = int(width)
+        self.height = int(height)
+
+    @classmethod
+    def from_points(cls, lat, lon, width, height):
+        return cls((np.nanmin(lon), np.nanmax(lon)), (np.nanmin(lat), np.nanmax(lat)), width, height)
+
+    @property
+    def cells(self):
+        return self.width * self.height
+
+    def to_dict(self):
+        return {"lon_range": [self.lon_min, self.lon_max], "lat_range": [self.lat_min, self.lat_max],
+                "width": self.width, "height": self.height}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["lon_range"], d["lat_range"], d["width"], d["height"])
+
+    def empty(self):
+        return np.zeros((self.height, self.width), dtype=np.uint32)
+
+    def pixel_index(self, lat, lon):
+        """Flat pixel index of every point inside the box (points outside are dropped)."""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        inside = (lon >= self.lon_min) & (lon <= self.lon_max) & (lat >= self.lat_min) & (lat <= self.lat_max)
+        lat, lon = lat[inside], lon[inside]
+
+        col = ((lon - self.lon_min) * (self.width / (self.lon_max - self.lon_min))).astype(np.int64)
+        row = ((self.lat_max - lat) * (self.height / (self.lat_max - self.lat_min))).astype(np.int64)
+        # Points exactly on the east/south edge belong to the last column/row
+        np.minimum(col, self.width - 1, out=col)
+        np.minimum(row, self.height - 1, out=row)
+        return row * self.width + col
+
+    def add(self, counts, lat, lon):
+        """Add the points to `counts` in place; returns the number of points inside the grid."""
+        flat_counts = counts.reshape(-1)
+        binned = 0
+        for lo in range(0, len(lat), BLOCK_ROWS):
+            index = self.pixel_index(lat[lo:lo + BLOCK_ROWS], lon[lo:lo + BLOCK_ROWS])
+            binned += len(index)
+            if self.cells <= BINCOUNT_MAX_CELLS:
+                np.add(flat_counts, np.bincount(index, minlength=self.cells), out=flat_counts, casting="unsafe")
+            else:
+                pixels, n = np.unique(index, return_counts=True)
+                flat_counts[pixels] += n.astype(np.uint32)
+        return binned
+
+
+# ------------------------------------------------------------
+# Point sources
+# ------------------------------------------------------------
+def csv_columns(path):
+    """Positions of the latitude and longitude columns from the CSV header."""
+    with open(path, "r", encoding="utf-8") as f:
+        header = f.readline().strip().split(",")
+    return header.index("latitude"), header.index("longitude")
+
+
+def csv_shards(path, n):
+    """Split the file into n byte ranges; a row belongs to the range it starts in."""
+    size = os.path.getsize(path)
+    bounds = [size * i // n for i in range(n + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(n) if bounds[i] < bounds[i + 1]]
+
+
+def csv_blocks(path, start=0, end=None, block_bytes=64 << 20):
+    """Yield (lat, lon) arrays for the rows of points_clean.csv starting in the byte range [start, end)."""
+    lat_col, lon_col = csv_columns(path)
+    end = os.path.getsize(path) if end is None else end
+
+    with open(path, "rb") as f:
+        if start == 0:
+            f.readline()  # header
+        else:
+            # Skip the row that started in the previous shard
+            f.seek(start - 1)
+            f.readline()
+
+        while f.tell() < end:
+            buf = f.read(min(block_bytes, end - f.tell()))
+            buf += f.readline()  # finish the last row of the block
+            block = pd.read_csv(io.BytesIO(buf), header=None, usecols=[lat_col, lon_col],
+                                dtype=np.float64, engine="c")
+            yield block[lat_col].to_numpy(), block[lon_col].to_numpy()
+
+
+def db_shards(n):
+    """Split the point_id range of Point into n ranges."""
+    from DbConnector import DbConnector
+
+    connection = DbConnector()
+    try:
+        connection.cursor.execute("SELECT MIN(point_id), MAX(point_id) FROM Point")
+        low, high = connection.cursor.fetchone()
+    finally:
+        connection.close_connection()
+    if low is None:
+        return []
+    bounds = np.linspace(low, high + 1, n + 1).astype(np.int64)
+    return [(int(bounds[i]), int(bounds[i + 1])) for i in range(n) if bounds[i] < bounds[i + 1]]
+
+
+def db_blocks(cursor, point_range=None, block_rows=1_000_000):
+    """Yield (lat, lon) arrays from the Point table, optionally for point_id in [low, high)."""
+    query = "SELECT latitude, longitude FROM Point"
+    params = ()
+    if point_range is not None:
+        query += " WHERE point_id >= %s AND point_id < %s"
+        params = point_range
+    cursor.execute(query, params)
+
+    while True:
+        rows = cursor.fetchmany(block_rows)
+        if not rows:
+            break
+        block = np.array(rows, dtype=np.float64)
+        del rows
+        yield block[:, 0], block[:, 1]
+
+
+def trajectory_file_shards(path, n):
+    """Split a .ptrj file into n trip ranges with about the same number of points."""
+    from trajectory_file import TrajectoryFile
+
+    offsets = TrajectoryFile(path).offsets
+    bounds = np.searchsorted(offsets, np.linspace(0, offsets[-1], n + 1)).tolist()
+    bounds[-1] = len(offsets) - 1
+    return [(bounds[i], bounds[i + 1]) for i in range(n) if bounds[i] < bounds[i + 1]]
+
+
+def trajectory_file_blocks(path, start=0, end=None):
+    """Yield (lat, lon) arrays for the trips [start, end) of a .ptrj file."""
+    from trajectory_file import TrajectoryFile
+
+    for _, lat, lon, _ in TrajectoryFile(path).blocks(start, end, block_points=BLOCK_ROWS):
+        yield lat, lon
+
+
+def point_blocks(source, shard=None):
+    """Blocks of (lat, lon) for a CSV or .ptrj path or "db", restricted to one shard if given."""
+    if source.endswith(".ptrj"):
+        start, end = shard if shard is not None else (0, None)
+        yield from trajectory_file_blocks(source, start, end)
+        return
+    if source != "db":
+        start, end = shard if shard is not None else (0, None)
+        yield from csv_blocks(source, start, end)
+        return
+
+    from DbConnector import DbConnector
+
+    connection = DbConnector()
+    cursor = connection.db_connection.cursor()
+    try:
+        yield from db_blocks(cursor, shard)
+    finally:
+        cursor.close()
+        connection.close_connection()
+
+
+def shards(source, n):
+    if n <= 1:
+        return [None]
+    if source.endswith(".ptrj"):
+        return trajectory_file_shards(source, n)
+    return db_shards(n) if source == "db" else csv_shards(source, n)
+
+
+# ------------------------------------------------------------
+# Rasterization
+# ------------------------------------------------------------
+def _shard_bounds(job):
+    source, shard = job
+    lon_min = lat_min = np.inf
+    lon_max = lat_max = -np.inf
+    for lat, lon in point_blocks(source, shard):
+        if len(lat):
+            lat_min, lat_max = min(lat_min, np.nanmin(lat)), max(lat_max, np.nanmax(lat))
+            lon_min, lon_max = min(lon_min, np.nanmin(lon)), max(lon_max, np.nanmax(lon))
+    return lon_min, lon_max, lat_min, lat_max
+
+
+def scan_bounds(source, workers=1):
+    """Bounding box (lon_min, lon_max, lat_min, lat_max) of all points, in one streaming pass."""
+    if source == "db":
+        from DbConnector import DbConnector
+
+        connection = DbConnector()
+        try:
+            connection.cursor.execute(
+                "SELECT MIN(longitude), MAX(longitude), MIN(latitude), MAX(latitude) FROM Point")
+            return tuple(float(v) for v in connection.cursor.fetchone())
+        finally:
+            connection.close_connection()
+
+    jobs = [(source, shard) for shard in shards(source, workers)]
+    if workers > 1:
+        with Pool(workers) as pool:
+            parts = pool.map(_shard_bounds, jobs)
+    else:
+        parts = [_shard_bounds(job) for job in jobs]
+    parts = np.array(parts)
+    return parts[:, 0].min(), parts[:, 1].max(), parts[:, 2].min(), parts[:, 3].max()
+
+
+def _rasterize_shard(job):
+    """Count one shard into its own grid, saved to tmp_dir; returns (path, points read, points binned)."""
+    source, shard, grid_dict, tmp_dir = job
+    grid = RasterGrid.from_dict(grid_dict)
+    counts = grid.empty()
+    read = binned = 0
+    for lat, lon in point_blocks(source, shard):
+        read += len(lat)
+        binned += grid.add(counts, lat, lon)
+
+    fd, path = tempfile.mkstemp(suffix=".npy", dir=tmp_dir)
+    os.close(fd)
+    np.save(path, counts)
+    return path, read, binned
+
+
+def rasterize(source, grid, workers=1, tmp_dir=None):
+    """
+    Count the points of `source` (a points CSV, .ptrj file or "db") into `grid`.
+    Each worker holds a full grid (4 bytes per pixel) while it runs.
+    """
+    if workers <= 1:
+        counts = grid.empty()
+        read = binned = 0
+        for lat, lon in point_blocks(source):
+            read += len(lat)
+            binned += grid.add(counts, lat, lon)
+        print(f"Rasterized {binned:,} of {read:,} points")
+        return counts
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        jobs = [(source, shard, grid.to_dict(), tmp) for shard in shards(source, workers)]
+        counts = grid.empty()
+        read = binned = 0
+        with Pool(workers) as pool:
+            for path, shard_read, shard_binned in pool.imap_unordered(_rasterize_shard, jobs):
+                counts += np.load(path, mmap_mode="r")
+                os.remove(path)
+                read += shard_read
+                binned += shard_binned
+                print(f"  shard done: {shard_read:,} points")
+    print(f"Rasterized {binned:,} of {read:,} points from {len(jobs)} shards")
+    return counts
+
+
+# ------------------------------------------------------------
+# Output
+# ------------------------------------------------------------
+def save_counts(counts, grid, path):
+    """Save the count grid as <path>.npy with the grid definition in <path>.json."""
+    np.save(f"{path}.npy", counts)
+    with open(f"{path}.json", "w", encoding="utf-8") as f:
+        json.dump(grid.to_dict(), f, indent=2)
+
+
+def load_counts(path, mmap_mode="r"):
+    with open(f"{path}.json", encoding="utf-8") as f:
+        grid = RasterGrid.from_dict(json.load(f))
+    return np.load(f"{path}.npy", mmap_mode=mmap_mode), grid
+
+
+def eq_hist_lut(counts, levels=256):
+    """
+    Color level (0..levels-1) per count value, histogram-equalized over the
+    non-empty pixels like datashader's how="eq_hist"; count 0 maps to level 0.
+    Index it with a count grid (lut[counts]) to shade any part of that grid.
+    """
+    # Histogram of the non-empty pixels only: np.bincount over the whole
+    # grid would make an int64 copy of it
+    counts = np.asarray(counts)
+    top = int(counts.max()) if counts.size else 0
+    values, freq = np.unique(counts[counts > 0], return_counts=True)
+    lut = np.zeros(top + 1, dtype=np.uint8)
+    if len(values) == 0:
+        return lut
+    cdf = np.cumsum(freq)
+    value_levels = np.rint(cdf / cdf[-1] * (levels - 1)).astype(np.uint8)
+    # Counts that no pixel has share the level of the next smaller count
+    below = np.searchsorted(values, np.arange(1, top + 1), side="right") - 1
+    lut[1:] = np.where(below >= 0, value_levels[below], 0)
+    return lut
+
+
+def color_lut(colors=HEATMAP_COLORS):
+    """RGB color (uint8) per level 0..255 for a list of colors, e.g. the EDA's black-orange-yellow."""
+    from matplotlib.colors import LinearSegmentedColormap
+
+    cmap = LinearSegmentedColormap.from_list("heatmap", colors)
+    return (cmap(np.linspace(0, 1, 256))[:, :3] * 255).astype(np.uint8)
+
+
+def render_png(counts, path, colors=HEATMAP_COLORS):
+    """Write the grid as a PNG with the EDA's black-orange-yellow map and eq_hist shading."""
+    from PIL import Image
+
+    Image.fromarray(color_lut(colors)[eq_hist_lut(counts)[counts]]).save(path)
+
+
+def to_datashader(counts, grid):
+    """The grid as an xarray DataArray, shaped like a datashader Canvas aggregate (y ascending)."""
+    import xarray as xr
+
+    x_step = (grid.lon_max - grid.lon_min) / grid.width
+    y_step = (grid.lat_max - grid.lat_min) / grid.height
+    x = grid.lon_min + (np.arange(grid.width) + 0.5) * x_step
+    y = grid.lat_min + (np.arange(grid.height) + 0.5) * y_step
+    return xr.DataArray(np.asarray(counts)[::-1], coords={"y": y, "x": x}, dims=("y", "x"))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rasterize GPS points into a heatmap count grid.")
+    parser.add_argument("--source", default="points_clean.csv", help='Points CSV, .ptrj trajectory file, or "db" for the Point table')
+    parser.add_argument("--width", type=int, default=24000)
+    parser.add_argument("--height", type=int, default=18000)
+    parser.add_argument("--bounds", type=float, nargs=4, metavar=("LON_MIN", "LON_MAX", "LAT_MIN", "LAT_MAX"),
+                        help="Box to rasterize (default: bounding box of all points, one extra pass)")
+    parser.add_argument("--workers", type=int, default=1, help="Shards counted in parallel")
+    parser.add_argument("--output", default="heatmap", help="Output prefix for .npy, .json and .png")
+    parser.add_argument("--no-png", action="store_true", help="Only save the count grid")
+    parser.add_argument("--tiles", metavar="DIR",
+                        help="Also write a zoom pyramid of 256x256 tiles to DIR (see heatmap_tiles.py)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    t0 = time.time()
+
+    print("\n===== STEP 1: BOUNDS =====")
+    bounds = args.bounds or scan_bounds(args.source, args.workers)
+    lon_min, lon_max, lat_min, lat_max = bounds
+    print(f"Bounds: lon [{lon_min:.6f}, {lon_max:.6f}], lat [{lat_min:.6f}, {lat_max:.6f}]")
+    grid = RasterGrid((lon_min, lon_max), (lat_min, lat_max), args.width, args.height)
+
+    print(f"\n===== STEP 2: RASTERIZING ({args.width}x{args.height}) =====")
+    counts = rasterize(args.source, grid, args.workers)
+    print(f"Elapsed {time.time() - t0:.1f}s")
+
+    print("\n===== STEP 3: SAVING =====")
+    save_counts(counts, grid, args.output)
+    print(f"Saved {args.output}.npy and {args.output}.json")
+    if not args.no_png:
+        render_png(counts, f"{args.output}.png")
+        print(f"Saved {args.output}.png")
+    if args.tiles:
+        from heatmap_tiles import build_pyramid
+
+        build_pyramid(counts, grid, args.tiles, png=not args.no_png)
+        print(f"Saved tile pyramid to '{args.tiles}'")
+    print(f"\n=== HEATMAP COMPLETED in {time.time() - t0:.1f}s ===")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# ------------------------------------------------------------
+# Heatmap tile pyramid
+# Cuts a count grid from heatmap_raster.py into tile_size x tile_size
+# tiles and builds every coarser zoom level from the one below by summing
+# 2x2 pixel blocks, so the grid is read once. Level 0 is a single tile;
+# the highest level is the full-resolution grid. Any view is rendered by
+# reading the few tiles of the level that matches its resolution.
+#
+#   python heatmap_tiles.py --input heatmap --output heatmap_tiles
+#   <output>/pyramid.json             level sizes and the lon/lat box
+#   <output>/<z>/<x>/<y>.npy          counts (empty tiles are not written)
+#   <output>/<z>/<x>/<y>.png          shaded tile (--png)
+# ------------------------------------------------------------
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from heatmap_raster import RasterGrid, color_lut, eq_hist_lut, load_counts
+
+TILE_SIZE = 256
+
+
+def downsample(counts):
+    """Sum 2x2 pixel blocks; odd edges are padded with empty pixels."""
+    height, width = counts.shape
+    padded = np.zeros((height + height % 2, width + width % 2), dtype=np.uint32)
+    padded[:height, :width] = counts
+    return padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2).sum(axis=(1, 3), dtype=np.uint32)
+
+
+def max_zoom(width, height, tile_size=TILE_SIZE):
+    """Finest zoom level: the number of halvings until the grid fits in one tile."""
+    return max(math.ceil(math.log2(max(width, height) / tile_size)), 0)
+
+
+def tile_path(out_dir, z, x, y, ext="npy"):
+    return os.path.join(out_dir, str(z), str(x), f"{y}.{ext}")
+
+
+def write_level(counts, z, out_dir, tile_size=TILE_SIZE, png=False):
+    """Write the non-empty tiles of one level; returns the number of tiles written."""
+    from PIL import Image
+
+    lut = color_lut() if png else None
+    shade = eq_hist_lut(counts) if png else None
+    written = 0
+    height, width = counts.shape
+
+    for x in range(math.ceil(width / tile_size)):
+        for y in range(math.ceil(height / tile_size)):
+            tile = counts[y * tile_size:(y + 1) * tile_size, x * tile_size:(x + 1) * tile_size]
+            if not tile.any():
+                continue
+            # Edge tiles are padded so every tile has the same shape
+            if tile.shape != (tile_size, tile_size):
+                full = np.zeros((tile_size, tile_size), dtype=np.uint32)
+                full[:tile.shape[0], :tile.shape[1]] = tile
+                tile = full
+
+            os.makedirs(os.path.dirname(tile_path(out_dir, z, x, y)), exist_ok=True)
+            np.save(tile_path(out_dir, z, x, y), tile)
+            if png:
+                # One eq_hist table per level, so neighbouring tiles are shaded alike
+                Image.fromarray(lut[shade[tile]]).save(tile_path(out_dir, z, x, y, "png"))
+            written += 1
+    return written
+
+
+def build_pyramid(counts, grid, out_dir, tile_size=TILE_SIZE, png=False):
+    """Write all zoom levels of `counts` (the grid of `grid`) to out_dir and return the metadata."""
+    top = max_zoom(grid.width, grid.height, tile_size)
+    levels = []
+    level = counts
+
+    for z in range(top, -1, -1):
+        height, width = level.shape
+        tiles = write_level(level, z, out_dir, tile_size, png)
+        levels.append({
+            "z": z,
+            "width": width,
+            "height": height,
+            "scale": 2 ** (top - z),  # full-resolution pixels per pixel of this level
+            "tiles_x": math.ceil(width / tile_size),
+            "tiles_y": math.ceil(height / tile_size),
+            "tiles_written": tiles,
+            "max_count": int(level.max()) if level.size else 0,
+        })
+        print(f"  level {z}: {width}x{height}, {tiles} tiles")
+        if z > 0:
+            level = downsample(level)
+
+    meta = {"grid": grid.to_dict(), "tile_size": tile_size, "max_zoom": top,
+            "levels": sorted(levels, key=lambda lv: lv["z"])}
+    with open(os.path.join(out_dir, "pyramid.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class TileReader:
+    """Reads views of a pyramid written by build_pyramid(); missing tiles are empty."""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        with open(os.path.join(out_dir, "pyramid.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.grid = RasterGrid.from_dict(self.meta["grid"])
+        self.tile_size = self.meta["tile_size"]
+        self.levels = {lv["z"]: lv for lv in self.meta["levels"]}
+
+    def tile(self, z, x, y):
+        path = tile_path(self.out_dir, z, x, y)
+        if os.path.exists(path):
+            return np.load(path)
+        return np.zeros((self.tile_size, self.tile_size), dtype=np.uint32)
+
+    def window(self, z, row, col, height, width):
+        """Counts of level z for rows [row, row+height) and columns [col, col+width)."""
+        size = self.tile_size
+        out = np.zeros((height, width), dtype=np.uint32)
+        for y in range(row // size, (row + height - 1) // size + 1):
+            for x in range(col // size, (col + width - 1) // size + 1):
+                tile = self.tile(z, x, y)
+                r0, c0 = max(row, y * size), max(col, x * size)
+                r1, c1 = min(row + height, (y + 1) * size), min(col + width, (x + 1) * size)
+                out[r0 - row:r1 - row, c0 - col:c1 - col] = tile[r0 - y * size:r1 - y * size,
+                                                                 c0 - x * size:c1 - x * size]
+        return out
+
+    def view(self, lon_range, lat_range, max_pixels=1024):
+        """
+        Counts for a lon/lat box from the coarsest level that still gives the
+        view at least max_pixels pixels on its longer side (or the finest level).
+        Returns (counts, z).
+        """
+        g = self.grid
+        col0 = (lon_range[0] - g.lon_min) * g.width / (g.lon_max - g.lon_min)
+        col1 = (lon_range[1] - g.lon_min) * g.width / (g.lon_max - g.lon_min)
+        row0 = (g.lat_max - lat_range[1]) * g.height / (g.lat_max - g.lat_min)
+        row1 = (g.lat_max - lat_range[0]) * g.height / (g.lat_max - g.lat_min)
+        span = max(col1 - col0, row1 - row0)
+
+        z = self.meta["max_zoom"]
+        while z > 0 and span / self.levels[z - 1]["scale"] >= max_pixels:
+            z -= 1
+        scale = self.levels[z]["scale"]
+        r0, c0 = max(int(row0 // scale), 0), max(int(col0 // scale), 0)
+        r1 = min(math.ceil(row1 / scale), self.levels[z]["height"])
+        c1 = min(math.ceil(col1 / scale), self.levels[z]["width"])
+        return self.window(z, r0, c0, max(r1 - r0, 0), max(c1 - c0, 0)), z
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build a zoom pyramid of heatmap tiles.")
+    parser.add_argument("--input", default="heatmap", help="Prefix of the .npy/.json written by heatmap_raster.py")
+    parser.add_argument("--output", default="heatmap_tiles", help="Directory for the tiles")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE)
+    parser.add_argument("--png", action="store_true", help="Also write shaded PNG tiles")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    t0 = time.time()
+    counts, grid = load_counts(args.input)
+    print(f"\n===== BUILDING TILE PYRAMID ({grid.width}x{grid.height}) =====")
+    meta = build_pyramid(counts, grid, args.output, args.tile_size, args.png)
+    print(f"Saved {len(meta['levels'])} levels to '{args.output}' in {time.time() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# ------------------------------------------------------------
+# Month partitions of Trip and Point
+# With 04-insert_to_db.py --partition-by month, Trip is partitioned on its
+# timestamp and Point on trip_month (see porto_schema.py). Queries with a
+# time bound on Trip.timestamp or Point.trip_month only read the matching
+# partitions, and one month can be emptied and reloaded without touching
+# the others:
+#
+#   python 04-insert_to_db.py --partition-by month
+#   python 04-insert_to_db.py --drop-month 2013-07
+#   python 04-insert_to_db.py --reload-month 2013-07
+# ------------------------------------------------------------
+import pandas as pd
+
+from porto_schema import PARTITION_MONTHS, TRIP_DTYPES, month_keys
+
+
+def parse_month(text):
+    """'2013-07' or '201307' -> '201307'; ValueError for a month without its own partition."""
+    month = text.replace("-", "")
+    if month not in PARTITION_MONTHS:
+        raise ValueError(f"No partition for month {text!r}; "
+                         f"months are {PARTITION_MONTHS[0]}..{PARTITION_MONTHS[-1]} (YYYY-MM)")
+    return month
+
+
+def partition_name(month):
+    return f"p{month}"
+
+
+def is_partitioned(cursor, table):
+    cursor.execute("""
+        SELECT COUNT(partition_name) FROM information_schema.PARTITIONS
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    return cursor.fetchone()[0] > 0
+
+
+def partition_rows(cursor, table):
+    """Rows per partition of `table` (InnoDB estimates) as a DataFrame."""
+    cursor.execute("""
+        SELECT partition_name, table_rows FROM information_schema.PARTITIONS
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY partition_ordinal_position
+    """, (table,))
+    return pd.DataFrame(cursor.fetchall(), columns=["partition", "rows"])
+
+
+def in_partition(keys, month):
+    """Mask of the YYYYMM keys stored in the partition of `month`; the first one also holds earlier months."""
+    keys = pd.Series(keys).astype("Int32")
+    mask = keys.le(int(month)) if month == PARTITION_MONTHS[0] else keys.eq(int(month))
+    return mask.fillna(False).to_numpy(dtype=bool)
+
+
+def first_trips(path):
+    """
+    Start timestamp and month (YYYYMM, as trip_month) of every trip in
+    trips_clean.csv, indexed by trip_id. A trip_id that occurs more than
+    once keeps its first row.
+    """
+    trips = pd.read_csv(path, usecols=["trip_id", "timestamp"], dtype=TRIP_DTYPES)
+    trips = trips.drop_duplicates("trip_id", keep="first").set_index("trip_id")
+    trips["trip_month"] = month_keys(trips["timestamp"])
+    return trips
+
+
+def first_rows(frame, trips):
+    """
+    The rows of a Trip frame that are the first row of their trip_id (see
+    first_trips()). The partitioned Trip's primary key is (trip_id,
+    timestamp), so INSERT IGNORE alone would accept a repeated trip_id
+    with another timestamp.
+    """
+    first = trips["timestamp"].reindex(frame["trip_id"].to_numpy()).reset_index(drop=True)
+    same = frame["timestamp"].reset_index(drop=True).eq(first)
+    return frame[same.fillna(False).to_numpy(dtype=bool)]
+
+
+def with_trip_month(points, trips):
+    """Point rows with the trip_month column after trip_id, looked up in `trips` (see first_trips())."""
+    points = points.copy()
+    points.insert(1, "trip_month", trips["trip_month"].reindex(points["trip_id"].to_numpy()).to_numpy())
+    return points
+
+
+def truncate_month(cursor, month, tables=("Trip", "Point")):
+    """
+    Empty the partition of `month` in each table; the other months are not
+    touched. For the first month this includes everything before it.
+    """
+    for table in tables:
+        cursor.execute(f"ALTER TABLE {table} TRUNCATE PARTITION {partition_name(month)}")
+
+
+def delete_orphan_trajectories(cursor):
+    """Delete TripTrajectory rows whose trip is gone (it has no foreign key to a partitioned Trip)."""
+    cursor.execute("""
+        DELETE tt FROM TripTrajectory tt
+        LEFT JOIN Trip t ON t.trip_id = tt.trip_id
+        WHERE t.trip_id IS NULL
+    """)
+    return cursor.rowcount
@@ -0,0 +1,121 @@
+# ------------------------------------------------------------
+# Parsed dataset cache
+# Stores porto.csv after parsing: the trip columns without POLYLINE as
+# Parquet and the trajectories as flat, memory-mappable numpy arrays (lat,
+# lon, offsets; see trajectory_utils.py). A manifest records the size, mtime and SHA-1
+# of the source file, so the cache is reused automatically while the
+# source is unchanged and ignored as soon as it changes.
+#
+#   <cache_dir>/<source name>/manifest.json
+#   <cache_dir>/<source name>/trips.parquet
+#   <cache_dir>/<source name>/{lat,lon,offsets}.npy
+# ------------------------------------------------------------
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from trajectory_utils import format_polylines
+
+CACHE_DIR = ".cache/parsed"
+FORMAT_VERSION = 2
+ARRAYS = ("lat", "lon", "offsets")
+
+
+def file_sha1(path, block_bytes=16 << 20):
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_bytes), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class ParsedCache:
+    """Parsed copy of one source CSV; see the module header for the layout."""
+
+    def __init__(self, source, cache_dir=CACHE_DIR):
+        self.source = source
+        self.dir = os.path.join(cache_dir, os.path.basename(source))
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+
+    def _manifest(self):
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_valid(self):
+        """
+        True if the cache was built from the current source file. Size and
+        mtime are compared first; if only the mtime changed (file copied or
+        touched) the SHA-1 decides, and a match refreshes the manifest.
+        """
+        manifest = self._manifest()
+        if manifest is None or manifest.get("format_version") != FORMAT_VERSION:
+            return False
+        if not all(os.path.exists(os.path.join(self.dir, f"{name}.npy")) for name in ARRAYS):
+            return False
+
+        stat = os.stat(self.source)
+        if stat.st_size != manifest["size"]:
+            return False
+        if stat.st_mtime_ns == manifest["mtime_ns"]:
+            return True
+
+        print("Source modification time changed, comparing checksums...")
+        if file_sha1(self.source) != manifest["sha1"]:
+            return False
+        manifest["mtime_ns"] = stat.st_mtime_ns
+        self._write_manifest(manifest)
+        return True
+
+    def load_frame(self, columns=None):
+        """The trip columns read from the source, without POLYLINE (see load_polylines())."""
+        return pd.read_parquet(os.path.join(self.dir, "trips.parquet"), columns=columns)
+
+    def load_polylines(self, trips):
+        """POLYLINE strings of the trips at the given row positions, rebuilt from the cached arrays."""
+        return format_polylines(*self.load_trajectories(), trips=trips)
+
+    def load_trajectories(self, mmap_mode="r"):
+        """(lat, lon, offsets), memory-mapped by default so loading is instant."""
+        return tuple(np.load(os.path.join(self.dir, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS)
+
+    def save(self, df, lat, lon, offsets):
+        """Write the cache for the current source file; the manifest is written last."""
+        if len(offsets) != len(df) + 1:
+            raise ValueError(f"offsets describe {len(offsets) - 1} trips, frame has {len(df)}")
+
+        os.makedirs(self.dir, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)  # an interrupted save leaves no valid cache behind
+
+        start = time.time()
+        stat = os.stat(self.source)
+        # The trajectories are stored as arrays below, so the strings are not kept twice
+        df.drop(columns="POLYLINE", errors="ignore").to_parquet(
+            os.path.join(self.dir, "trips.parquet"), index=False, compression="zstd")
+        for name, array in zip(ARRAYS, (lat, lon, offsets)):
+            np.save(os.path.join(self.dir, f"{name}.npy"), np.ascontiguousarray(array))
+
+        self._write_manifest({
+            "format_version": FORMAT_VERSION,
+            "source": os.path.abspath(self.source),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha1": file_sha1(self.source),
+            "trips": len(df),
+            "points": int(offsets[-1]),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        print(f"Saved parsed cache to '{self.dir}' in {time.time() - start:.1f}s")
+
+    def _write_manifest(self, manifest):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
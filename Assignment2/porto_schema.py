@@ -0,0 +1,169 @@
+# ------------------------------------------------------------
+# Compact column types for the Porto trips
+# One type per column, used from preprocessing through loading:
+#   trip_id                    int64     (BIGINT)   ~1.4e18, no float round-trip
+#   taxi_id                    int32     (INT)      8-digit ids
+#   call_type, day_type        category  (ENUM)     'A', 'B' or 'C'
+#   origin_call, origin_stand  Int32     (INT NULL) nullable integers
+#   timestamp                  str / datetime64     (DATETIME)
+# plus the DDL of the tables, including the optional TripTrajectory
+# table (one compressed trajectory per trip, see trajectory_codec.py) and
+# the month-partitioned variants of Trip and Point (see month_partitions.py).
+# ------------------------------------------------------------
+import pandas as pd
+
+CODES = pd.CategoricalDtype(["A", "B", "C"])
+
+# Raw porto.csv. CALL_TYPE is read with inferred categories so unknown
+# values are still seen by the validation rules; cast_codes() fixes them
+# to A/B/C afterwards.
+RAW_DTYPES = {
+    "TRIP_ID": "int64",
+    "CALL_TYPE": "category",
+    "ORIGIN_CALL": "Int32",
+    "ORIGIN_STAND": "Int32",
+    "TAXI_ID": "int32",
+    "TIMESTAMP": "int64",
+    "DAY_TYPE": "category",
+}
+
+# porto_preprocessed.csv (TIMESTAMP is already a datetime string)
+PREPROCESSED_DTYPES = {**RAW_DTYPES, "CALL_TYPE": CODES, "DAY_TYPE": CODES, "TIMESTAMP": "string"}
+
+# trips_clean.csv / the Trip table
+TRIP_DTYPES = {
+    "trip_id": "int64",
+    "taxi_id": "int32",
+    "call_type": CODES,
+    "origin_call": "Int32",
+    "origin_stand": "Int32",
+    "timestamp": "string",
+    "day_type": CODES,
+}
+
+# points_clean.csv / the Point table
+POINT_DTYPES = {
+    "trip_id": "int64",
+    "seq": "int32",
+    "latitude": "float64",
+    "longitude": "float64",
+}
+
+TRIP_DDL = """
+    CREATE TABLE IF NOT EXISTS Trip (
+        trip_id BIGINT PRIMARY KEY,
+        taxi_id INT NOT NULL,
+        call_type ENUM('A', 'B', 'C') NOT NULL,
+        origin_call INT NULL,
+        origin_stand INT NULL,
+        timestamp DATETIME,
+        day_type ENUM('A', 'B', 'C') NOT NULL
+    );
+"""
+
+POINT_DDL = """
+    CREATE TABLE IF NOT EXISTS Point (
+        point_id INT AUTO_INCREMENT PRIMARY KEY,
+        trip_id BIGINT,
+        seq INT,
+        latitude FLOAT,
+        longitude FLOAT,
+        UNIQUE INDEX idx_point_trip_seq (trip_id, seq),
+        FOREIGN KEY (trip_id) REFERENCES Trip(trip_id)
+    );
+"""
+
+# Alternative to Point: the whole trajectory of a trip in one row
+TRAJECTORY_DDL = """
+    CREATE TABLE IF NOT EXISTS TripTrajectory (
+        trip_id BIGINT PRIMARY KEY,
+        n_points INT NOT NULL,
+        points MEDIUMBLOB NOT NULL,
+        FOREIGN KEY (trip_id) REFERENCES Trip(trip_id)
+    );
+"""
+
+# ------------------------------------------------------------
+# Month-partitioned tables (04-insert_to_db.py --partition-by month)
+# MySQL partitioned tables cannot have foreign keys and every unique key
+# must contain the partitioning column: Trip is partitioned on timestamp
+# with PRIMARY KEY (trip_id, timestamp), and Point on trip_month (the
+# month its trip started, YYYYMM) copied from Trip by the loader. Since
+# trip_month follows from trip_id, (trip_id, seq, trip_month) is as
+# unique as (trip_id, seq) in the plain Point table.
+# One partition per month of the Porto data (July 2013 - June 2014);
+# p201307 also takes anything earlier and pmax anything later.
+# ------------------------------------------------------------
+PARTITION_MONTHS = [f"{year}{month:02d}" for year, month in
+                    [(2013, m) for m in range(7, 13)] + [(2014, m) for m in range(1, 7)]]
+
+
+def _next_month(month):
+    year, month = int(month[:4]), int(month[4:])
+    return f"{year + month // 12}{month % 12 + 1:02d}"
+
+
+def _partitions(bound):
+    parts = [f"PARTITION p{m} VALUES LESS THAN ({bound(_next_month(m))})" for m in PARTITION_MONTHS]
+    return ",\n        ".join(parts + ["PARTITION pmax VALUES LESS THAN (MAXVALUE)"])
+
+
+PARTITIONED_TRIP_DDL = f"""
+    CREATE TABLE IF NOT EXISTS Trip (
+        trip_id BIGINT NOT NULL,
+        taxi_id INT NOT NULL,
+        call_type ENUM('A', 'B', 'C') NOT NULL,
+        origin_call INT NULL,
+        origin_stand INT NULL,
+        timestamp DATETIME NOT NULL,
+        day_type ENUM('A', 'B', 'C') NOT NULL,
+        PRIMARY KEY (trip_id, timestamp)
+    )
+    PARTITION BY RANGE COLUMNS (timestamp) (
+        {_partitions(lambda m: f"'{m[:4]}-{m[4:]}-01'")}
+    );
+"""
+
+PARTITIONED_POINT_DDL = f"""
+    CREATE TABLE IF NOT EXISTS Point (
+        point_id INT AUTO_INCREMENT,
+        trip_id BIGINT,
+        trip_month INT NOT NULL,
+        seq INT,
+        latitude FLOAT,
+        longitude FLOAT,
+        PRIMARY KEY (point_id, trip_month),
+        UNIQUE INDEX idx_point_trip_seq (trip_id, seq, trip_month)
+    )
+    PARTITION BY RANGE (trip_month) (
+        {_partitions(lambda m: m)}
+    );
+"""
+
+# TripTrajectory cannot reference a partitioned Trip
+PARTITIONED_TRAJECTORY_DDL = """
+    CREATE TABLE IF NOT EXISTS TripTrajectory (
+        trip_id BIGINT PRIMARY KEY,
+        n_points INT NOT NULL,
+        points MEDIUMBLOB NOT NULL
+    );
+"""
+
+
+def month_keys(timestamps):
+    """YYYYMM month numbers (Int32) of datetime strings or values, as used by Point.trip_month."""
+    timestamps = pd.to_datetime(timestamps)
+    return (timestamps.dt.year * 100 + timestamps.dt.month).astype("Int32")
+
+
+def cast_codes(df, columns=("CALL_TYPE", "DAY_TYPE")):
+    """Give the call/day type columns the fixed A/B/C categories (other values become NaN)."""
+    for col in columns:
+        df[col] = df[col].astype(CODES)
+    return df
+
+
+def db_rows(df):
+    """Rows of `df` as tuples of plain Python values (None for missing) for executemany()."""
+    columns = [df[col].astype(object).where(df[col].notna(), None) for col in df.columns]
+    return list(zip(*columns))
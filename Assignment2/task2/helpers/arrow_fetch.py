@@ -0,0 +1,98 @@
+
+import pyarrow as pa
+import pandas as pd
+from mysql.connector import FieldType
+
+# Target Arrow type per MySQL column type; anything else (e.g. BLOB) keeps
+# the type Arrow infers.
+MYSQL_TYPES = {
+    "TINY": pa.int64(),
+    "SHORT": pa.int64(),
+    "INT24": pa.int64(),
+    "LONG": pa.int64(),
+    "LONGLONG": pa.int64(),
+    "YEAR": pa.int64(),
+    "FLOAT": pa.float64(),
+    "DOUBLE": pa.float64(),
+    "DECIMAL": pa.float64(),
+    "NEWDECIMAL": pa.float64(),
+    "DATETIME": pa.timestamp("us"),
+    "TIMESTAMP": pa.timestamp("us"),
+    "DATE": pa.date32(),
+    "VAR_STRING": pa.string(),
+    "VARCHAR": pa.string(),
+    "STRING": pa.string(),
+    "ENUM": pa.string(),
+    "JSON": pa.string(),
+}
+
+# Names accepted in the `dtypes` override of fetch_frame()
+DTYPES = {
+    "int32": pa.int32(),
+    "int64": pa.int64(),
+    "float32": pa.float32(),
+    "float64": pa.float64(),
+    "datetime64": pa.timestamp("us"),
+    "string": pa.string(),
+}
+
+
+def column_types(cursor, dtypes=None):
+    """Arrow type per result column from the cursor description, with optional overrides."""
+    dtypes = dtypes or {}
+    types = {}
+    for column in cursor.description:
+        name, type_code = column[0], column[1]
+        if name in dtypes:
+            types[name] = DTYPES[dtypes[name]]
+        else:
+            types[name] = MYSQL_TYPES.get(FieldType.get_info(type_code))
+    return types
+
+
+def _to_arrow(values, arrow_type):
+    array = pa.array(values)
+    if arrow_type is not None and array.type != arrow_type:
+        array = array.cast(arrow_type)
+    return array
+
+
+def iter_batches(cursor, dtypes=None, batch_size=100_000):
+    """
+    Yield the pending result of `cursor` as Arrow record batches with typed
+    columns. Rows are pulled with fetchmany(), so at most one batch of Python
+    tuples (with their Decimal and datetime objects) exists at a time.
+    """
+    columns = list(cursor.column_names)
+    types = column_types(cursor, dtypes)
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        values = list(zip(*rows))
+        del rows
+        yield pa.record_batch(
+            [_to_arrow(values[i], types[name]) for i, name in enumerate(columns)],
+            names=columns,
+        )
+        del values
+
+
+def fetch_frame(cursor, dtypes=None, batch_size=100_000):
+    """
+    Fetch the pending result of `cursor` into a DataFrame with typed columns
+    (float64 coordinates, int64 ids/seq, datetime64 timestamps), converting
+    batch by batch instead of materializing all rows as tuples first.
+    """
+    columns = list(cursor.column_names)
+    batches = list(iter_batches(cursor, dtypes, batch_size))
+
+    if not batches:
+        return pd.DataFrame(columns=columns)
+
+    # Unify the batches (a column that was all NULL in one batch has type null)
+    schema = pa.unify_schemas([batch.schema for batch in batches], promote_options="permissive")
+    table = pa.Table.from_batches([batch.cast(schema) for batch in batches], schema=schema)
+    del batches
+    return table.to_pandas(split_blocks=True, self_destruct=True)
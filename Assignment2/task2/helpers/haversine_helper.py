@@ -1,6 +1,9 @@
-
 from math import radians, sin, cos, sqrt, atan2
 
+# The vectorized versions (haversine_np, point_steps, trip_distances) live in
+# Assignment2/trajectory_utils.py, shared with the preprocessing scripts
+
+
 def haversine(lat1, lon1, lat2, lon2):
     """Compute Haversine distance (km) between two lat/lon coordinates."""
     R = 6371.0
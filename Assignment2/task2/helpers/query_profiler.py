@@ -0,0 +1,208 @@
+
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# Session counters recorded per query. Bytes_sent is what the server sent
+# to us, i.e. the bytes fetched by the query.
+STATUS_VARS = (
+    "Bytes_sent",
+    "Created_tmp_tables",
+    "Created_tmp_disk_tables",
+    "Handler_read_first",
+    "Handler_read_key",
+    "Handler_read_last",
+    "Handler_read_next",
+    "Handler_read_prev",
+    "Handler_read_rnd",
+    "Handler_read_rnd_next",
+    "Sort_merge_passes",
+    "Sort_rows",
+)
+
+EXPLAINABLE = ("select", "with")
+
+
+class QueryProfiler:
+    """
+    Collects one record per executed query (wall time, rows, bytes fetched,
+    session status deltas and optionally EXPLAIN ANALYZE) from cursors
+    wrapped with wrap(), and writes them to a JSON and CSV report.
+    """
+
+    def __init__(self, explain=False):
+        self.explain = explain
+        self.records = []
+        self._lock = threading.Lock()
+
+    def wrap(self, cursor, cnx, task=""):
+        return ProfiledCursor(cursor, cnx, self, task)
+
+    def add(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def write_report(self, out_dir, run_name=None):
+        """Write the records to <out_dir>/<run_name>.json and .csv and return both paths."""
+        os.makedirs(out_dir, exist_ok=True)
+        run_name = run_name or datetime.now().strftime("run-%Y%m%d-%H%M%S")
+        json_path = os.path.join(out_dir, f"{run_name}.json")
+        csv_path = os.path.join(out_dir, f"{run_name}.csv")
+
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"run": run_name, "queries": self.records}, f, indent=2, default=str)
+
+        columns = ["task", "query_hash", "query", "started_at", "wall_s", "rows", "bytes_fetched", "status"]
+        columns += list(STATUS_VARS)
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+            writer.writeheader()
+            for record in self.records:
+                writer.writerow({**record, **record.get("status_delta", {})})
+
+        print(f"Query profile written to {json_path} and {csv_path} ({len(self.records)} queries).")
+        return json_path, csv_path
+
+
+class ProfiledCursor:
+    """
+    Cursor proxy that times every execute() until its results are consumed.
+    Session status is read on the same connection before the query and after
+    the result set has been fetched (when the next query runs or the cursor
+    is closed), so an unread result is never interrupted.
+    """
+
+    def __init__(self, cursor, cnx, profiler, task):
+        self._cursor = cursor
+        self._cnx = cnx
+        self._profiler = profiler
+        self._task = task
+        self._current = None
+        self._overhead = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    # ------------------------------------------------------------
+    # Session status
+    # ------------------------------------------------------------
+    def _status(self):
+        cursor = self._cnx.cursor(buffered=True)
+        try:
+            placeholders = ",".join(["%s"] * len(STATUS_VARS))
+            cursor.execute(
+                "SELECT VARIABLE_NAME, VARIABLE_VALUE FROM performance_schema.session_status "
+                f"WHERE VARIABLE_NAME IN ({placeholders})",
+                STATUS_VARS,
+            )
+            return {name: int(value) for name, value in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+    def _snapshot_overhead(self):
+        """Counters added by reading the status itself, measured once per connection."""
+        first = self._status()
+        second = self._status()
+        return {name: second.get(name, 0) - first.get(name, 0) for name in first}
+
+    # ------------------------------------------------------------
+    # Query lifecycle
+    # ------------------------------------------------------------
+    def execute(self, operation, params=None, multi=False):
+        self._finish()
+        if multi:
+            # Multi-statement scripts return a generator of results; not profiled
+            return self._cursor.execute(operation, params, multi=True)
+
+        if self._overhead is None:
+            self._overhead = self._snapshot_overhead()
+        query = " ".join(str(operation).split())
+        self._current = {
+            "task": self._task,
+            "query_hash": hashlib.sha1(query.encode("utf-8")).hexdigest()[:12],
+            "query": query[:300],
+            "full_query": query,
+            "params": params,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": 0,
+            "status": "ok",
+            "_before": self._status(),
+            "_start": time.perf_counter(),
+        }
+        try:
+            result = self._cursor.execute(operation, params)
+        except Exception as e:
+            self._current["status"] = f"error: {e}"
+            self._current["_end"] = time.perf_counter()
+            self._finish()
+            raise
+        self._current["_end"] = time.perf_counter()
+        return result
+
+    def _count(self, rows):
+        if self._current is not None:
+            self._current["rows"] += rows
+            self._current["_end"] = time.perf_counter()
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        self._count(1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, size=1):
+        rows = self._cursor.fetchmany(size)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count(len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._count(1)
+            yield row
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    def _finish(self):
+        record, self._current = self._current, None
+        if record is None:
+            return
+
+        before = record.pop("_before")
+        record["wall_s"] = round(record.pop("_end") - record.pop("_start"), 4)
+        full_query = record.pop("full_query")
+        params = record.pop("params")
+        if record["rows"] == 0 and self._cursor.rowcount and self._cursor.rowcount > 0:
+            record["rows"] = self._cursor.rowcount  # affected rows of DML statements
+
+        try:
+            after = self._status()
+            record["status_delta"] = {
+                name: after.get(name, 0) - before.get(name, 0) - self._overhead.get(name, 0)
+                for name in STATUS_VARS
+            }
+            record["bytes_fetched"] = record["status_delta"]["Bytes_sent"]
+            if self._profiler.explain and full_query.lower().startswith(EXPLAINABLE):
+                record["explain_analyze"] = self._explain_analyze(full_query, params)
+        except Exception as e:
+            # Profiling must never break the task itself
+            record["profile_error"] = str(e)
+
+        self._profiler.add(record)
+
+    def _explain_analyze(self, query, params):
+        cursor = self._cnx.cursor(buffered=True)
+        try:
+            cursor.execute("EXPLAIN ANALYZE " + query, params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+        finally:
+            cursor.close()
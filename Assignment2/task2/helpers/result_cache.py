@@ -0,0 +1,190 @@
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import pandas as pd
+import pyarrow.parquet as pq
+from helpers.arrow_fetch import fetch_frame, iter_batches
+from helpers.result_export import ParquetSink, stream_batches
+
+
+class ResultCache:
+    """
+    On-disk cache of query results as Parquet files.
+
+    The key is a hash of the SQL text and a data version of every table the
+    query reads (see data_version()), so a result is reused until Trip,
+    Point or a staged table changes. Files are evicted least recently used
+    first once the cache grows beyond max_bytes.
+    """
+
+    TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+`?([A-Za-z_][A-Za-z0-9_]*)`?", re.IGNORECASE)
+    CTE_PATTERN = re.compile(r"(?:\bWITH|,)\s*([A-Za-z_][A-Za-z0-9_]*)\s+AS\s*\(", re.IGNORECASE)
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # ------------------------------------------------------------
+    # Data versions
+    # ------------------------------------------------------------
+    @staticmethod
+    def schema_tables(cursor):
+        """(name, creation time, last update time) of every table in the database, by lower-case name."""
+        # information_schema caches UPDATE_TIME for a day unless told otherwise
+        cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+        cursor.execute(
+            "SELECT TABLE_NAME, CREATE_TIME, UPDATE_TIME FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE()"
+        )
+        return {name.lower(): (name, str(created), str(updated)) for name, created, updated in cursor.fetchall()}
+
+    def referenced_tables(self, query, schema):
+        """Database tables (not CTEs) after FROM/JOIN in the query, as listed in `schema`."""
+        ctes = {name.lower() for name in self.CTE_PATTERN.findall(query)}
+        names = {name.lower() for name in self.TABLE_PATTERN.findall(query)} - ctes
+        return sorted(schema[name] for name in names if name in schema)
+
+    @staticmethod
+    def data_version(tables, schema, cursor):
+        """
+        The state of each table, read without scanning it: its creation and
+        last update time, the LoadCheckpoint shards the loader committed for
+        it (these change with every load, --reload-month included) and, for
+        staged tables, their stage_fingerprint. UPDATE_TIME also catches rows
+        edited by hand, but is empty again after a server restart.
+        """
+        loads, stages = {}, {}
+        if "loadcheckpoint" in schema:
+            cursor.execute(
+                "SELECT SUBSTRING_INDEX(source, ':', 1), COUNT(*), SUM(rows_inserted), MAX(committed_at) "
+                "FROM LoadCheckpoint GROUP BY SUBSTRING_INDEX(source, ':', 1)"
+            )
+            loads = {row[0].lower(): [str(value) for value in row[1:]] for row in cursor.fetchall()}
+        if "stage_fingerprint" in schema:
+            cursor.execute("SELECT stage_name, fingerprint, built_at FROM stage_fingerprint")
+            stages = {name.lower(): [fingerprint, str(built)] for name, fingerprint, built in cursor.fetchall()}
+
+        return {
+            table: [created, updated, loads.get(table.lower()), stages.get(table.lower())]
+            for table, created, updated in tables
+        }
+
+    def key(self, query, cursor, params=None):
+        schema = self.schema_tables(cursor)
+        version = self.data_version(self.referenced_tables(query, schema), schema, cursor)
+        digest = hashlib.sha1()
+        digest.update(" ".join(query.split()).encode("utf-8"))
+        digest.update(json.dumps(version, sort_keys=True).encode("utf-8"))
+        if params:
+            digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    # ------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def get(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except Exception as e:
+            print(f"Ignoring unreadable cache file {path}: {e}")
+            return None
+        os.utime(path)  # mark as recently used
+        return df
+
+    def put(self, key, df):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Result not cached ({e}).")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used files until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".parquet"):
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                    entries.append((stat.st_mtime, stat.st_size, name))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+
+    def batches(self, query, cursor, label="", params=None):
+        """
+        Yield the result of `query` as Arrow record batches, read from the
+        cached Parquet file or streamed from the cursor while the cache file
+        is written alongside. The full result is never held in memory.
+        """
+        key = self.key(query, cursor, params)
+        path = self._path(key)
+
+        if os.path.exists(path):
+            os.utime(path)  # mark as recently used
+            print(f"Cache hit for {label or key[:12]}.")
+            yield from pq.ParquetFile(path).iter_batches()
+            return
+
+        start = time.time()
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        sink = ParquetSink(tmp_path)
+        rows = 0
+        cursor.execute(query, params)
+        try:
+            for batch in iter_batches(cursor):
+                sink.write(batch)
+                rows += batch.num_rows
+                yield batch
+        except BaseException:
+            # Also reached when the consumer stops early (GeneratorExit)
+            sink.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        sink.close()
+        if os.path.exists(tmp_path):
+            os.replace(tmp_path, path)
+            self.evict()
+        print(f"Executed {label} in {time.time() - start:.2f}s, cached {rows:,} rows.")
+
+    def export(self, query, cursor, sinks, label="", preview_rows=20, params=None):
+        """Stream the (cached) result of `query` into `sinks`; see result_export.stream_batches."""
+        return stream_batches(self.batches(query, cursor, label, params), sinks, preview_rows)
+
+    def fetch(self, query, cursor, label="", params=None):
+        """Return the cached result of `query` or run it and cache the result."""
+        key = self.key(query, cursor, params)
+        df = self.get(key)
+        if df is not None:
+            print(f"Cache hit for {label or key[:12]} ({len(df):,} rows).")
+            return df
+
+        start = time.time()
+        cursor.execute(query, params)
+        df = fetch_frame(cursor)
+        print(f"Executed {label} in {time.time() - start:.2f}s, cached {len(df):,} rows.")
+        self.put(key, df)
+        return df
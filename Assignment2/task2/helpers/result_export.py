@@ -0,0 +1,75 @@
+
+import os
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pandas as pd
+
+
+class CsvSink:
+    """Appends record batches to a CSV file (same formatting as DataFrame.to_csv)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def write(self, batch):
+        if self._file is None:
+            self._file = open(self.path, "w", newline="", encoding="utf-8")
+            batch.to_pandas().to_csv(self._file, index=False)
+        else:
+            batch.to_pandas().to_csv(self._file, index=False, header=False)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class ParquetSink:
+    """Writes record batches to a Parquet file, one row group per batch."""
+
+    def __init__(self, path):
+        self.path = path
+        self._writer = None
+
+    def write(self, batch):
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, batch.schema)
+        elif batch.schema != self._writer.schema:
+            batch = batch.cast(self._writer.schema)
+        self._writer.write_batch(batch)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_sink(path):
+    """CSV or Parquet sink, chosen from the file extension."""
+    if os.path.splitext(path)[1].lower() == ".parquet":
+        return ParquetSink(path)
+    return CsvSink(path)
+
+
+def stream_batches(batches, sinks, preview_rows=20):
+    """
+    Write every batch to all sinks without keeping them, and return the total
+    number of rows and a DataFrame with the first `preview_rows` rows.
+    Files are only created once the first batch arrives.
+    """
+    rows = 0
+    preview = []
+    try:
+        for batch in batches:
+            for sink in sinks:
+                sink.write(batch)
+            if rows < preview_rows:
+                preview.append(batch.slice(0, preview_rows - rows))
+            rows += batch.num_rows
+    finally:
+        for sink in sinks:
+            sink.close()
+
+    if not preview:
+        return rows, pd.DataFrame()
+    tables = [pa.Table.from_batches([batch]) for batch in preview]
+    return rows, pa.concat_tables(tables, promote_options="permissive").to_pandas()
@@ -2,30 +2,59 @@
 import pandas as pd
 import os
 from tabulate import tabulate
+from helpers.arrow_fetch import fetch_frame, iter_batches
+from helpers.result_export import open_sink, stream_batches
 
 class SQLRunner:
-    def __init__(self, cursor, sql_folder="sql_tasks"):
+    def __init__(self, cursor, sql_folder="sql_tasks", cache=None):
         self.cursor = cursor
         self.sql_folder = sql_folder
+        self.cache = cache
 
-    def run_sql(self, filename):
+    def read_sql(self, filename):
         filepath = os.path.join(self.sql_folder, filename)
-
         with open(filepath, "r", encoding="utf-8") as f:
-            query = f.read().strip()
+            return f.read().strip()
+
+    def fetch_df(self, filename, params=None):
+        """Run a SQL file and return the result as a DataFrame (from the result cache when enabled)."""
+        query = self.read_sql(filename)
+
+        if self.cache is not None:
+            return self.cache.fetch(query, self.cursor, label=filename, params=params)
+
+        self.cursor.execute(query, params)
+        return fetch_frame(self.cursor)
 
+    def batches(self, filename, params=None):
+        """Yield the result of a SQL file as typed Arrow record batches (through the result cache when enabled)."""
+        query = self.read_sql(filename)
+
+        if self.cache is not None:
+            yield from self.cache.batches(query, self.cursor, label=filename, params=params)
+            return
+
+        self.cursor.execute(query, params)
+        yield from iter_batches(self.cursor)
+
+    def export(self, filename, output_file, preview_rows=20, params=None):
+        """
+        Stream the result of a SQL file into output_file (.csv or .parquet)
+        batch by batch. Returns the row count and a preview of the first rows.
+        `params` fills %(name)s placeholders in the SQL.
+        """
+        return stream_batches(self.batches(filename, params), [open_sink(output_file)], preview_rows)
+
+    def run_sql(self, filename):
         try:
-            self.cursor.execute(query)
-            rows = self.cursor.fetchall()
-            columns = self.cursor.column_names
+            df = self.fetch_df(filename)
 
-            if not rows:
+            if df.empty:
                 print("No results returned.")
                 return pd.DataFrame()
 
-            df = pd.DataFrame(rows, columns=columns)
             print(tabulate(df, headers="keys", tablefmt="fancy_grid", showindex=False))
             return df
         except Exception as e:
             print(f"Error running {filename}: {e}")
-            return pd.DataFrame()
+            raise
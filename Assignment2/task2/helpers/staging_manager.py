@@ -0,0 +1,131 @@
+
+import hashlib
+import json
+import os
+import time
+
+
+class StagedTable:
+    """A derived table built from a SQL script over some source tables."""
+
+    def __init__(self, name, sql_file, source_tables):
+        self.name = name
+        self.sql_file = sql_file
+        self.source_tables = source_tables
+
+
+# Helpers list the stages they read in a `requires` class attribute
+STAGES = {
+    "trip_times_stage": StagedTable(
+        "trip_times_stage", "create_temp_trip_times.sql", source_tables=["Trip", "Point"]
+    ),
+    # Also built by 04-insert_to_db.py right after loading
+    "taxi_day_rollup": StagedTable(
+        "taxi_day_rollup", "create_taxi_day_rollup.sql", source_tables=["Trip", "Point"]
+    ),
+}
+
+# Built instead with --storage trajectory, where there is no Point table
+TRAJECTORY_STAGES = {
+    "trip_times_stage": StagedTable(
+        "trip_times_stage", "create_temp_trip_times_trajectory.sql", source_tables=["Trip", "TripTrajectory"]
+    ),
+}
+
+
+class StagingManager:
+    """
+    Builds staged tables once and rebuilds them only when the base data
+    changes. A fingerprint of the source tables' row counts (plus the
+    build script) is stored in `stage_fingerprint` next to each stage.
+    With storage="trajectory" the TRAJECTORY_STAGES variants are built.
+    """
+
+    def __init__(self, cursor, db, sql_folder="sql_tasks", storage="points"):
+        self.cursor = cursor
+        self.db = db
+        self.sql_folder = sql_folder
+        self.storage = storage
+        self._checked = set()
+
+    def stage(self, name):
+        if self.storage == "trajectory" and name in TRAJECTORY_STAGES:
+            return TRAJECTORY_STAGES[name]
+        return STAGES[name]
+
+    def _read_script(self, filename):
+        with open(os.path.join(self.sql_folder, filename), "r", encoding="utf-8") as f:
+            return f.read()
+
+    @staticmethod
+    def _split_statements(script):
+        lines = [line for line in script.splitlines() if not line.strip().startswith("--")]
+        return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+    def _ensure_fingerprint_table(self):
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stage_fingerprint (
+                stage_name VARCHAR(64) PRIMARY KEY,
+                fingerprint CHAR(40),
+                row_counts JSON,
+                built_at DATETIME
+            );
+        """)
+
+    def _table_exists(self, table):
+        self.cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,),
+        )
+        return self.cursor.fetchone()[0] > 0
+
+    def fingerprint(self, stage):
+        """Row counts of the source tables plus a hash of the build script."""
+        counts = {}
+        for table in stage.source_tables:
+            self.cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = int(self.cursor.fetchone()[0])
+
+        digest = hashlib.sha1()
+        digest.update(json.dumps(counts, sort_keys=True).encode("utf-8"))
+        digest.update(self._read_script(stage.sql_file).encode("utf-8"))
+        return digest.hexdigest(), counts
+
+    def _stored_fingerprint(self, name):
+        self.cursor.execute("SELECT fingerprint FROM stage_fingerprint WHERE stage_name = %s", (name,))
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+
+    def build(self, stage, fingerprint, counts):
+        print(f"Building staged table {stage.name} from {stage.sql_file}...")
+        start = time.time()
+        for statement in self._split_statements(self._read_script(stage.sql_file)):
+            self.cursor.execute(statement)
+
+        self.cursor.execute(
+            "REPLACE INTO stage_fingerprint (stage_name, fingerprint, row_counts, built_at) "
+            "VALUES (%s, %s, %s, NOW())",
+            (stage.name, fingerprint, json.dumps(counts)),
+        )
+        self.db.commit()
+        print(f"{stage.name} ready in {time.time() - start:.1f}s.")
+
+    def ensure(self, name, force=False):
+        """Make sure the staged table `name` exists and matches the current base data."""
+        if name in self._checked and not force:
+            return
+        stage = self.stage(name)
+        self._ensure_fingerprint_table()
+
+        fingerprint, counts = self.fingerprint(stage)
+        if force or not self._table_exists(stage.name) or self._stored_fingerprint(stage.name) != fingerprint:
+            self.build(stage, fingerprint, counts)
+        else:
+            print(f"{stage.name} is up to date (source rows: {counts}).")
+        self._checked.add(name)
+
+    def ensure_for(self, helper):
+        """Build every stage a helper declares in its `requires` attribute."""
+        for name in getattr(helper, "requires", ()):
+            self.ensure(name)
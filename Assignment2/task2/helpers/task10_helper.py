@@ -1,48 +1,79 @@
 
-import os
+import time
+import numpy as np
 import pandas as pd
 from tabulate import tabulate
+from helpers.sql_runner import SQLRunner
+from trajectory_utils import haversine_np
+from helpers.trajectory_store import add_endpoints, decode_frame
+
+ENDPOINT_COLUMNS = ("start_latitude", "start_longitude", "end_latitude", "end_longitude")
 
 
 class Task10Helper:
-    def __init__(self, cursor, sql_folder="sql_tasks"):
+    def __init__(self, cursor, sql_folder="sql_tasks", max_distance_km=0.05, cache=None, output_format="csv",
+                 storage="points"):
         self.cursor = cursor
         self.sql_folder = sql_folder
+        self.sql = SQLRunner(cursor, sql_folder, cache)
+        self.max_distance_km = max_distance_km
+        self.output_format = output_format
+        self.storage = storage
+
+
+    def find_circular_trips(self, endpoints):
+        """Keep trips whose end point lies within max_distance_km of the start point."""
+        coords = endpoints[list(ENDPOINT_COLUMNS)].to_numpy(dtype=np.float64)
+        distance_km = np.round(haversine_np(coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3]), 3)
 
+        mask = distance_km <= self.max_distance_km
+        df = endpoints.loc[mask].copy()
+        df["distance_km"] = distance_km[mask]
+        return df.sort_values("distance_km", kind="stable").reset_index(drop=True)
 
-    def _run_sql_file(self, filename):
-        filepath = os.path.join(self.sql_folder, filename)
+
+    def _stream_circular_trips(self, filename):
+        """Apply the circular-trip test batch by batch; only the (few) matching trips are kept."""
         print(f"\n===== Running {filename} =====")
+        matches, trips = [], 0
 
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                query = f.read().strip()
-            self.cursor.execute(query)
-            rows = self.cursor.fetchall()
-            columns = self.cursor.column_names
+            for batch in self.sql.batches(filename):
+                trips += batch.num_rows
+                endpoints = batch.to_pandas()
+                if "points" in endpoints.columns:
+                    endpoints = add_endpoints(*decode_frame(endpoints), names=ENDPOINT_COLUMNS)
+                circular = self.find_circular_trips(endpoints)
+                if not circular.empty:
+                    matches.append(circular)
         except Exception as e:
             print(f"Error running {filename}: {e}")
-            return pd.DataFrame()
-
-        if not rows:
-            print("No results returned.")
-            return pd.DataFrame()
+            raise
 
-        df = pd.DataFrame(rows, columns=columns)
-        return df
+        if not matches:
+            return trips, pd.DataFrame()
+        df = pd.concat(matches, ignore_index=True)
+        return trips, df.sort_values("distance_km", kind="stable").reset_index(drop=True)
 
 
     def run_task10(self):
         print("\n--- TASK 10: CIRCULAR TRIPS ---")
 
-        df = self._run_sql_file("task10_circular_trips.sql")
+        start = time.time()
+        filename = ("task10_trip_endpoints_trajectory.sql" if self.storage == "trajectory"
+                    else "task10_trip_endpoints.sql")
+        trips, df = self._stream_circular_trips(filename)
+        print(f"Checked endpoints of {trips:,} trips in {time.time() - start:.2f}s")
 
         if df.empty:
             print("No circular trips found.")
             return
 
-        output_file = "task10_circular_trips.csv"
-        df.to_csv(output_file, index=False)
+        output_file = f"task10_circular_trips.{self.output_format}"
+        if self.output_format == "parquet":
+            df.to_parquet(output_file, index=False)
+        else:
+            df.to_csv(output_file, index=False)
         print(f"Saved results to {output_file} ({len(df)} rows).")
 
         print("\nFirst 20 Circular Trips:")
@@ -1,55 +1,65 @@
 
-import os
-import pandas as pd
 from tabulate import tabulate
+from helpers.sql_runner import SQLRunner
 
 
 class Task11Helper:
-    def __init__(self, cursor, sql_folder="sql_tasks"):
+    requires = ["trip_times_stage"]
+
+    def __init__(self, cursor, sql_folder="sql_tasks", cache=None, output_format="csv", window=None,
+                 rollup=False):
         self.cursor = cursor
         self.sql_folder = sql_folder
+        self.sql = SQLRunner(cursor, sql_folder, cache)
+        self.output_format = output_format
+        self.window = window
+        # A --since/--until window needs the per-trip times of trip_times_stage
+        self.rollup = rollup and not window
+
+    @staticmethod
+    def requires_for(rollup=False, window=None):
+        return ["taxi_day_rollup"] if rollup and not window else Task11Helper.requires
 
 
-    def _run_sql_file(self, filename):
-        filepath = os.path.join(self.sql_folder, filename)
+    def _export_sql_file(self, filename, output_file, params=None):
+        """Stream the query result into output_file; returns (row count, preview of the first 20 rows)."""
         print(f"\n===== Running {filename} =====")
 
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                query = f.read().strip()
-            self.cursor.execute(query)
-            rows = self.cursor.fetchall()
-            columns = self.cursor.column_names
+            rows, preview = self.sql.export(filename, output_file, params=params)
         except Exception as e:
             print(f"Error running {filename}: {e}")
-            return pd.DataFrame()
+            raise
 
-        if not rows:
+        if rows == 0:
             print("No results returned.")
-            return pd.DataFrame()
-
-        return pd.DataFrame(rows, columns=columns)
+        return rows, preview
 
 
     def run_task11(self):
         print("\n--- TASK 11: AVERAGE IDLE TIME PER TAXI ---")
 
-        df = self._run_sql_file("task11_avg_idle_time.sql")
+        # Save full results
+        output_file = f"task11_avg_idle_time.{self.output_format}"
+        if self.rollup:
+            filename = "task11_avg_idle_time_rollup.sql"
+        elif self.window:
+            filename = "task11_avg_idle_time_window.sql"
+        else:
+            filename = "task11_avg_idle_time.sql"
+        rows, preview = self._export_sql_file(filename, output_file, params=self.window)
 
-        if df.empty:
+        if rows == 0:
             print("No results found.")
             return
 
-        # Save full results
-        output_file = "task11_avg_idle_time.csv"
-        df.to_csv(output_file, index=False)
-        print(f"Saved results to {output_file} ({len(df)} rows).")
+        print(f"Saved results to {output_file} ({rows} rows).")
 
         # Print top 20
         print("\nTop 20 Taxis with Highest Average Idle Time:")
         print(
             tabulate(
-                df.head(20),
+                preview,
                 headers="keys",
                 tablefmt="fancy_grid",
                 showindex=False,
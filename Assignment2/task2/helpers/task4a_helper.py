@@ -1,52 +1,48 @@
 
-import os
-import pandas as pd
 from tabulate import tabulate
+from helpers.sql_runner import SQLRunner
 
 
 class Task4AHelper:
-    def __init__(self, cursor, sql_folder="sql_tasks"):
+    def __init__(self, cursor, sql_folder="sql_tasks", cache=None, output_format="csv", rollup=False):
         self.cursor = cursor
         self.sql_folder = sql_folder
+        self.sql = SQLRunner(cursor, sql_folder, cache)
+        self.output_format = output_format
+        self.rollup = rollup
 
-    def _run_sql_file(self, filename):
-        filepath = os.path.join(self.sql_folder, filename)
+    def _export_sql_file(self, filename, output_file):
+        """Stream the query result into output_file; returns (row count, preview of the first 20 rows)."""
         print(f"\n===== Running {filename} =====")
 
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                query = f.read().strip()
-            self.cursor.execute(query)
-            rows = self.cursor.fetchall()
-            columns = self.cursor.column_names
+            rows, preview = self.sql.export(filename, output_file)
         except Exception as e:
             print(f"Error running {filename}: {e}")
-            return pd.DataFrame()
+            raise
 
-        if not rows:
+        if rows == 0:
             print("No results returned.")
-            return pd.DataFrame()
-
-        return pd.DataFrame(rows, columns=columns)
+        return rows, preview
 
     def run_task4a(self):
         """Run Task 4a and save results."""
         print("\n--- TASK 4a: MOST USED CALL TYPE PER TAXI ---")
 
-        df = self._run_sql_file("task4a_calltype_per_taxi.sql")
+        output_file = f"task4a_most_used_calltype.{self.output_format}"
+        filename = "task4a_calltype_per_taxi_rollup.sql" if self.rollup else "task4a_calltype_per_taxi.sql"
+        rows, preview = self._export_sql_file(filename, output_file)
 
-        if df.empty:
+        if rows == 0:
             print("No data available.")
             return
 
-        output_file = "task4a_most_used_calltype.csv"
-        df.to_csv(output_file, index=False)
-        print(f"Saved results to {output_file} ({len(df)} rows).")
+        print(f"Saved results to {output_file} ({rows} rows).")
 
         print("\nTop 20 Taxis by Trip Count:")
         print(
             tabulate(
-                df.head(20),
+                preview,
                 headers="keys",
                 tablefmt="fancy_grid",
                 showindex=False,
@@ -3,15 +3,19 @@ import os
 import time
 import pandas as pd
 from tabulate import tabulate
-from helpers.haversine_helper import haversine
+from helpers.arrow_fetch import iter_batches
+from trajectory_utils import point_steps, trip_distances
+from helpers.trajectory_store import iter_trajectories
 
 
 class Task4BHelper:
-    def __init__(self, cursor, sql_folder="sql_tasks"):
+    def __init__(self, cursor, sql_folder="sql_tasks", storage="points", window=None):
         self.cursor = cursor
         self.sql_folder = sql_folder
+        self.storage = storage
+        self.window = window
 
-    def _run_sql_file(self, filename, silent=False):
+    def _run_sql_file(self, filename, silent=False, params=None):
         path = os.path.join(self.sql_folder, filename)
         if not os.path.exists(path):
             raise FileNotFoundError(f"Missing SQL file: {path}")
@@ -22,7 +26,7 @@ class Task4BHelper:
         if not silent:
             print(f"\n===== Running {filename} =====")
 
-        self.cursor.execute(query)
+        self.cursor.execute(query, params)
         rows = self.cursor.fetchall()
         if not rows:
             print("No results returned.")
@@ -41,42 +45,69 @@ class Task4BHelper:
 
         self.cursor.execute(query)
 
-        prev_trip, prev_point, prev_call = None, None, None
-        trip_distances = {}
+        # Per call type: summed step distances and number of trips. Rows arrive
+        # ordered by call_type, trip_id, seq; the last row of each batch is
+        # carried over so a trip split across two batches stays connected.
+        total_km, trip_count = {}, {}
+        carry = None
         processed = 0
         last_log = time.time()
 
-        for (call_type, trip_id, seq, lat, lon) in self.cursor:
-            processed += 1
-            trip_id = str(trip_id)
-
-            if trip_id != prev_trip:
-                prev_trip, prev_point, prev_call = trip_id, (lat, lon), call_type
-                if trip_id not in trip_distances:
-                    trip_distances[trip_id] = {"call_type": call_type, "dist": 0.0}
-                continue
-
-            dist = haversine(prev_point[0], prev_point[1], lat, lon)
-            trip_distances[trip_id]["dist"] += dist
-            prev_point = (lat, lon)
-
-            if processed % 500000 == 0 or (time.time() - last_log) > 10:
+        for batch in iter_batches(self.cursor):
+            frame = batch.to_pandas()
+            processed += len(frame)
+            if carry is not None:
+                frame = pd.concat([carry, frame], ignore_index=True)
+
+            steps = point_steps(frame["latitude"], frame["longitude"], frame["trip_id"])
+            new_trip = frame["trip_id"].ne(frame["trip_id"].shift())
+            if carry is not None:
+                new_trip.iloc[0] = False  # already counted in the previous batch
+
+            per_call = pd.DataFrame({"call_type": frame["call_type"], "km": steps, "new_trip": new_trip})
+            per_call = per_call.groupby("call_type").sum()
+            for call_type, row in per_call.iterrows():
+                total_km[call_type] = total_km.get(call_type, 0.0) + row["km"]
+                trip_count[call_type] = trip_count.get(call_type, 0) + int(row["new_trip"])
+
+            carry = frame.iloc[[-1]]
+            if processed % 500000 < len(batch) or (time.time() - last_log) > 10:
                 print(f"Processed {processed:,} GPS points...")
                 last_log = time.time()
 
         print(f"Finished processing {processed:,} points.")
+        return self._distance_table(total_km, trip_count)
 
-        # Aggregate per call_type
-        agg = {}
-        for _, info in trip_distances.items():
-            agg.setdefault(info["call_type"], []).append(info["dist"])
+    def _compute_avg_distance_trajectory(self):
+        print("\n===== Computing Average Trip Distance (TripTrajectory) =====")
+        qpath = os.path.join(self.sql_folder, "task4b3_distance_trajectory.sql")
+        with open(qpath, "r", encoding="utf-8") as f:
+            query = f.read().strip()
+
+        self.cursor.execute(query)
 
-        if not agg:
+        # One row per trip, so every batch holds whole trips
+        total_km, trip_count = {}, {}
+        processed = 0
+        for frame, lat, lon, offsets in iter_trajectories(iter_batches(self.cursor, batch_size=20_000)):
+            per_call = pd.DataFrame({"call_type": frame["call_type"], "km": trip_distances(lat, lon, offsets)})
+            per_call = per_call.groupby("call_type")["km"].agg(["sum", "count"])
+            for call_type, row in per_call.iterrows():
+                total_km[call_type] = total_km.get(call_type, 0.0) + row["sum"]
+                trip_count[call_type] = trip_count.get(call_type, 0) + int(row["count"])
+            processed += len(frame)
+
+        print(f"Finished processing {processed:,} trajectories.")
+        return self._distance_table(total_km, trip_count)
+
+    @staticmethod
+    def _distance_table(total_km, trip_count):
+        if not trip_count:
             print("No distances computed.")
             return pd.DataFrame(columns=["call_type", "avg_distance_km"])
 
         df = pd.DataFrame(
-            [(ct, round(sum(v) / len(v), 3)) for ct, v in agg.items()],
+            [(ct, round(total_km[ct] / trip_count[ct], 3)) for ct in trip_count],
             columns=["call_type", "avg_distance_km"]
         )
         print(tabulate(df, headers="keys", tablefmt="fancy_grid", showindex=False))
@@ -86,9 +117,18 @@ class Task4BHelper:
     def run_task4b(self):
         print("\n--- TASK 4b ---")
 
-        dur_df = self._run_sql_file("task4b1_avg_duration.sql")
-        time_df = self._run_sql_file("task4b2_time_bands.sql")
-        dist_df = self._compute_avg_distance()
+        if self.storage == "trajectory":
+            dur_df = self._run_sql_file("task4b1_avg_duration_trajectory.sql")
+        else:
+            dur_df = self._run_sql_file("task4b1_avg_duration.sql")
+        if self.window:
+            time_df = self._run_sql_file("task4b2_time_bands_window.sql", params=self.window)
+        else:
+            time_df = self._run_sql_file("task4b2_time_bands.sql")
+        if self.storage == "trajectory":
+            dist_df = self._compute_avg_distance_trajectory()
+        else:
+            dist_df = self._compute_avg_distance()
 
         print("\n===== Combined Summary Table for Task 4b =====")
 
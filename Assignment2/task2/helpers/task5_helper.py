@@ -3,14 +3,18 @@ import os
 import time
 import pandas as pd
 from tabulate import tabulate
-from helpers.haversine_helper import haversine
+from trajectory_utils import haversine_np
+from helpers.arrow_fetch import fetch_frame, iter_batches
+from helpers.trajectory_store import add_endpoints, iter_trajectories
 
 
 class Task5Helper:
-    def __init__(self, cursor, db, sql_folder="sql_tasks"):
+    def __init__(self, cursor, db, sql_folder="sql_tasks", storage="points", rollup=False):
         self.cursor = cursor
         self.db = db
         self.sql_folder = sql_folder
+        self.storage = storage
+        self.rollup = rollup
 
     def _run_sql(self, filename):
         path = os.path.join(self.sql_folder, filename)
@@ -20,55 +24,91 @@ class Task5Helper:
 
         start = time.time()
         self.cursor.execute(query)
-        rows = self.cursor.fetchall()
-        cols = self.cursor.column_names
+        df = fetch_frame(self.cursor)
         print(f"Executed in {time.time() - start:.2f}s")
-        return pd.DataFrame(rows, columns=cols)
+        return df
 
-    def run_task5(self, chunk_size=10000):
-        print("\n--- TASK 5: Total Hours & Distance per Taxi ---")
-        df = self._run_sql("task5_taxi_hours_distance.sql")
-
-        if df.empty:
-            print("No data to process.")
-            return
+    def _run_sql_trajectory(self, filename):
+        """Same columns as _run_sql, with the endpoints decoded from the TripTrajectory blobs."""
+        path = os.path.join(self.sql_folder, filename)
+        print(f"Running SQL file: {filename}")
+        with open(path, "r", encoding="utf-8") as f:
+            query = f.read().strip()
 
+        start = time.time()
+        self.cursor.execute(query)
+        frames = [add_endpoints(frame, lat, lon, offsets)
+                  for frame, lat, lon, offsets in iter_trajectories(iter_batches(self.cursor, batch_size=20_000))]
+        print(f"Executed and decoded in {time.time() - start:.2f}s")
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def prepare_trips(df):
+        """Cast the raw SQL result to datetimes and floats."""
+        df = df.copy()
         df["start_time"] = pd.to_datetime(df["start_time"])
         df["end_time"] = pd.to_datetime(df["end_time"])
         df[["start_lat", "start_lon", "end_lat", "end_lon"]] = df[
             ["start_lat", "start_lon", "end_lat", "end_lon"]
         ].astype(float)
+        return df
+
+    @staticmethod
+    def taxi_totals(df):
+        """Total hours and start→end distance per taxi in one grouped pass."""
+        totals = (
+            df.assign(
+                hours=(df["end_time"] - df["start_time"]).dt.total_seconds() / 3600,
+                km=haversine_np(
+                    df["start_lat"].to_numpy(), df["start_lon"].to_numpy(),
+                    df["end_lat"].to_numpy(), df["end_lon"].to_numpy(),
+                ),
+            )
+            .groupby("taxi_id", sort=False)[["hours", "km"]].sum().round(2)
+            .rename(columns={"hours": "total_hours", "km": "total_distance_km"})
+            .reset_index()
+        )
+        return totals.sort_values("total_hours", ascending=False)
+
+    def run_task5(self):
+        print("\n--- TASK 5: Total Hours & Distance per Taxi ---")
+        if self.rollup:
+            # taxi_day_rollup already holds the per-trip hours and distances summed per day
+            result_df = self._run_sql("task5_taxi_hours_distance_rollup.sql")
+            if result_df.empty:
+                print("No data to process.")
+                return
+            result_df[["total_hours", "total_distance_km"]] = result_df[
+                ["total_hours", "total_distance_km"]
+            ].astype(float)
+        else:
+            result_df = self._taxi_totals_from_trips()
+            if result_df is None:
+                return
 
-        print(f"Loaded {len(df):,} trips. Computing metrics...\n")
-
-        results = []
-        taxis = df["taxi_id"].unique()
-        total_taxis = len(taxis)
-        start_time = time.time()
-
-        for i, taxi_id in enumerate(taxis, start=1):
-            tdf = df[df["taxi_id"] == taxi_id]
-            total_hours = ((tdf["end_time"] - tdf["start_time"]).dt.total_seconds() / 3600).sum()
-
-            tdf["distance_km"] = [
-                haversine(row.start_lat, row.start_lon, row.end_lat, row.end_lon)
-                for row in tdf.itertuples(index=False)
-            ]
-            total_distance = tdf["distance_km"].sum()
-
-            results.append({
-                "taxi_id": taxi_id,
-                "total_hours": round(total_hours, 2),
-                "total_distance_km": round(total_distance, 2)
-            })
-
-            if i % chunk_size == 0 or i == total_taxis:
-                elapsed = time.time() - start_time
-                print(f"Processed {i}/{total_taxis} taxis ({(i/total_taxis)*100:.1f}%) | {elapsed/60:.1f} min")
-
-        result_df = pd.DataFrame(results).sort_values("total_hours", ascending=False)
         result_df.to_csv("task5_taxi_hours_distance.csv", index=False)
 
         print("\nTop 20 taxis (by total hours):")
         print(tabulate(result_df.head(20), headers="keys", tablefmt="fancy_grid", showindex=False))
         print(f"\nSaved results → task5_taxi_hours_distance.csv ({len(result_df)} rows)")
+
+    def _taxi_totals_from_trips(self):
+        """Load one row per trip and total them per taxi in pandas; None when there are no trips."""
+        if self.storage == "trajectory":
+            df = self._run_sql_trajectory("task5_taxi_hours_distance_trajectory.sql")
+        else:
+            df = self._run_sql("task5_taxi_hours_distance.sql")
+
+        if df.empty:
+            print("No data to process.")
+            return None
+
+        df = self.prepare_trips(df)
+        print(f"Loaded {len(df):,} trips. Computing metrics...\n")
+
+        start = time.time()
+        result_df = self.taxi_totals(df)
+        print(f"Aggregated {len(result_df):,} taxis in {time.time() - start:.2f}s")
+        return result_df
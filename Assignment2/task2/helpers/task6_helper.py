@@ -3,6 +3,7 @@ import os
 import pandas as pd
 from tabulate import tabulate
 from helpers.haversine_helper import haversine
+from helpers.arrow_fetch import fetch_frame
 
 class Task6Helper:
     def __init__(self, cursor, sql_folder="sql_tasks"):
@@ -16,12 +17,11 @@ class Task6Helper:
         with open(filepath, "r", encoding="utf-8") as f:
             query = f.read().strip()
         self.cursor.execute(query)
-        rows = self.cursor.fetchall()
-        columns = self.cursor.column_names
-        if not rows:
+        df = fetch_frame(self.cursor, dtypes={"latitude": "float64", "longitude": "float64"})
+        if df.empty:
             print("No results returned from SQL query.")
             return pd.DataFrame(columns=["trip_id", "latitude", "longitude"])
-        return pd.DataFrame(rows, columns=columns)
+        return df
 
     def _filter_within_100m(self, df):
         print("\n===== Filtering points within 100 m of City Hall =====")
@@ -6,13 +6,18 @@ import time
 import gc
 from tabulate import tabulate
 from helpers.haversine_helper import haversine
+from helpers.arrow_fetch import fetch_frame
+from helpers.trajectory_store import fetch_trip_points
 
 
 class Task8Helper:
-    def __init__(self, cursor, db, sql_folder="sql_tasks"):
+    requires = ["trip_times_stage"]
+
+    def __init__(self, cursor, db, sql_folder="sql_tasks", storage="points"):
         self.cursor = cursor
         self.db = db
         self.sql_folder = sql_folder
+        self.storage = storage
 
     # ------------------------------------------------------------
     # Run SQL safely (handles multi-statement scripts)
@@ -55,6 +60,8 @@ class Task8Helper:
     def _get_trip_points(self, trip_ids):
         if not trip_ids:
             return pd.DataFrame()
+        if self.storage == "trajectory":
+            return fetch_trip_points(self.cursor, trip_ids)
 
         placeholders = ",".join(["%s"] * len(trip_ids))
         query = f"""
@@ -63,8 +70,7 @@ class Task8Helper:
             WHERE trip_id IN ({placeholders});
         """
         self.cursor.execute(query, tuple(trip_ids))
-        rows = self.cursor.fetchall()
-        return pd.DataFrame(rows, columns=["trip_id", "seq", "lat", "lon"])
+        return fetch_frame(self.cursor, dtypes={"seq": "int64", "lat": "float64", "lon": "float64"})
 
     # ------------------------------------------------------------
     # Check proximity (≤5m & ≤5s) — chunked & progress printed
@@ -142,12 +148,7 @@ class Task8Helper:
     def run_task8(self, chunk_size=2000):
         print("\n--- TASK 8: Taxi Proximity Detection (≤5m & ≤5s) ---")
 
-        # Create the staging table for trip start/end times
-        print("Creating staging table trip_times_stage...")
-      #  self._run_sql("create_temp_trip_times.sql", fetch=False)
-       # self.db.commit()
-        print("trip_times_stage table ready.")
-
+        # trip_times_stage is built by the runner's StagingManager (see `requires`)
         # Get all overlapping trip pairs
         print("Fetching overlapping trip pairs...")
         self.cursor.execute(open(os.path.join(self.sql_folder, "get_overlapping_trip_pairs.sql")).read())
@@ -1,51 +1,48 @@
 
-import os
-import pandas as pd
 from tabulate import tabulate
+from helpers.sql_runner import SQLRunner
 
 
 class Task9Helper:
-    def __init__(self, cursor, sql_folder="sql_tasks"):
+    requires = ["trip_times_stage"]
+
+    def __init__(self, cursor, sql_folder="sql_tasks", cache=None, output_format="csv", window=None):
         self.cursor = cursor
         self.sql_folder = sql_folder
+        self.sql = SQLRunner(cursor, sql_folder, cache)
+        self.output_format = output_format
+        self.window = window
 
 
-    def _run_sql_file(self, filename):
-        filepath = os.path.join(self.sql_folder, filename)
+    def _export_sql_file(self, filename, output_file, params=None):
+        """Stream the query result into output_file; returns (row count, preview of the first 20 rows)."""
         print(f"\n===== Running {filename} =====")
 
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                query = f.read().strip()
-            self.cursor.execute(query)
-            rows = self.cursor.fetchall()
-            columns = self.cursor.column_names
+            rows, preview = self.sql.export(filename, output_file, params=params)
         except Exception as e:
             print(f"Error running {filename}: {e}")
-            return pd.DataFrame()
+            raise
 
-        if not rows:
+        if rows == 0:
             print("No results returned.")
-            return pd.DataFrame()
-
-        df = pd.DataFrame(rows, columns=columns)
-        return df
+        return rows, preview
 
 
     def run_task9(self):
         print("\n--- TASK 9: MIDNIGHT CROSSERS ---")
 
-        df = self._run_sql_file("task9_midnight_crossers.sql")
+        output_file = f"task9_midnight_crossers.{self.output_format}"
+        filename = "task9_midnight_crossers_window.sql" if self.window else "task9_midnight_crossers.sql"
+        rows, preview = self._export_sql_file(filename, output_file, params=self.window)
 
-        if df.empty:
+        if rows == 0:
             print("No midnight crossers found.")
             return
 
-        output_file = "task9_midnight_crossers.csv"
-        df.to_csv(output_file, index=False)
-        print(f"💾 Saved results to {output_file} ({len(df)} rows).")
+        print(f"💾 Saved results to {output_file} ({rows} rows).")
 
         print("\nTop 20 Midnight Crossers:")
-        print(tabulate(df.head(20), headers="keys", tablefmt="fancy_grid", showindex=False))
+        print(tabulate(preview, headers="keys", tablefmt="fancy_grid", showindex=False))
 
         print("\nTask 9 completed successfully.")
@@ -0,0 +1,159 @@
+
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from tabulate import tabulate
+
+
+class ScheduledTask:
+    """A runnable unit of work: `run(cursor, db)` plus the names of the tasks it depends on."""
+
+    def __init__(self, name, run, requires=(), description=""):
+        self.name = name
+        self.run = run
+        self.requires = tuple(requires)
+        self.description = description
+
+
+class _ThreadOutput(io.TextIOBase):
+    """stdout proxy that collects each worker thread's prints in its own buffer."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class TaskScheduler:
+    """
+    Runs tasks and their dependencies, starting every task as soon as the
+    tasks it requires have finished. Independent tasks run concurrently,
+    each on its own connection from the DbConnector pool. With a
+    QueryProfiler, every task's cursor is wrapped so each query is profiled.
+    """
+
+    def __init__(self, tasks, connection, jobs=4, profiler=None):
+        self.tasks = {task.name: task for task in tasks}
+        self.connection = connection
+        self.jobs = max(1, jobs)
+        self.profiler = profiler
+        self._print_lock = threading.Lock()
+
+    def resolve(self, names):
+        """Selected tasks plus everything they depend on, in dependency order."""
+        ordered, visiting, done = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name not in self.tasks:
+                raise KeyError(f"Unknown task: {name}")
+            if name in visiting:
+                raise ValueError(f"Dependency cycle at task {name}")
+            visiting.add(name)
+            for dep in self.tasks[name].requires:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            ordered.append(name)
+
+        for name in names:
+            visit(name)
+        return ordered
+
+    def _run_one(self, task, output, t0):
+        record = {"task": task.name, "start_s": time.time() - t0, "status": "ok"}
+        if output is not None:
+            output.local.buffer = io.StringIO()
+
+        try:
+            with self.connection.pooled_connection() as cnx:
+                cursor = cnx.cursor()
+                if self.profiler is not None:
+                    cursor = self.profiler.wrap(cursor, cnx, task.name)
+                try:
+                    task.run(cursor, cnx)
+                    cnx.commit()
+                finally:
+                    cursor.close()
+        except Exception as e:
+            record["status"] = f"failed: {e}"
+            print(f"ERROR in {task.name}: {e}")
+        finally:
+            record["end_s"] = time.time() - t0
+            if output is not None:
+                text = output.local.buffer.getvalue()
+                output.local.buffer = None
+                with self._print_lock:
+                    output.stream.write(f"\n==== {task.name} ====\n{text}")
+                    output.stream.flush()
+        return record
+
+    def run(self, names):
+        order = self.resolve(names)
+        pending = {name: set(self.tasks[name].requires) for name in order}
+        records, failed = [], set()
+
+        output = _ThreadOutput(sys.stdout) if self.jobs > 1 else None
+        original_stdout = sys.stdout
+        if output is not None:
+            sys.stdout = output
+
+        t0 = time.time()
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                running = {}
+                while pending or running:
+                    for name in [n for n in order if n in pending]:
+                        if pending[name] & failed:
+                            del pending[name]
+                            failed.add(name)
+                            records.append({"task": name, "start_s": None, "end_s": None,
+                                            "status": "skipped (dependency failed)"})
+                        elif not pending[name]:
+                            del pending[name]
+                            future = executor.submit(self._run_one, self.tasks[name], output, t0)
+                            running[future] = name
+
+                    if not running:
+                        break
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        name = running.pop(future)
+                        record = future.result()
+                        records.append(record)
+                        if record["status"] != "ok":
+                            failed.add(name)
+                            continue
+                        for deps in pending.values():
+                            deps.discard(name)
+        finally:
+            sys.stdout = original_stdout
+
+        self.print_timeline(records, time.time() - t0)
+        return records
+
+    @staticmethod
+    def print_timeline(records, total_s, width=40):
+        print("\n===== Task timeline (wall clock) =====")
+        rows = []
+        for r in sorted(records, key=lambda r: (r["start_s"] is None, r["start_s"] or 0)):
+            if r["start_s"] is None:
+                rows.append([r["task"], "-", "-", "-", "", r["status"]])
+                continue
+            begin = int(r["start_s"] / total_s * width) if total_s else 0
+            end = max(begin + 1, int(r["end_s"] / total_s * width)) if total_s else 1
+            bar = " " * begin + "█" * (end - begin)
+            rows.append([r["task"], f"{r['start_s']:.1f}", f"{r['end_s']:.1f}",
+                         f"{r['end_s'] - r['start_s']:.1f}", bar.ljust(width), r["status"]])
+        print(tabulate(rows, headers=["task", "start (s)", "end (s)", "duration (s)", "timeline", "status"],
+                       tablefmt="fancy_grid"))
+        print(f"Total wall time: {total_s:.1f}s")
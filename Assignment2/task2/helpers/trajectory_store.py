@@ -0,0 +1,60 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from helpers.arrow_fetch import iter_batches
+
+# The codec lives in Assignment2/trajectory_codec.py, shared with the loader
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from trajectory_codec import decode_trips, endpoints
+
+# Task helpers accept storage="points" (one Point row per GPS point) or
+# storage="trajectory" (TripTrajectory, loaded with 04-insert_to_db.py --storage)
+STORAGE_MODES = ("points", "trajectory")
+
+
+def decode_frame(frame, column="points"):
+    """Split the blob column off `frame`; returns (frame without it, lat, lon, offsets)."""
+    blobs = frame.pop(column).tolist()
+    lat, lon, offsets = decode_trips(blobs)
+    return frame, lat, lon, offsets
+
+
+def iter_trajectories(batches, column="points"):
+    """Decode Arrow record batches with a blob column into (frame, lat, lon, offsets) per batch."""
+    for batch in batches:
+        yield decode_frame(batch.to_pandas(), column)
+
+
+def add_endpoints(frame, lat, lon, offsets, names=("start_lat", "start_lon", "end_lat", "end_lon")):
+    """The first and last point of every trip as four new columns."""
+    for name, values in zip(names, endpoints(lat, lon, offsets)):
+        frame[name] = values
+    return frame
+
+
+def fetch_trip_points(cursor, trip_ids):
+    """Points of the given trips as (trip_id, seq, lat, lon) rows, like a Point query."""
+    trip_ids = list(trip_ids)
+    if not trip_ids:
+        return pd.DataFrame(columns=["trip_id", "seq", "lat", "lon"])
+
+    placeholders = ",".join(["%s"] * len(trip_ids))
+    cursor.execute(f"SELECT trip_id, points FROM TripTrajectory WHERE trip_id IN ({placeholders})",
+                   tuple(trip_ids))
+
+    frames = []
+    for frame, lat, lon, offsets in iter_trajectories(iter_batches(cursor)):
+        counts = np.diff(offsets)
+        frames.append(pd.DataFrame({
+            "trip_id": np.repeat(frame["trip_id"].to_numpy(), counts),
+            "seq": np.arange(len(lat)) - np.repeat(offsets[:-1], counts),
+            "lat": lat,
+            "lon": lon,
+        }))
+    if not frames:
+        return pd.DataFrame(columns=["trip_id", "seq", "lat", "lon"])
+    return pd.concat(frames, ignore_index=True)
@@ -1,13 +1,25 @@
 # ------------------------------------------------------------
 # TDT4225 - Assignment 2, Part 2
+#
+#   python run_tasks.py --list              # show available tasks
+#   python run_tasks.py task2 task9         # run selected tasks
+#   python run_tasks.py --all --jobs 4      # run everything, 4 at a time
+#   python run_tasks.py task9 --since 2013-12-01 --until 2014-01-01
+#   python run_tasks.py task2 task5 --no-rollup   # aggregate Trip/Point directly
 # ------------------------------------------------------------
+import argparse
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from tabulate import tabulate
 from DbConnector import DbConnector
+from helpers.query_profiler import QueryProfiler
+from helpers.result_cache import ResultCache
 from helpers.sql_runner import SQLRunner
+from helpers.staging_manager import STAGES, StagingManager
+from helpers.task_scheduler import ScheduledTask, TaskScheduler
 from helpers.task4a_helper import Task4AHelper
 from helpers.task4b_helper import Task4BHelper
 from helpers.task5_helper import Task5Helper
@@ -15,81 +27,203 @@ from helpers.task6_helper import Task6Helper
 from helpers.task8_helper import Task8Helper
 from helpers.task9_helper import Task9Helper
 from helpers.task10_helper import Task10Helper
+from helpers.task11_helper import Task11Helper
+from helpers.trajectory_store import STORAGE_MODES
+
+SQL_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql_tasks")
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "results")
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+
+
+def build_registry(sql_folder=SQL_FOLDER, cache=None, output_format="csv", storage="points", window=None,
+                   rollup=True):
+    """
+    All runnable tasks. Each task is called as run(cursor, db) on its own
+    pooled connection. Plain SQL tasks and the 4a/9/10/11 helpers read
+    through `cache` (a ResultCache) when one is given, and the helpers
+    that save results stream them to `output_format` ("csv" or "parquet").
+    Tasks 4b, 5, 8 and 10 and trip_times_stage read the GPS points from
+    `storage`: the Point table ("points") or TripTrajectory ("trajectory"). With a `window`
+    ({"since": ..., "until": ...}), tasks 4b (time bands), 9 and 11 only
+    look at trips starting in [since, until). With `rollup` and
+    storage="points", tasks 2, 3, 4a, 5 and 11 (without a window) aggregate
+    the per-taxi daily table taxi_day_rollup instead of Trip and Point.
+    """
+
+    def sql_task(filename):
+        return lambda cursor, db: SQLRunner(cursor, sql_folder, cache).run_sql(filename)
+
+    # The rollup is built from Point, which a TripTrajectory-only database does not have
+    rollup = rollup and storage == "points"
+
+    def rollup_sql(filename):
+        return filename.replace(".sql", "_rollup.sql") if rollup else filename
+
+    rollup_requires = ["taxi_day_rollup"] if rollup else []
+
+    def stage_task(name):
+        return lambda cursor, db: StagingManager(cursor, db, sql_folder, storage=storage).ensure(name)
+
+    tasks = [
+        ScheduledTask(name, stage_task(name), description=f"Build staged table {name}")
+        for name in STAGES
+    ]
+    tasks += [
+        ScheduledTask("task1", sql_task("task1_counts.sql"),
+                      description="Number of taxis, trips and GPS points"),
+        ScheduledTask("task2", sql_task(rollup_sql("task2_avg_trips.sql")),
+                      requires=rollup_requires, description="Average number of trips per taxi"),
+        ScheduledTask("task3", sql_task(rollup_sql("task3_top20_taxis.sql")),
+                      requires=rollup_requires, description="Top 20 taxis by number of trips"),
+        ScheduledTask("task4a",
+                      lambda cursor, db: Task4AHelper(
+                          cursor, sql_folder, cache=cache, output_format=output_format, rollup=rollup
+                      ).run_task4a(),
+                      requires=rollup_requires, description="Most used call type per taxi"),
+        ScheduledTask("task4b", lambda cursor, db: Task4BHelper(
+                          cursor, sql_folder, storage=storage, window=window
+                      ).run_task4b(),
+                      description="Duration, time bands and distance per call type"),
+        ScheduledTask("task5",
+                      lambda cursor, db: Task5Helper(
+                          cursor, db, sql_folder, storage=storage, rollup=rollup
+                      ).run_task5(),
+                      requires=rollup_requires,
+                      description="Total hours and distance per taxi"),
+        ScheduledTask("task6", lambda cursor, db: Task6Helper(cursor, sql_folder).run_task6(),
+                      description="Trips passing within 100 m of City Hall"),
+        ScheduledTask("task7", sql_task("task7_invalid_trips.sql"),
+                      description="Number of invalid trips (< 3 points)"),
+        ScheduledTask("task8", lambda cursor, db: Task8Helper(cursor, db, sql_folder, storage=storage).run_task8(chunk_size=5000),
+                      requires=Task8Helper.requires, description="Taxi pairs within 5 m and 5 s"),
+        ScheduledTask("task9",
+                      lambda cursor, db: Task9Helper(
+                          cursor, sql_folder, cache=cache, output_format=output_format, window=window
+                      ).run_task9(),
+                      requires=Task9Helper.requires, description="Trips crossing midnight"),
+        ScheduledTask("task10",
+                      lambda cursor, db: Task10Helper(
+                          cursor, sql_folder, cache=cache, output_format=output_format, storage=storage
+                      ).run_task10(),
+                      description="Circular trips (end within 50 m of start)"),
+        ScheduledTask("task11",
+                      lambda cursor, db: Task11Helper(
+                          cursor, sql_folder, cache=cache, output_format=output_format, window=window,
+                          rollup=rollup
+                      ).run_task11(),
+                      requires=Task11Helper.requires_for(rollup, window),
+                      description="Average idle time per taxi"),
+    ]
+    return tasks
 
 
 class TaskRunner:
-    def __init__(self, sql_folder="sql_tasks"):
+    def __init__(self, sql_folder=SQL_FOLDER, jobs=4, cache=None, profiler=None, output_format="csv",
+                 storage="points", window=None, rollup=True):
         self.sql_folder = sql_folder
-        self.connection = DbConnector()
-        self.db = self.connection.db_connection
-        self.cursor = self.connection.cursor
-        self.runner = SQLRunner(self.cursor, sql_folder)
+        self.connection = DbConnector(POOL_SIZE=jobs)
+        self.registry = build_registry(sql_folder, cache, output_format, storage, window, rollup)
+        self.profiler = profiler
+        self.scheduler = TaskScheduler(self.registry, self.connection, jobs=jobs, profiler=profiler)
 
-    def run_all(self):
+    def run(self, names):
+        """Run the tasks; returns True when every task (and its dependencies) finished with status "ok"."""
         print("\n=== Starting Assignment 2: Part 2 Tasks ===")
+        records = self.scheduler.run(names)
+        if all(r["status"] == "ok" for r in records):
+            print("\n=== All tasks executed successfully ===")
+            return True
+        print("\n=== Some tasks did not complete, see the timeline above ===")
+        return False
 
-        # Task 1
-        print("\n==== Running Task 1 ====")
-        #self.runner.run_sql("task1_counts.sql")
-
-        # Task 2
-        print("\n==== Running Task 2 ====")
-        self.runner.run_sql("task2_avg_trips.sql")
-
-        # Task 3
-        print("\n==== Running Task 3 ====")
-        #self.runner.run_sql("task3_top20_taxis.sql")
-
-        # Task 4a
-        print("\n==== Running Task 4a ====")
-        #task4a = Task4AHelper(self.runner.cursor)
-        #task4a.run_task4a()
-
-        # Task 4b
-        print("\n==== Running Task 4b ====")
-        #task4b = Task4BHelper(self.cursor, self.sql_folder)
-        #task4b.run_task4b()
-
-        # Task 5
-        print("\n==== Running Task 5 ====")
-        #task5 = Task5Helper(self.cursor, self.db, self.sql_folder)
-        #task5.run_task5(chunk_size=50)
-
-
-        # Task 6
-        print("\n==== Running Task 6 ====")
-        #task6 = Task6Helper(self.runner.cursor)
-        #task6.run_task6()
-
-        # Task 7
-        print("\n==== Running Task 7 ====")
-        #self.runner.run_sql("task7_invalid_trips.sql")
+    def write_profile(self, out_dir=PROFILE_DIR):
+        if self.profiler is not None:
+            self.profiler.write_report(out_dir)
 
-        # Task 8
-        print("\n==== Running Task 8 ====")
-        #task8 = Task8Helper(self.runner.cursor, self.db)
-        #task8.run_task8(chunk_size=5000)
-
-        # Task 9
-        print("\n==== Running Task 9 ====")
-        #task9 = Task9Helper(self.db.cursor(), self.sql_folder)
-        #task9.run_task9()
-
-        # Task 10
-        print("\n==== Running Task 10 ====")
-        #task10 = Task10Helper(self.db.cursor)
-        #task10.run_task10()
-
-
-
-        print("\n=== All tasks executed successfully ===")
+    def run_all(self):
+        return self.run([task.name for task in self.registry if task.name.startswith("task")])
 
     def close(self):
         self.connection.close_connection()
         print("Database connection closed.")
 
 
+# mysql-connector refuses to create a pool with more connections than this
+MAX_JOBS = 32
+
+
+def job_count(text):
+    """--jobs value: an integer from 1 to MAX_JOBS, one pooled connection per job."""
+    try:
+        jobs = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer {text!r}")
+    if not 1 <= jobs <= MAX_JOBS:
+        raise argparse.ArgumentTypeError(
+            f"must be between 1 and {MAX_JOBS} (one pooled connection per job), got {jobs}")
+    return jobs
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the Assignment 2 Part 2 tasks.")
+    parser.add_argument("tasks", nargs="*",
+                        help="Tasks to run, e.g. task2 task9 (dependencies are added automatically)")
+    parser.add_argument("--all", action="store_true", help="Run every task")
+    parser.add_argument("--jobs", type=job_count, default=4,
+                        help=f"Number of tasks to run concurrently, 1-{MAX_JOBS} (default: 4)")
+    parser.add_argument("--list", action="store_true", help="List the available tasks and exit")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always run the queries instead of reusing cached results")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Directory for cached query results")
+    parser.add_argument("--cache-size-mb", type=int, default=512,
+                        help="Size limit of the result cache; least recently used results are evicted")
+    parser.add_argument("--export-format", choices=["csv", "parquet"], default="csv",
+                        help="File format of the saved results of tasks 4a, 9, 10 and 11")
+    parser.add_argument("--storage", choices=STORAGE_MODES, default="points",
+                        help="Where tasks 4b, 5, 8 and 10 read GPS points from: the Point table or "
+                             "TripTrajectory (04-insert_to_db.py --storage trajectory)")
+    parser.add_argument("--since", metavar="YYYY-MM-DD",
+                        help="Tasks 4b (time bands), 9 and 11: only trips starting on or after this date")
+    parser.add_argument("--until", metavar="YYYY-MM-DD",
+                        help="Tasks 4b (time bands), 9 and 11: only trips starting before this date; "
+                             "on a month-partitioned Trip the other months are not read")
+    parser.add_argument("--no-rollup", action="store_true",
+                        help="Tasks 2, 3, 4a, 5 and 11 aggregate Trip/Point directly instead of taxi_day_rollup")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile every query and write a JSON/CSV report to --profile-dir")
+    parser.add_argument("--explain", action="store_true",
+                        help="With --profile, also record EXPLAIN ANALYZE (runs each SELECT twice)")
+    parser.add_argument("--profile-dir", default=PROFILE_DIR, help="Directory for query profile reports")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    runner = TaskRunner()
-    runner.run_all()
-    runner.close()
+    args = parse_args()
+    registry = build_registry()
+
+    if args.list or not (args.tasks or args.all):
+        print(tabulate([[t.name, ", ".join(t.requires), t.description] for t in registry],
+                       headers=["task", "requires", "description"], tablefmt="fancy_grid"))
+        sys.exit(0)
+
+    unknown = [name for name in args.tasks if name not in {t.name for t in registry}]
+    if unknown:
+        sys.exit(f"Unknown task(s): {', '.join(unknown)}. Use --list to see the available tasks.")
+
+    cache = None if args.no_cache else ResultCache(args.cache_dir, args.cache_size_mb * 1024 * 1024)
+    profiler = QueryProfiler(explain=args.explain) if args.profile or args.explain else None
+    window = None
+    if args.since or args.until:
+        window = {"since": args.since or "1000-01-01", "until": args.until or "9999-12-31"}
+    runner = TaskRunner(jobs=args.jobs, cache=cache, profiler=profiler, output_format=args.export_format,
+                        storage=args.storage, window=window, rollup=not args.no_rollup)
+    try:
+        if args.all:
+            ok = runner.run_all()
+        else:
+            ok = runner.run(args.tasks)
+        runner.write_profile(args.profile_dir)
+    finally:
+        runner.close()
+    # Non-zero exit so callers (e.g. the benchmarks) see failed tasks
+    sys.exit(0 if ok else 1)
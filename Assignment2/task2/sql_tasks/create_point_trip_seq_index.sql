@@ -0,0 +1,15 @@
+-- ------------------------------------------------------------
+-- Unique (trip_id, seq) index used to find the first/last point of a
+-- trip (Task 5). It also makes INSERT IGNORE skip points that are loaded
+-- twice, which would otherwise be counted twice. New databases get it
+-- from 04-insert_to_db.py; run this once on databases loaded before the
+-- index was added, or with the earlier non-unique index (first run
+-- ALTER TABLE Point DROP INDEX idx_point_trip_seq; in that case).
+-- Duplicate points are deleted first, keeping the lowest point_id.
+-- On the month-partitioned layout the index is (trip_id, seq, trip_month).
+-- ------------------------------------------------------------
+
+DELETE p FROM Point p
+JOIN Point q ON q.trip_id = p.trip_id AND q.seq = p.seq AND q.point_id < p.point_id;
+
+CREATE UNIQUE INDEX idx_point_trip_seq ON Point (trip_id, seq);
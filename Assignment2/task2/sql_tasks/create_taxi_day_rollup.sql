@@ -0,0 +1,92 @@
+-- ------------------------------------------------------------
+-- Per-taxi daily rollup of Trip and Point
+-- One row per taxi and day (~450 taxis x 365 days) that tasks 2, 3,
+-- 4a, 5 and 11 aggregate instead of the trips and their points.
+-- Built by 04-insert_to_db.py after loading and, like trip_times_stage,
+-- rebuilt by StagingManager when the Trip/Point row counts change.
+--
+--   trips, trips_a/b/c        trips started that day (per call type)
+--   trips_with_points         those of them with GPS points (task 5)
+--   active_seconds            last seq * 15 s per trip, as in task 5
+--   distance_km               start-to-end haversine per trip, as in task 5
+--   idle_seconds, intervals   gaps under 6 h from a trip's end to the
+--                             taxi's next start, as in task 11, counted
+--                             on the day of the earlier trip
+-- ------------------------------------------------------------
+
+DROP TABLE IF EXISTS taxi_day_rollup;
+
+CREATE TABLE taxi_day_rollup (
+    taxi_id INT NOT NULL,
+    day DATE NOT NULL,
+    trips INT NOT NULL,
+    trips_a INT NOT NULL,
+    trips_b INT NOT NULL,
+    trips_c INT NOT NULL,
+    trips_with_points INT NOT NULL,
+    active_seconds BIGINT NOT NULL,
+    distance_km DOUBLE NOT NULL,
+    idle_seconds BIGINT NOT NULL,
+    idle_intervals INT NOT NULL,
+    PRIMARY KEY (taxi_id, day)
+);
+
+INSERT INTO taxi_day_rollup
+WITH trip_bounds AS (
+    SELECT
+        trip_id,
+        MIN(seq) AS first_seq,
+        MAX(seq) AS last_seq
+    FROM Point
+    GROUP BY trip_id
+),
+trip_stats AS (
+    SELECT
+        t.taxi_id,
+        t.call_type,
+        t.timestamp AS start_time,
+        b.trip_id IS NOT NULL AS has_points,
+        COALESCE(b.last_seq * 15, 0) AS active_seconds,
+        6371 * 2 * ASIN(
+            SQRT(
+                POWER(SIN(RADIANS(pe.latitude - ps.latitude) / 2), 2) +
+                COS(RADIANS(ps.latitude)) * COS(RADIANS(pe.latitude)) *
+                POWER(SIN(RADIANS(pe.longitude - ps.longitude) / 2), 2)
+            )
+        ) AS distance_km
+    FROM Trip AS t
+    LEFT JOIN trip_bounds AS b ON b.trip_id = t.trip_id
+    LEFT JOIN Point AS ps ON ps.trip_id = b.trip_id AND ps.seq = b.first_seq
+    LEFT JOIN Point AS pe ON pe.trip_id = b.trip_id AND pe.seq = b.last_seq
+),
+with_next AS (
+    -- Trips without points have no end time and are left out of the idle
+    -- gaps, as they are left out of trip_times_stage
+    SELECT
+        *,
+        DATE_ADD(start_time, INTERVAL active_seconds SECOND) AS end_time,
+        LEAD(start_time) OVER (PARTITION BY taxi_id, has_points ORDER BY start_time) AS next_start
+    FROM trip_stats
+),
+gaps AS (
+    SELECT
+        *,
+        has_points
+            AND next_start > end_time
+            AND TIMESTAMPDIFF(HOUR, end_time, next_start) < 6 AS is_idle
+    FROM with_next
+)
+SELECT
+    taxi_id,
+    DATE(start_time) AS day,
+    COUNT(*) AS trips,
+    SUM(call_type = 'A') AS trips_a,
+    SUM(call_type = 'B') AS trips_b,
+    SUM(call_type = 'C') AS trips_c,
+    SUM(has_points) AS trips_with_points,
+    SUM(active_seconds) AS active_seconds,
+    COALESCE(SUM(distance_km), 0) AS distance_km,
+    COALESCE(SUM(IF(is_idle, TIMESTAMPDIFF(SECOND, end_time, next_start), 0)), 0) AS idle_seconds,
+    COALESCE(SUM(is_idle), 0) AS idle_intervals
+FROM gaps
+GROUP BY taxi_id, DATE(start_time);
@@ -1,15 +1,23 @@
 -- ------------------------------------------------------------
 -- Create a reusable staging table for trip times
+-- Built by StagingManager (helpers/staging_manager.py) and only
+-- rebuilt when the Trip/Point row counts change.
 -- ------------------------------------------------------------
 
 DROP TABLE IF EXISTS trip_times_stage;
 
-CREATE TABLE trip_times_stage AS
+CREATE TABLE trip_times_stage (
+    PRIMARY KEY (trip_id),
+    INDEX idx_stage_taxi_start (taxi_id, start_time)
+) AS
 SELECT
     t.trip_id,
     t.taxi_id,
     t.timestamp AS start_time,
-    TIMESTAMPADD(SECOND, (MAX(p.seq) * 15), t.timestamp) AS end_time
+    TIMESTAMPADD(SECOND, (b.max_seq * 15), t.timestamp) AS end_time
 FROM Trip t
-JOIN Point p ON t.trip_id = p.trip_id
-GROUP BY t.trip_id, t.taxi_id, t.timestamp;
+JOIN (
+    SELECT trip_id, MAX(seq) AS max_seq
+    FROM Point
+    GROUP BY trip_id
+) AS b ON b.trip_id = t.trip_id;
@@ -0,0 +1,20 @@
+-- ------------------------------------------------------------
+-- trip_times_stage for --storage trajectory: the same table as
+-- create_temp_trip_times.sql, with the end time taken from the point
+-- count in TripTrajectory ((n_points - 1) * 15 s, i.e. MAX(seq) * 15).
+-- ------------------------------------------------------------
+
+DROP TABLE IF EXISTS trip_times_stage;
+
+CREATE TABLE trip_times_stage (
+    PRIMARY KEY (trip_id),
+    INDEX idx_stage_taxi_start (taxi_id, start_time)
+) AS
+SELECT
+    t.trip_id,
+    t.taxi_id,
+    t.timestamp AS start_time,
+    TIMESTAMPADD(SECOND, ((tt.n_points - 1) * 15), t.timestamp) AS end_time
+FROM Trip t
+JOIN TripTrajectory tt ON tt.trip_id = t.trip_id
+WHERE tt.n_points > 0;
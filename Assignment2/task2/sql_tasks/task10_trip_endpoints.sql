@@ -0,0 +1,23 @@
+
+-- Start and end point of every trip in one pass: MIN/MAX(seq) per trip
+-- from the (trip_id, seq) index, then one lookup per endpoint.
+-- The 50 m circular-trip test is applied in Task10Helper.
+WITH trip_bounds AS (
+    SELECT
+        trip_id,
+        MIN(seq) AS first_seq,
+        MAX(seq) AS last_seq
+    FROM Point
+    GROUP BY trip_id
+)
+SELECT
+    t.trip_id,
+    t.taxi_id,
+    ps.latitude AS start_latitude,
+    ps.longitude AS start_longitude,
+    pe.latitude AS end_latitude,
+    pe.longitude AS end_longitude
+FROM Trip AS t
+JOIN trip_bounds AS b ON b.trip_id = t.trip_id
+JOIN Point AS ps ON ps.trip_id = b.trip_id AND ps.seq = b.first_seq
+JOIN Point AS pe ON pe.trip_id = b.trip_id AND pe.seq = b.last_seq;
@@ -0,0 +1,8 @@
+-- Task 10 with --storage trajectory: one row per trip; the start and end
+-- point are decoded from the blob in Task10Helper.
+SELECT
+    t.trip_id,
+    t.taxi_id,
+    tt.points
+FROM Trip AS t
+JOIN TripTrajectory AS tt ON tt.trip_id = t.trip_id;
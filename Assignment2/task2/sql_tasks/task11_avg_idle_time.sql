@@ -1,22 +1,13 @@
 
-WITH trip_end_times AS (
-    SELECT
-        t.trip_id,
-        t.taxi_id,
-        t.timestamp AS start_time,
-        DATE_ADD(t.timestamp, INTERVAL (MAX(p.seq) * 15) SECOND) AS end_time
-    FROM Trip t
-    JOIN Point p ON t.trip_id = p.trip_id
-    GROUP BY t.trip_id, t.taxi_id, t.timestamp
-),
-with_next AS (
+-- Reads trip start/end times from trip_times_stage (see StagingManager)
+WITH with_next AS (
     SELECT
         taxi_id,
         trip_id,
         start_time,
         end_time,
         LEAD(start_time) OVER (PARTITION BY taxi_id ORDER BY start_time) AS next_start
-    FROM trip_end_times
+    FROM trip_times_stage
 )
 SELECT
     taxi_id,
@@ -0,0 +1,13 @@
+-- Task 11 from taxi_day_rollup (see create_taxi_day_rollup.sql). Idle
+-- time is summed in seconds, so the averages are not truncated to whole
+-- minutes per gap as in task11_avg_idle_time.sql.
+SELECT
+    taxi_id,
+    ROUND(SUM(idle_seconds) / 60 / SUM(idle_intervals), 2) AS avg_idle_minutes,
+    ROUND(SUM(idle_seconds) / 60, 2) AS total_idle_minutes,
+    CAST(SUM(idle_intervals) AS SIGNED) AS idle_intervals
+FROM taxi_day_rollup
+GROUP BY taxi_id
+HAVING SUM(idle_intervals) > 0
+ORDER BY avg_idle_minutes DESC
+LIMIT 20;
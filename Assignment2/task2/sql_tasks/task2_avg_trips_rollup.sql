@@ -0,0 +1,4 @@
+-- Task 2 from taxi_day_rollup (see create_taxi_day_rollup.sql)
+SELECT
+    SUM(trips) / COUNT(DISTINCT taxi_id) AS avg_trips_per_taxi
+FROM taxi_day_rollup;
@@ -0,0 +1,8 @@
+-- Task 3 from taxi_day_rollup (see create_taxi_day_rollup.sql)
+SELECT
+    taxi_id,
+    CAST(SUM(trips) AS SIGNED) AS total_trips
+FROM taxi_day_rollup
+GROUP BY taxi_id
+ORDER BY total_trips DESC
+LIMIT 20;
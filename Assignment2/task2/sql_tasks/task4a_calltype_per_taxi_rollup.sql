@@ -0,0 +1,32 @@
+-- Task 4a from taxi_day_rollup (see create_taxi_day_rollup.sql)
+WITH per_taxi AS (
+    SELECT
+        taxi_id,
+        CAST(SUM(trips_a) AS SIGNED) AS trips_a,
+        CAST(SUM(trips_b) AS SIGNED) AS trips_b,
+        CAST(SUM(trips_c) AS SIGNED) AS trips_c
+    FROM taxi_day_rollup
+    GROUP BY taxi_id
+),
+call_counts AS (
+    SELECT taxi_id, 'A' AS call_type, trips_a AS trip_count FROM per_taxi WHERE trips_a > 0
+    UNION ALL
+    SELECT taxi_id, 'B' AS call_type, trips_b AS trip_count FROM per_taxi WHERE trips_b > 0
+    UNION ALL
+    SELECT taxi_id, 'C' AS call_type, trips_c AS trip_count FROM per_taxi WHERE trips_c > 0
+),
+ranked AS (
+    SELECT
+        taxi_id,
+        call_type,
+        trip_count,
+        RANK() OVER (PARTITION BY taxi_id ORDER BY trip_count DESC) AS rnk
+    FROM call_counts
+)
+SELECT
+    taxi_id,
+    call_type AS most_used_call_type,
+    trip_count
+FROM ranked
+WHERE rnk = 1
+ORDER BY trip_count DESC;
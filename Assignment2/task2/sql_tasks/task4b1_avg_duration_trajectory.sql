@@ -0,0 +1,9 @@
+-- Task 4b duration with --storage trajectory: a trip of n_points points
+-- lasts (n_points - 1) * 15 s, the MAX(seq) * 15 of task4b1_avg_duration.sql
+SELECT
+    t.call_type,
+    ROUND(AVG((tt.n_points - 1) * 15), 2) AS avg_duration_sec
+FROM Trip AS t
+JOIN TripTrajectory AS tt ON tt.trip_id = t.trip_id
+WHERE tt.n_points > 0
+GROUP BY t.call_type;
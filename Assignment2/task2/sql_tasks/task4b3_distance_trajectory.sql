@@ -0,0 +1,8 @@
+-- Task 4b distance with --storage trajectory: one row per trip with its
+-- compressed points (TripTrajectory), decoded in Task4BHelper.
+SELECT
+    t.call_type,
+    tt.points
+FROM Trip AS t
+JOIN TripTrajectory AS tt
+    ON tt.trip_id = t.trip_id;
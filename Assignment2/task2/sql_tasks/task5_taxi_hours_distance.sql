@@ -1,25 +1,26 @@
 
+-- First/last seq per trip come from the (trip_id, seq) index
+-- (loose index scan), and the two endpoint rows are then read with
+-- point lookups, so no per-trip strings are built in a temporary table.
 WITH trip_bounds AS (
     SELECT
-        t.trip_id,
-        t.taxi_id,
-        t.timestamp AS start_time,
-        DATE_ADD(t.timestamp, INTERVAL (MAX(p.seq) * 15) SECOND) AS end_time,
-        SUBSTRING_INDEX(
-            GROUP_CONCAT(p.latitude ORDER BY p.seq ASC SEPARATOR ','), ',', 1
-        ) AS start_lat,
-        SUBSTRING_INDEX(
-            GROUP_CONCAT(p.longitude ORDER BY p.seq ASC SEPARATOR ','), ',', 1
-        ) AS start_lon,
-        SUBSTRING_INDEX(
-            GROUP_CONCAT(p.latitude ORDER BY p.seq DESC SEPARATOR ','), ',', 1
-        ) AS end_lat,
-        SUBSTRING_INDEX(
-            GROUP_CONCAT(p.longitude ORDER BY p.seq DESC SEPARATOR ','), ',', 1
-        ) AS end_lon
-    FROM Trip AS t
-    JOIN Point AS p ON t.trip_id = p.trip_id
-    GROUP BY t.trip_id, t.taxi_id, t.timestamp
+        trip_id,
+        MIN(seq) AS first_seq,
+        MAX(seq) AS last_seq
+    FROM Point
+    GROUP BY trip_id
 )
-SELECT * FROM trip_bounds
-ORDER BY taxi_id, start_time;
+SELECT
+    t.trip_id,
+    t.taxi_id,
+    t.timestamp AS start_time,
+    DATE_ADD(t.timestamp, INTERVAL (b.last_seq * 15) SECOND) AS end_time,
+    ps.latitude AS start_lat,
+    ps.longitude AS start_lon,
+    pe.latitude AS end_lat,
+    pe.longitude AS end_lon
+FROM Trip AS t
+JOIN trip_bounds AS b ON b.trip_id = t.trip_id
+JOIN Point AS ps ON ps.trip_id = b.trip_id AND ps.seq = b.first_seq
+JOIN Point AS pe ON pe.trip_id = b.trip_id AND pe.seq = b.last_seq
+ORDER BY t.taxi_id, t.timestamp;
@@ -0,0 +1,11 @@
+-- Task 5 from taxi_day_rollup (see create_taxi_day_rollup.sql): the
+-- per-trip hours and start-to-end distances are already summed per day
+SELECT
+    taxi_id,
+    ROUND(SUM(active_seconds) / 3600, 2) AS total_hours,
+    ROUND(SUM(distance_km), 2) AS total_distance_km
+FROM taxi_day_rollup
+GROUP BY taxi_id
+-- Like the per-trip query, which joins Point: taxis without any points are left out
+HAVING SUM(trips_with_points) > 0
+ORDER BY total_hours DESC;
@@ -0,0 +1,12 @@
+-- Task 5 with --storage trajectory: the end time comes from the stored
+-- point count and the start/end coordinates are decoded from the blob
+-- in Task5Helper.
+SELECT
+    t.trip_id,
+    t.taxi_id,
+    t.timestamp AS start_time,
+    DATE_ADD(t.timestamp, INTERVAL ((tt.n_points - 1) * 15) SECOND) AS end_time,
+    tt.points
+FROM Trip AS t
+JOIN TripTrajectory AS tt ON tt.trip_id = t.trip_id
+ORDER BY t.taxi_id, t.timestamp;
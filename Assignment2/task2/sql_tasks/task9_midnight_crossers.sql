@@ -1,22 +1,11 @@
 
-WITH trip_durations AS (
-    SELECT
-        t.trip_id,
-        t.taxi_id,
-        t.timestamp AS start_time,
-        DATE(t.timestamp) AS start_date,
-        DATE_ADD(t.timestamp, INTERVAL (MAX(p.seq) - MIN(p.seq)) * 15 SECOND) AS end_time,
-        DATE(DATE_ADD(t.timestamp, INTERVAL (MAX(p.seq) - MIN(p.seq)) * 15 SECOND)) AS end_date
-    FROM Trip t
-    JOIN Point p ON t.trip_id = p.trip_id
-    GROUP BY t.trip_id, t.taxi_id, t.timestamp
-)
+-- Reads trip start/end times from trip_times_stage (see StagingManager)
 SELECT
     trip_id,
     taxi_id,
     start_time,
     end_time,
     TIMESTAMPDIFF(SECOND, start_time, end_time) / 60 AS duration_min
-FROM trip_durations
-WHERE start_date <> end_date
+FROM trip_times_stage
+WHERE DATE(start_time) <> DATE(end_time)
 ORDER BY start_time
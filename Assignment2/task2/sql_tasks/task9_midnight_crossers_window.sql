@@ -0,0 +1,12 @@
+-- task9_midnight_crossers.sql for trips starting in the --since/--until window
+SELECT
+    trip_id,
+    taxi_id,
+    start_time,
+    end_time,
+    TIMESTAMPDIFF(SECOND, start_time, end_time) / 60 AS duration_min
+FROM trip_times_stage
+WHERE start_time >= %(since)s
+  AND start_time < %(until)s
+  AND DATE(start_time) <> DATE(end_time)
+ORDER BY start_time
@@ -0,0 +1,47 @@
+# ------------------------------------------------------------
+# ParquetSink / stream_batches: results larger than one batch
+#
+#   python -m pytest tests
+# ------------------------------------------------------------
+import os
+import sys
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "task2"))
+
+from helpers.result_export import ParquetSink, stream_batches
+
+
+def make_batches(n_batches, batch_rows):
+    start = 0
+    for _ in range(n_batches):
+        yield pa.record_batch({
+            "trip_id": pa.array(range(start, start + batch_rows), pa.int64()),
+            "distance_km": pa.array([1.5] * batch_rows, pa.float64()),
+        })
+        start += batch_rows
+
+
+def test_parquet_sink_writes_several_batches(tmp_path):
+    path = str(tmp_path / "result.parquet")
+    rows, preview = stream_batches(make_batches(3, 1000), [ParquetSink(path)], preview_rows=20)
+
+    table = pq.read_table(path)
+    assert rows == table.num_rows == 3000
+    assert table.column("trip_id").to_pylist() == list(range(3000))
+    assert len(preview) == 20
+
+
+def test_parquet_sink_casts_later_batches_to_the_first_schema(tmp_path):
+    path = str(tmp_path / "result.parquet")
+    sink = ParquetSink(path)
+    sink.write(pa.record_batch({"taxi_id": pa.array([1, 2], pa.int64())}))
+    # A batch of only NULLs comes back from the database as the null type
+    sink.write(pa.record_batch({"taxi_id": pa.array([None, None], pa.null())}))
+    sink.close()
+
+    table = pq.read_table(path)
+    assert table.schema.field("taxi_id").type == pa.int64()
+    assert table.column("taxi_id").to_pylist() == [1, 2, None, None]
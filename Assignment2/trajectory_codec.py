@@ -0,0 +1,116 @@
+# ------------------------------------------------------------
+# Compact binary encoding of one trip's GPS points
+# Used for the TripTrajectory table, where every trip is one row with its
+# whole trajectory in a BLOB instead of one Point row per GPS point.
+#
+#   header   uint8 version, uint32 number of points (little-endian)
+#   body     zlib( int32 [lat0, lon0, dlat1, dlon1, ...] )
+#
+# Coordinates are stored in microdegrees (the Porto data has 6 decimals,
+# so nothing is lost) and every point after the first as the difference
+# to the previous one. Consecutive points are 15 s apart, so the deltas
+# are small numbers that zlib compresses well.
+# ------------------------------------------------------------
+import struct
+import zlib
+
+import numpy as np
+
+VERSION = 1
+SCALE = 1_000_000  # microdegrees
+HEADER = struct.Struct("<BI")
+
+
+def encode(lat, lon, level=6):
+    """Encode one trajectory (latitude and longitude arrays in degrees) as bytes."""
+    micro = to_micro(lat, lon)
+    micro[1:] = np.diff(micro, axis=0)
+    return HEADER.pack(VERSION, len(micro)) + zlib.compress(micro.astype("<i4").tobytes(), level)
+
+
+def point_count(blob):
+    version, n = HEADER.unpack_from(blob)
+    if version != VERSION:
+        raise ValueError(f"Unsupported trajectory encoding version {version}")
+    return n
+
+
+def decode(blob):
+    """(lat, lon) float64 arrays of one encoded trajectory."""
+    n = point_count(blob)
+    micro = np.frombuffer(zlib.decompress(blob[HEADER.size:]), dtype="<i4").reshape(n, 2)
+    coords = np.cumsum(micro, axis=0, dtype=np.int64) / SCALE
+    return coords[:, 0], coords[:, 1]
+
+
+def to_micro(lat, lon):
+    """(n, 2) int64 microdegrees [lat, lon] of coordinate arrays in degrees."""
+    micro = np.empty((len(lat), 2), dtype=np.int64)
+    micro[:, 0] = np.round(np.asarray(lat, dtype=np.float64) * SCALE)
+    micro[:, 1] = np.round(np.asarray(lon, dtype=np.float64) * SCALE)
+    return micro
+
+
+def delta_trips(micro, offsets):
+    """Per-trip deltas of flat microdegree points; every trip starts with its absolute first point."""
+    deltas = micro.copy()
+    deltas[1:] -= micro[:-1]
+    starts = offsets[:-1][np.diff(offsets) > 0]
+    deltas[starts] = micro[starts]
+    return deltas
+
+
+def undelta_trips(deltas, offsets):
+    """Inverse of delta_trips(): absolute int64 microdegrees of flat per-trip deltas."""
+    # One cumulative sum for all trips: subtract the running total at each
+    # trip start so every trip starts again from its absolute first point
+    counts = np.diff(offsets)
+    totals = np.cumsum(deltas, axis=0, dtype=np.int64)
+    starts = offsets[:-1][counts > 0] - offsets[0]
+    before = np.zeros((len(starts), 2), dtype=np.int64)
+    before[starts > 0] = totals[starts[starts > 0] - 1]
+    totals -= np.repeat(before, counts[counts > 0], axis=0)
+    return totals
+
+
+def encode_trips(lat, lon, offsets, level=6):
+    """Encode every trip of flat (lat, lon, offsets) arrays (see trajectory_utils.py)."""
+    body = delta_trips(to_micro(lat, lon), offsets).astype("<i4")
+    return [HEADER.pack(VERSION, e - s) + zlib.compress(body[s:e].tobytes(), level)
+            for s, e in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def decode_trips(blobs):
+    """Decode a sequence of blobs into flat (lat, lon, offsets) arrays, one trip per blob."""
+    counts = np.fromiter((point_count(b) for b in blobs), dtype=np.int64, count=len(blobs))
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    micro = np.empty((int(offsets[-1]), 2), dtype=np.int64)
+    for blob, s, e in zip(blobs, offsets[:-1], offsets[1:]):
+        micro[s:e] = np.frombuffer(zlib.decompress(blob[HEADER.size:]), dtype="<i4").reshape(-1, 2)
+
+    coords = undelta_trips(micro, offsets) / SCALE
+    return coords[:, 0].copy(), coords[:, 1].copy(), offsets
+
+
+def trajectory_rows(points):
+    """
+    TripTrajectory rows (trip_id, n_points, blob) for a frame of Point rows
+    (trip_id, seq, latitude, longitude) grouped by trip and ordered by seq.
+    """
+    trip_ids = points["trip_id"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, trip_ids[1:] != trip_ids[:-1]]) if len(trip_ids) else np.empty(0, np.int64)
+    offsets = np.r_[starts, len(trip_ids)].astype(np.int64)
+    blobs = encode_trips(points["latitude"].to_numpy(), points["longitude"].to_numpy(), offsets)
+    return list(zip(trip_ids[starts].tolist(), np.diff(offsets).tolist(), blobs))
+
+
+def endpoints(lat, lon, offsets):
+    """(start_lat, start_lon, end_lat, end_lon) per trip of flat arrays; NaN for empty trips."""
+    counts = np.diff(offsets)
+    result = np.full((4, len(counts)), np.nan)
+    has_points = counts > 0
+    first, last = offsets[:-1][has_points], offsets[1:][has_points] - 1
+    result[:, has_points] = lat[first], lon[first], lat[last], lon[last]
+    return tuple(result)
@@ -0,0 +1,216 @@
+# ------------------------------------------------------------
+# Binary trajectory file (.ptrj): every trip's GPS points in one file
+# Written by 03-prepare_for_db.py next to points_clean.csv, read through
+# a memory map so a scan touches only the bytes it needs.
+#
+#   header  64 bytes, little-endian:
+#           magic b"PTRJ", uint16 version, uint16 encoding, uint32 scale,
+#           int64 trips, int64 points, int64 data bytes, int64 index offset
+#   data    the points of all trips, trip after trip
+#   index   int64 trip_id[trips], int64 point offsets[trips + 1],
+#           int64 byte offsets[trips + 1] into the data (8-byte aligned)
+#
+# Coordinates are microdegrees (see trajectory_codec.py) in one of two
+# encodings:
+#   fixed   int32 [lat, lon] per point; trip(i) is a zero-copy view
+#   varint  per-trip deltas, zigzag + LEB128 varints (~2.5 bytes/point);
+#           decoded a block of trips at a time with numpy
+# ------------------------------------------------------------
+import struct
+
+import numpy as np
+
+from trajectory_codec import SCALE, delta_trips, to_micro, undelta_trips
+
+MAGIC = b"PTRJ"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIqqqq")
+HEADER_SIZE = 64
+ENCODINGS = {"fixed": 0, "varint": 1}
+
+
+# ------------------------------------------------------------
+# Varints
+# ------------------------------------------------------------
+def zigzag(values):
+    """Signed int64 -> uint64 with small magnitudes mapped to small numbers."""
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def unzigzag(values):
+    values = values.astype(np.uint64)
+    return (values >> np.uint64(1)).astype(np.int64) ^ -(values & np.uint64(1)).astype(np.int64)
+
+
+def varint_encode(values):
+    """LEB128 bytes of uint64 values; returns (uint8 buffer, bytes per value)."""
+    values = np.asarray(values, dtype=np.uint64)
+    nbytes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10):
+        nbytes += values >= np.uint64(1 << (7 * k))
+    positions = np.zeros(len(values), dtype=np.int64)
+    np.cumsum(nbytes[:-1], out=positions[1:])
+
+    out = np.empty(int(nbytes.sum()), dtype=np.uint8)
+    rest = values.copy()
+    for k in range(int(nbytes.max()) if len(values) else 0):
+        active = np.flatnonzero(nbytes > k)
+        more = np.where(nbytes[active] > k + 1, 0x80, 0)
+        out[positions[active] + k] = (rest[active] & np.uint64(0x7F)).astype(np.uint8) | more
+        rest[active] >>= np.uint64(7)
+    return out, nbytes
+
+
+def varint_decode(buffer):
+    """uint64 values of a buffer of complete LEB128 varints."""
+    buffer = np.asarray(buffer, dtype=np.uint8)
+    ends = np.flatnonzero(buffer < 0x80)
+    starts = np.r_[0, ends[:-1] + 1]
+    lengths = ends - starts + 1
+    values = np.zeros(len(ends), dtype=np.uint64)
+    for k in range(int(lengths.max()) if len(ends) else 0):
+        active = np.flatnonzero(lengths > k)
+        values[active] |= (buffer[starts[active] + k] & 0x7F).astype(np.uint64) << np.uint64(7 * k)
+    return values
+
+
+# ------------------------------------------------------------
+# Writer
+# ------------------------------------------------------------
+class TrajectoryWriter:
+    """
+    Streams trips into a .ptrj file, one add() per chunk of flat arrays:
+
+        with TrajectoryWriter("trajectories.ptrj") as writer:
+            writer.add(trip_ids, lat, lon, offsets)
+    """
+
+    def __init__(self, path, encoding="varint"):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding {encoding!r}; use one of {sorted(ENCODINGS)}")
+        self.path = path
+        self.encoding = encoding
+        self._file = open(path, "wb")
+        self._file.write(bytes(HEADER_SIZE))  # patched in close()
+        self._trip_ids = []
+        self._point_counts = []
+        self._byte_counts = []
+
+    def add(self, trip_ids, lat, lon, offsets):
+        """Append the trips of flat (lat, lon, offsets) arrays (see trajectory_utils.py)."""
+        offsets = np.asarray(offsets, dtype=np.int64)
+        micro = to_micro(lat, lon)
+        counts = np.diff(offsets)
+
+        if self.encoding == "fixed":
+            data = micro.astype("<i4").tobytes()
+            byte_counts = counts * 8
+        else:
+            data, nbytes = varint_encode(zigzag(delta_trips(micro, offsets).ravel()))
+            value_ends = np.zeros(len(nbytes) + 1, dtype=np.int64)
+            np.cumsum(nbytes, out=value_ends[1:])
+            byte_counts = np.diff(value_ends[offsets * 2])
+            data = data.tobytes()
+
+        self._file.write(data)
+        self._trip_ids.append(np.asarray(trip_ids, dtype=np.int64))
+        self._point_counts.append(counts)
+        self._byte_counts.append(byte_counts)
+
+    def close(self):
+        if self._file.closed:
+            return
+        trip_ids = np.concatenate(self._trip_ids) if self._trip_ids else np.empty(0, np.int64)
+        point_offsets = np.zeros(len(trip_ids) + 1, dtype=np.int64)
+        byte_offsets = np.zeros(len(trip_ids) + 1, dtype=np.int64)
+        if self._point_counts:
+            np.cumsum(np.concatenate(self._point_counts), out=point_offsets[1:])
+            np.cumsum(np.concatenate(self._byte_counts), out=byte_offsets[1:])
+
+        data_bytes = int(byte_offsets[-1])
+        index_offset = -(-(HEADER_SIZE + data_bytes) // 8) * 8
+        self._file.write(bytes(index_offset - HEADER_SIZE - data_bytes))
+        for array in (trip_ids, point_offsets, byte_offsets):
+            self._file.write(array.astype("<i8").tobytes())
+
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, ENCODINGS[self.encoding], SCALE,
+                                     len(trip_ids), int(point_offsets[-1]), data_bytes, index_offset))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ------------------------------------------------------------
+# Reader
+# ------------------------------------------------------------
+class TrajectoryFile:
+    """
+    Memory-mapped .ptrj reader. trip_ids and offsets are views of the
+    index; trip(i) returns the (lat, lon) of one trip and blocks() the
+    flat (lat, lon, offsets) arrays of many trips at a time.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, encoding, scale, n_trips, n_points, data_bytes, index_offset = \
+            HEADER.unpack_from(self._map[:HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a trajectory file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported trajectory file version {version}")
+
+        self.encoding = {code: name for name, code in ENCODINGS.items()}[encoding]
+        self.scale = scale
+        self.n_points = n_points
+        self.data = self._map[HEADER_SIZE:HEADER_SIZE + data_bytes]
+        index = self._map[index_offset:index_offset + 8 * (3 * n_trips + 2)].view("<i8")
+        self.trip_ids = index[:n_trips]
+        self.offsets = index[n_trips:2 * n_trips + 1]
+        self.byte_offsets = index[2 * n_trips + 1:]
+        self._positions = None
+
+    def __len__(self):
+        return len(self.trip_ids)
+
+    def index_of(self, trip_id):
+        """Position of trip_id in the file (KeyError if it is not there)."""
+        if self._positions is None:
+            self._positions = {t: i for i, t in enumerate(self.trip_ids.tolist())}
+        return self._positions[trip_id]
+
+    def micro(self, start=0, end=None):
+        """(n, 2) int32/int64 microdegrees of trips [start, end); a view of the map for fixed files."""
+        end = len(self) if end is None else end
+        lo, hi = int(self.byte_offsets[start]), int(self.byte_offsets[end])
+        if self.encoding == "fixed":
+            return self.data[lo:hi].view("<i4").reshape(-1, 2)
+        deltas = unzigzag(varint_decode(self.data[lo:hi])).reshape(-1, 2)
+        return undelta_trips(deltas, self.offsets[start:end + 1])
+
+    def trip(self, i):
+        """(lat, lon) float64 arrays of the i-th trip."""
+        coords = self.micro(i, i + 1) / self.scale
+        return coords[:, 0], coords[:, 1]
+
+    def blocks(self, start=0, end=None, block_points=4_000_000):
+        """Flat (trip_ids, lat, lon, offsets) of trips [start, end), about block_points points per block."""
+        end = len(self) if end is None else end
+        while start < end:
+            stop = int(np.searchsorted(self.offsets, self.offsets[start] + block_points, side="right")) - 1
+            stop = min(max(stop, start + 1), end)
+            coords = self.micro(start, stop) / self.scale
+            offsets = self.offsets[start:stop + 1] - self.offsets[start]
+            yield self.trip_ids[start:stop], coords[:, 0].copy(), coords[:, 1].copy(), offsets
+            start = stop
+
+    def read_all(self):
+        """Flat (trip_ids, lat, lon, offsets) of the whole file."""
+        coords = self.micro() / self.scale
+        return np.asarray(self.trip_ids), coords[:, 0].copy(), coords[:, 1].copy(), np.asarray(self.offsets)
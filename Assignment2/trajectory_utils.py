@@ -0,0 +1,134 @@
+# ------------------------------------------------------------
+# Vectorized trajectory metrics
+# Trajectories are stored flat: one latitude and one longitude array with
+# the points of all trips after each other, plus an offsets array where
+# trip i owns points offsets[i]:offsets[i + 1]. All functions take
+# latitude before longitude, like haversine().
+# ------------------------------------------------------------
+import json
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0
+SAMPLE_SECONDS = 15  # the taxis report one GPS point every 15 seconds
+
+
+def haversine_np(lat1, lon1, lat2, lon2):
+    """Element-wise Haversine distance (km) for numpy arrays of coordinates."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def flatten_polylines(polylines):
+    """
+    Turn parsed POLYLINEs (lists of [lon, lat] pairs, one list per trip) into
+    flat (lat, lon, offsets) arrays. Anything that is not a list counts as an
+    empty trip.
+    """
+    polylines = [p if isinstance(p, list) else [] for p in polylines]
+    lengths = np.fromiter((len(p) for p in polylines), dtype=np.int64, count=len(polylines))
+    offsets = np.zeros(len(polylines) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    total = int(offsets[-1])
+    coords = np.fromiter(chain.from_iterable(chain.from_iterable(polylines)), dtype=np.float64, count=2 * total)
+    coords = coords.reshape(total, 2)
+    return coords[:, 1].copy(), coords[:, 0].copy(), offsets
+
+
+def _parse_one(polyline_str):
+    try:
+        coords = json.loads(polyline_str)
+        return coords if isinstance(coords, list) else []
+    except Exception:
+        return []
+
+
+def parse_polylines(strings, chunk_rows=100_000):
+    """
+    Parse POLYLINE strings straight into flat (lat, lon, offsets) arrays,
+    chunk_rows trips at a time so the parsed Python lists of only one chunk
+    exist at once. Unparseable values count as empty trips.
+    """
+    strings = list(strings)
+    lat_parts, lon_parts, lengths = [], [], []
+    for lo in range(0, len(strings), chunk_rows):
+        chunk = strings[lo:lo + chunk_rows]
+        try:
+            # One json.loads call for the whole chunk is much faster than one per trip
+            polylines = json.loads("[" + ",".join(chunk) + "]")
+            if len(polylines) != len(chunk):
+                raise ValueError("row count changed")
+        except Exception:
+            polylines = [_parse_one(s) for s in chunk]
+        lat, lon, offsets = flatten_polylines(polylines)
+        lat_parts.append(lat)
+        lon_parts.append(lon)
+        lengths.append(np.diff(offsets))
+
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    if lengths:
+        np.cumsum(np.concatenate(lengths), out=offsets[1:])
+    if not lat_parts:
+        return np.empty(0), np.empty(0), offsets
+    return np.concatenate(lat_parts), np.concatenate(lon_parts), offsets
+
+
+def format_polylines(lat, lon, offsets, trips=None):
+    """
+    POLYLINE strings ("[[lon,lat],...]") of the given trips (all by default)
+    rebuilt from flat (lat, lon, offsets) arrays; the inverse of parse_polylines().
+    """
+    trips = range(len(offsets) - 1) if trips is None else trips
+    return [json.dumps(np.column_stack([lon[offsets[i]:offsets[i + 1]], lat[offsets[i]:offsets[i + 1]]]).tolist(),
+                       separators=(",", ":"))
+            for i in trips]
+
+
+def polyline_lengths(strings):
+    """Number of points per POLYLINE string, counted without parsing ("[]" has 0)."""
+    strings = pd.Series(strings, dtype="string")
+    return (strings.str.count(r"\[").fillna(1) - 1).clip(lower=0).astype(np.int64).to_numpy()
+
+
+def trip_index(offsets):
+    """Trip number of every point."""
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def point_steps(lat, lon, trip_ids):
+    """
+    Distance (km) from each point to the previous point of the same trip;
+    0 for the first point of a trip. Points must be grouped by trip and in
+    sequence order; `trip_ids` is any per-point array identifying the trip.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    trip_ids = np.asarray(trip_ids)
+
+    steps = np.zeros(len(lat), dtype=np.float64)
+    if len(lat) > 1:
+        steps[1:] = haversine_np(lat[:-1], lon[:-1], lat[1:], lon[1:])
+        steps[1:][trip_ids[1:] != trip_ids[:-1]] = 0.0
+    return steps
+
+
+def trip_distances(lat, lon, offsets):
+    """Length (km) of every trip: the sum of the distances between consecutive points."""
+    trips = trip_index(offsets)
+    steps = point_steps(lat, lon, trips)
+    return np.bincount(trips, weights=steps, minlength=len(offsets) - 1)
+
+
+def trip_durations(offsets, sample_seconds=SAMPLE_SECONDS):
+    """Duration (s) of every trip, counted as sample_seconds per GPS point."""
+    return np.diff(offsets) * sample_seconds
+
+
+def trip_metrics(polylines, sample_seconds=SAMPLE_SECONDS):
+    """(distance_km, duration_sec) arrays for parsed POLYLINEs."""
+    lat, lon, offsets = flatten_polylines(polylines)
+    return trip_distances(lat, lon, offsets), trip_durations(offsets, sample_seconds)
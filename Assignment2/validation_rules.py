@@ -0,0 +1,149 @@
+# ------------------------------------------------------------
+# Declarative validation rules
+# A rule is a list of column predicates describing the rows that violate
+# it. A RuleSet evaluates every distinct predicate once per chunk (rules
+# share e.g. CALL_TYPE == 'A'), counts the violations per rule and drops
+# the rows that violate a rule marked drop=True. Used by 01-eda.py,
+# eda_stats.py and 02-preprocess_data.py.
+# ------------------------------------------------------------
+import numpy as np
+import pandas as pd
+
+
+class Predicate:
+    """A vectorized test on one column, e.g. Predicate("CALL_TYPE", "eq", "A")."""
+
+    OPS = {
+        "eq": lambda col, value: col == value,
+        "isin": lambda col, value: col.isin(value),
+        "notin": lambda col, value: ~col.isin(value),
+        "null": lambda col, value: col.isna(),
+        "notnull": lambda col, value: col.notna(),
+    }
+
+    def __init__(self, column, op, value=None):
+        if op not in self.OPS:
+            raise ValueError(f"Unknown predicate operator: {op}")
+        self.column = column
+        self.op = op
+        self.value = tuple(value) if isinstance(value, (list, set)) else value
+
+    @property
+    def key(self):
+        return self.column, self.op, self.value
+
+    def evaluate(self, frame):
+        return np.asarray(self.OPS[self.op](frame[self.column], self.value), dtype=bool)
+
+
+def eq(column, value):
+    return Predicate(column, "eq", value)
+
+
+def isin(column, values):
+    return Predicate(column, "isin", values)
+
+
+def notin(column, values):
+    return Predicate(column, "notin", values)
+
+
+def is_null(column):
+    return Predicate(column, "null")
+
+
+def not_null(column):
+    return Predicate(column, "notnull")
+
+
+class Rule:
+    """
+    Rows violate the rule when all `all_of` predicates hold and, if given,
+    at least one of `any_of`. Rows violating a rule with drop=True are
+    removed by RuleSet.apply(); other rules are only counted.
+    """
+
+    def __init__(self, description, all_of, any_of=(), drop=True):
+        self.description = description
+        self.all_of = list(all_of)
+        self.any_of = list(any_of)
+        self.drop = drop
+
+    def predicates(self):
+        return self.all_of + self.any_of
+
+
+# The Step 4b consistency rules of the EDA. 02-preprocess keeps A trips with
+# an ORIGIN_CALL and B trips with an ORIGIN_STAND even if the other origin is
+# set, so those two rules are only reported.
+CALL_TYPE_RULES = [
+    Rule("CALL_TYPE = 'A' but ORIGIN_CALL is NULL",
+         [eq("CALL_TYPE", "A"), is_null("ORIGIN_CALL")]),
+    Rule("CALL_TYPE = 'A' but ORIGIN_STAND is NOT NULL",
+         [eq("CALL_TYPE", "A"), not_null("ORIGIN_STAND")], drop=False),
+    Rule("CALL_TYPE = 'B' but ORIGIN_STAND is NULL",
+         [eq("CALL_TYPE", "B"), is_null("ORIGIN_STAND")]),
+    Rule("CALL_TYPE = 'B' but ORIGIN_CALL is NOT NULL",
+         [eq("CALL_TYPE", "B"), not_null("ORIGIN_CALL")], drop=False),
+    Rule("CALL_TYPE = 'C' but ORIGIN_CALL or ORIGIN_STAND is NOT NULL",
+         [eq("CALL_TYPE", "C")], any_of=[not_null("ORIGIN_CALL"), not_null("ORIGIN_STAND")]),
+]
+
+UNKNOWN_CALL_TYPE = Rule("CALL_TYPE is not 'A', 'B' or 'C'", [notin("CALL_TYPE", ["A", "B", "C"])])
+
+
+class RuleSet:
+    """Evaluates a list of rules in one pass per chunk and keeps running totals."""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.drop_rules = np.array([rule.drop for rule in self.rules], dtype=bool)
+        self.rows = 0
+        self.violations = np.zeros(len(self.rules), dtype=np.int64)
+        self.invalid_rows = 0
+        self.dropped_rows = 0
+
+    def evaluate(self, frame):
+        """Boolean matrix (rules x rows): True where the row violates the rule."""
+        masks = {}
+        for rule in self.rules:
+            for predicate in rule.predicates():
+                if predicate.key not in masks:
+                    masks[predicate.key] = predicate.evaluate(frame)
+
+        result = np.zeros((len(self.rules), len(frame)), dtype=bool)
+        for i, rule in enumerate(self.rules):
+            mask = np.logical_and.reduce([masks[p.key] for p in rule.all_of]) if rule.all_of \
+                else np.ones(len(frame), dtype=bool)
+            if rule.any_of:
+                mask &= np.logical_or.reduce([masks[p.key] for p in rule.any_of])
+            result[i] = mask
+        return result
+
+    def count(self, frame):
+        """Violations per rule for `frame`; also returns the rows violating any rule."""
+        violations = self.evaluate(frame)
+        invalid = violations.any(axis=0)
+        self.rows += len(frame)
+        self.violations += violations.sum(axis=1)
+        self.invalid_rows += int(invalid.sum())
+        return violations.sum(axis=1), invalid
+
+    def apply(self, frame):
+        """Count the violations of `frame` and return it without the rows that violate a drop rule."""
+        violations = self.evaluate(frame)
+        self.rows += len(frame)
+        self.violations += violations.sum(axis=1)
+        self.invalid_rows += int(violations.any(axis=0).sum())
+
+        dropped = violations[self.drop_rules].any(axis=0)
+        self.dropped_rows += int(dropped.sum())
+        return frame[~dropped]
+
+    def summary(self):
+        """Running totals per rule as a DataFrame."""
+        return pd.DataFrame({
+            "Violation Description": [rule.description for rule in self.rules],
+            "Count": self.violations,
+            "Action": ["removed" if rule.drop else "reported" for rule in self.rules],
+        })